@@ -0,0 +1,311 @@
+# feeds/backfill.py (fill the trades missed across a reconnect from the venues' REST trade history)
+
+import asyncio
+import os
+from datetime import datetime
+
+import aiohttp
+
+from feeds.fast_decode import (decode_binance_agg_trade, decode_binance_kline, decode_binance_trade,
+                               decode_bybit_trades, decode_coinbase_match, loads)
+
+# Replaces scheme://host of every endpoint below, e.g. a local stub server
+BACKFILL_BASE_URL = os.getenv("BACKFILL_BASE_URL")
+BINANCE_API_KEY = os.getenv("BINANCE_API_KEY")  # historicalTrades accepts (some deployments require) a key
+
+# {} is the venue instrument name (feeds/symbols.py); "@..." streams are the non-default granularities
+REST = {
+    "binance_spot": "https://api.binance.com/api/v3/historicalTrades?symbol={}",
+    "binance_perp": "https://fapi.binance.com/fapi/v1/historicalTrades?symbol={}",
+    "binance_spot@aggTrade": "https://api.binance.com/api/v3/aggTrades?symbol={}",
+    "binance_perp@aggTrade": "https://fapi.binance.com/fapi/v1/aggTrades?symbol={}",
+    "binance_spot@kline": "https://api.binance.com/api/v3/klines?symbol={}&interval=1m",
+    "binance_perp@kline": "https://fapi.binance.com/fapi/v1/klines?symbol={}&interval=1m",
+    "coinbase": "https://api.exchange.coinbase.com/products/{}/trades",
+    "bybit": "https://api.bybit.com/v5/market/recent-trade?category=linear&symbol={}",
+    "okx": "https://www.okx.com/api/v5/market/history-trades?instId={}&type=1"
+}
+
+# Streams keyed on time (ms) rather than a trade id: max_gap does not apply
+TIME_KEYED = {"bybit", "binance_spot@kline", "binance_perp@kline"}
+
+
+def rest_url(stream, instrument, **params):
+    url = REST[stream].format(instrument)
+    if BACKFILL_BASE_URL:
+        url = BACKFILL_BASE_URL.rstrip("/") + "/" + url.split("/", 3)[3]
+    query = "&".join(f"{k}={v}" for k, v in params.items())
+    return url + ("&" if "?" in url else "?") + query if query else url
+
+
+async def _get_json(session, url, headers=None):
+    async with session.get(url, headers=headers) as res:
+        res.raise_for_status()
+        return await res.json(content_type=None)
+
+
+# --- Venue fetchers: fetch(session, instrument, last, first, semaphore) -> trades strictly between last and first ---
+# A trade is (price, qty, side, exch_ts, trade_id); the list comes back oldest first.
+
+async def _pages(session, semaphore, urls, parse, headers=None):
+    async def fetch(url):
+        async with semaphore:
+            return parse(await _get_json(session, url, headers))
+
+    pages = await asyncio.gather(*(fetch(url) for url in urls))
+    return [trade for page in pages for trade in page]
+
+
+def _window(trades, last, first):
+    unique = {trade[4]: trade for trade in trades if last < trade[4] < first}
+    return [unique[trade_id] for trade_id in sorted(unique)]
+
+
+def _binance_fetcher(stream):
+    # historicalTrades pages raw trades by id, aggTrades aggregate trades by aggregate id (a)
+    page_size = 1000
+
+    def parse(rows):
+        if stream.endswith("@aggTrade"):
+            return [(float(r["p"]), float(r["q"]), -1 if r["m"] else 1, r["T"] / 1000, r["a"]) for r in rows]
+        return [(float(r["price"]), float(r["qty"]), -1 if r["isBuyerMaker"] else 1, r["time"] / 1000, r["id"])
+                for r in rows]
+
+    async def fetch(session, instrument, last, first, semaphore):
+        urls = [rest_url(stream, instrument, fromId=start, limit=min(page_size, first - start))
+                for start in range(last + 1, first, page_size)]
+        headers = {"X-MBX-APIKEY": BINANCE_API_KEY} if BINANCE_API_KEY else None
+        return _window(await _pages(session, semaphore, urls, parse, headers), last, first)
+
+    return fetch
+
+
+def _binance_kline_fetcher(stream):
+    # Keys are kline open times: the kline open at the drop (last) is fetched again, as it
+    # kept trading, and apply() only adds what it had not counted yet
+    page_ms = 1000 * 60000
+
+    def parse(rows):
+        # [open ms, o, h, l, c, volume, close ms, quote volume, trades, taker buy volume, ...]
+        return [(r[0], 2 * float(r[9]) - float(r[5]), float(r[4]), r[6] / 1000) for r in rows]
+
+    async def fetch(session, instrument, last, first, semaphore):
+        urls = [rest_url(stream, instrument, startTime=start, endTime=min(start + page_ms, first) - 1, limit=1000)
+                for start in range(last, first, page_ms)]
+        klines = {kline[0]: kline for kline in await _pages(session, semaphore, urls, parse) if last <= kline[0] < first}
+        return [klines[open_ms] for open_ms in sorted(klines)]
+
+    return fetch
+
+
+async def fetch_coinbase(session, instrument, last, first, semaphore):
+    # after=X returns up to limit trades with trade_id < X, newest first
+    page_size = 1000
+
+    def parse(rows):
+        return [(float(r["price"]), float(r["size"]), 1 if r["side"] == "buy" else -1,
+                 datetime.fromisoformat(r["time"].replace("Z", "+00:00")).timestamp(), r["trade_id"])
+                for r in rows]
+
+    urls = [rest_url("coinbase", instrument, after=after, limit=page_size) for after in range(first, last + 1, -page_size)]
+    return _window(await _pages(session, semaphore, urls, parse), last, first)
+
+
+async def fetch_okx(session, instrument, last, first, semaphore):
+    # type=1 pages by tradeId: after=X returns up to 100 trades with tradeId < X, newest first
+    page_size = 100
+
+    def parse(body):
+        return [(float(r["px"]), float(r["sz"]), 1 if r["side"] == "buy" else -1, int(r["ts"]) / 1000,
+                 int(r["tradeId"])) for r in body.get("data", ())]
+
+    urls = [rest_url("okx", instrument, after=after, limit=page_size) for after in range(first, last + 1, -page_size)]
+    trades = await _pages(session, semaphore, urls, parse)
+    # Trade ids are sequential per instrument; walk down from the oldest one seen if they were not
+    lowest = min((trade[4] for trade in trades), default=first)
+    while lowest > last + 1:
+        page = parse(await _get_json(session, rest_url("okx", instrument, after=lowest, limit=page_size)))
+        if not page:
+            break
+        trades += page
+        lowest = min(trade[4] for trade in page)
+    return _window(trades, last, first)
+
+
+async def fetch_bybit(session, instrument, last, first, semaphore):
+    # Linear trade ids ("i") are not sequential and there is no paged history, so bybit keys on
+    # trade time in ms and recovers what is still in the last 1000 trades
+    def parse(body):
+        return [(float(r["price"]), float(r["size"]), 1 if r["side"] == "Buy" else -1, int(r["time"]) / 1000,
+                 int(r["time"]), r["execId"]) for r in body.get("result", {}).get("list", ())]
+
+    async with semaphore:
+        rows = parse(await _get_json(session, rest_url("bybit", instrument, limit=1000)))
+    rows = sorted((row for row in rows if last < row[4] < first), key=lambda row: row[4])
+    return [(price, qty, side, exch_ts, trade_id) for price, qty, side, exch_ts, _, trade_id in rows]
+
+
+FETCHERS = {
+    "binance_spot": _binance_fetcher("binance_spot"),
+    "binance_perp": _binance_fetcher("binance_perp"),
+    "binance_spot@aggTrade": _binance_fetcher("binance_spot@aggTrade"),
+    "binance_perp@aggTrade": _binance_fetcher("binance_perp@aggTrade"),
+    "binance_spot@kline": _binance_kline_fetcher("binance_spot@kline"),
+    "binance_perp@kline": _binance_kline_fetcher("binance_perp@kline"),
+    "coinbase": fetch_coinbase,
+    "bybit": fetch_bybit,
+    "okx": fetch_okx
+}
+
+
+# --- (instrument, first-trade key) of a live message; the key is what last_keys hold ---
+def _binance_key(msg):
+    trade = decode_binance_trade(msg)
+    return trade[5], int(trade[4])
+
+
+def _binance_agg_key(msg):
+    trade = decode_binance_agg_trade(msg)
+    return trade[5], int(trade[4])
+
+
+def _binance_kline_key(msg):
+    kline = decode_binance_kline(msg)
+    return kline[4], kline[2]
+
+
+def _coinbase_key(msg):
+    match = decode_coinbase_match(msg)
+    return None if match is None or match[4] is None else (match[5], int(match[4]))
+
+
+def _okx_key(msg):
+    # On the (aggregated) trades channel tradeId is the last of count fills, so the message starts count - 1 earlier
+    trades = loads(msg).get("data")
+    if not trades:
+        return None
+    return trades[0]["instId"], min(int(t["tradeId"]) - int(t.get("count", 1)) + 1 for t in trades)
+
+
+def _bybit_key(msg):
+    trades = decode_bybit_trades(msg)
+    return (trades[0][5], min(int(trade[3]) for trade in trades)) if trades else None
+
+
+KEYS = {
+    "binance_spot": _binance_key,
+    "binance_perp": _binance_key,
+    "binance_spot@aggTrade": _binance_agg_key,
+    "binance_perp@aggTrade": _binance_agg_key,
+    "binance_spot@kline": _binance_kline_key,
+    "binance_perp@kline": _binance_kline_key,
+    "coinbase": _coinbase_key,
+    "bybit": _bybit_key,
+    "okx": _okx_key
+}
+
+
+class GapFiller:
+    """
+    Recovers the trades a stream missed while it was disconnected, per symbol.
+
+    On a reconnect (on_connect, called by feeds/feed_supervisor.py) each symbol's live
+    messages are buffered instead of parsed from its first live trade on. That trade's
+    key (sequential trade id; trade time for Bybit, open time for Binance klines) and
+    last_keys[sid], the last one the feed applied for the symbol before the drop, bound
+    its gap; the missing range
+    is fetched from the venue's REST trade history as concurrent pages, applied oldest
+    first through apply(sid, ...), and only then are the symbol's buffered messages
+    parsed. Other symbols keep flowing meanwhile. If a backfill fails or times out the
+    buffer is parsed anyway and the gap is reported. Gaps above max_gap trades are not
+    fetched.
+
+    Multiplexed messages carry one instrument each (ids maps it to the symbol id).
+    """
+
+    def __init__(self, stream, process, last_keys, ids, apply, max_gap=200000, concurrency=4, timeout=30):
+        self.stream = stream
+        self.process = process
+        self.last_keys = last_keys
+        self.ids = ids
+        self.apply = apply
+        self.key = KEYS[stream]
+        self.fetch = FETCHERS[stream]
+        self.max_gap = max_gap
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+        self._pending = {}  # sid -> last key, symbols whose first live trade is still to come
+        self._buffers = {}  # sid -> live messages held while the symbol backfills
+        self._tasks = {}
+        self.backfilled = 0
+        self.failed = 0
+
+    def on_connect(self):
+        """Returns the handler for the new connection: buffering if there is a gap to check."""
+        self._finish_all()  # dropped again mid-backfill: give up on those
+        self._pending = {sid: int(last) for sid, last in enumerate(self.last_keys) if last is not None}
+        if not self._pending:
+            return None  # first connect, nothing to recover
+        self._semaphore = asyncio.Semaphore(self.concurrency)  # shared by every symbol's pages
+        return self._handle
+
+    def _handle(self, msg):
+        if not self._pending and not self._buffers:
+            self.process(msg)
+            return
+        try:
+            instrument, first = self.key(msg)
+            sid = self.ids[instrument]
+        except Exception:
+            sid = None  # subscription ack, heartbeat or other non-trade message
+        if sid in self._buffers:
+            self._buffers[sid].append(msg)
+        elif sid in self._pending:
+            self._buffers[sid] = [msg]
+            self._tasks[sid] = asyncio.get_running_loop().create_task(
+                self._backfill(sid, instrument, self._pending.pop(sid), first)
+            )
+        else:
+            self.process(msg)
+
+    async def _backfill(self, sid, instrument, last, first):
+        name = f"{self.stream} {instrument}"
+        try:
+            if first - last > self.max_gap and self.stream not in TIME_KEYED:
+                print(f"[X] {name} gap of {first - last - 1} trades is too large to backfill")
+                return
+            if first - last <= 1:
+                return
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                trades = await asyncio.wait_for(
+                    self.fetch(session, instrument, last, first, self._semaphore), self.timeout
+                )
+            for trade in trades:
+                self.apply(sid, *trade)
+            self.backfilled += len(trades)
+            unit = "klines" if self.stream.endswith("@kline") else "trades"
+            print(f"[✓] {name} backfilled {len(trades)} {unit} missed across the reconnect")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            print(f"[X] {name} backfill of ({last}, {first}) failed, CVD misses that range:",
+                  str(e) or type(e).__name__)
+        finally:
+            if self._tasks.get(sid) is asyncio.current_task():  # not already given up by on_connect
+                del self._tasks[sid]
+                self._finish(sid)
+
+    def _finish(self, sid):
+        task = self._tasks.pop(sid, None)
+        if task is not None:
+            task.cancel()
+        for msg in self._buffers.pop(sid, ()):
+            self.process(msg)
+
+    def _finish_all(self):
+        for sid in list(self._buffers):
+            self._finish(sid)
+        self._pending = {}
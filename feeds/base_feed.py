@@ -0,0 +1,75 @@
+# feeds/base_feed.py
+
+from collections import namedtuple
+
+from feeds.micro_bars import BarAggregator
+from utils import clock
+
+# One taker trade as seen by a feed. side is +1 when the trade adds to CVD, -1 when it subtracts.
+# exch_ts is the venue's trade time in epoch seconds; trade_id is the venue's raw id (int or str).
+# Trades carry no symbol: the feeds emit them for their primary symbol (id 0) only, see feeds/symbols.py.
+Trade = namedtuple(
+    "Trade",
+    ["venue", "price", "qty", "side", "recv_ts", "exch_ts", "trade_id"],
+    defaults=(None, None)
+)
+
+
+class BaseFeed:
+    """
+    Shared trade fan-out for the venue trackers.
+    Listeners are plain callables taking a Trade; they run inline on the
+    websocket reader, so they must be cheap and must not block.
+    granularities lists the stream granularities a tracker can build CVD from.
+    """
+
+    granularities = ("trade",)
+
+    def __init__(self):
+        self.listeners = []
+        self.bars = None
+        self.recv_ts = None  # set by the websocket read loops as each message arrives
+        self.streams = {}    # stream name -> StreamHealth, registered by feeds/feed_supervisor.py
+
+    def enable_bars(self, bar_seconds=1.0, maxlen=3600):
+        """
+        Starts folding this feed's trades into micro-bars (see feeds/micro_bars.py).
+        Returns the BarAggregator so callers can add bar listeners.
+        """
+        if self.bars is None:
+            self.bars = BarAggregator(bar_seconds, maxlen)
+            self.add_listener(self.bars)
+        return self.bars
+
+    def get_bars(self, venue=None, since=None):
+        if self.bars is None:
+            return []
+        return self.bars.get_bars(venue, since)
+
+    def check_granularity(self, granularity):
+        if granularity not in self.granularities:
+            raise ValueError(f"{type(self).__name__} supports granularity {', '.join(self.granularities)}, "
+                             f"not {granularity!r}")
+        return granularity
+
+    def is_healthy(self):
+        """False while any of this feed's supervised streams is disconnected or stale."""
+        return all(health.healthy for health in self.streams.values())
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _emit_trade(self, venue, price, qty, side, exch_ts=None, trade_id=None):
+        if not self.listeners:
+            return
+        recv_ts = self.recv_ts if self.recv_ts is not None else clock.now()
+        trade = Trade(venue, price, qty, side, recv_ts, exch_ts, trade_id)
+        for listener in self.listeners:
+            try:
+                listener(trade)
+            except Exception as e:
+                print(f"[X] Trade listener error [{venue}]:", e)
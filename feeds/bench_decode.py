@@ -0,0 +1,120 @@
+# feeds/bench_decode.py (messages/sec per venue: current json.loads path vs feeds/fast_decode.py)
+
+import argparse
+import json
+import random
+import time
+
+from feeds import fast_decode
+from feeds.coinbase_feed import CoinbaseSpotCVD
+from feeds.binance_feed import BinanceCVDTracker
+from feeds.bybit_feed import BybitCVDTracker
+from feeds.okx_feed import OKXCVDTracker
+
+
+# --- Synthetic messages shaped like the live streams (compact JSON, same key order) ---
+def _coinbase(i, price, qty, buy, ts_ms):
+    return json.dumps({
+        "type": "match", "trade_id": 600000000 + i, "maker_order_id": "ac928c66-ca53-498f-9c13-a110027a60e8",
+        "taker_order_id": "132fb6ae-456b-4654-b4e0-d681ac05cea1", "side": "buy" if buy else "sell",
+        "size": f"{qty:.8f}", "price": f"{price:.2f}", "product_id": "BTC-USD", "sequence": 70000000000 + i,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts_ms / 1000)) + f".{ts_ms % 1000:03d}000Z"
+    }, separators=(",", ":"))
+
+
+def _binance(i, price, qty, buy, ts_ms):
+    return json.dumps({
+        "e": "trade", "E": ts_ms + 1, "s": "BTCUSDT", "t": 3300000000 + i, "p": f"{price:.8f}",
+        "q": f"{qty:.8f}", "T": ts_ms, "m": not buy, "M": True
+    }, separators=(",", ":"))
+
+
+def _bybit(i, price, qty, buy, ts_ms, batch=3):
+    return json.dumps({
+        "topic": "publicTrade.BTCUSDT", "type": "snapshot", "ts": ts_ms + 1,
+        "data": [{
+            "T": ts_ms, "s": "BTCUSDT", "S": "Buy" if buy else "Sell", "v": f"{qty:.3f}", "p": f"{price:.2f}",
+            "L": "PlusTick", "i": f"a1b2c3d4-0000-4000-8000-{i * batch + n:012d}", "BT": False
+        } for n in range(batch)]
+    }, separators=(",", ":"))
+
+
+def _okx(i, price, qty, buy, ts_ms, batch=2):
+    return json.dumps({
+        "arg": {"channel": "trades", "instId": "BTC-USDT-SWAP"},
+        "data": [{
+            "instId": "BTC-USDT-SWAP", "tradeId": str(1400000000 + i * batch + n), "px": f"{price:.1f}",
+            "sz": f"{qty:.2f}", "side": "buy" if buy else "sell", "ts": str(ts_ms), "count": "1"
+        } for n in range(batch)]
+    }, separators=(",", ":"))
+
+
+def build_messages(count, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    price, ts_ms = 37000.0, 1700000000000
+    for i in range(count):
+        price += rng.uniform(-5, 5)
+        ts_ms += rng.randint(0, 40)
+        rows.append((i, price, rng.expovariate(20), rng.random() < 0.5, ts_ms))
+    return {
+        "coinbase": [_coinbase(*row) for row in rows],
+        "binance_spot": [_binance(*row) for row in rows],
+        "binance_perp": [_binance(*row) for row in rows],
+        "bybit": [_bybit(*row) for row in rows],
+        "okx": [_okx(*row) for row in rows]
+    }
+
+
+def _handler(venue, fast, listener):
+    feed = {
+        "coinbase": CoinbaseSpotCVD,
+        "binance_spot": BinanceCVDTracker,
+        "binance_perp": BinanceCVDTracker,
+        "bybit": BybitCVDTracker,
+        "okx": OKXCVDTracker
+    }[venue](fast_decode=fast)
+    if listener:
+        feed.add_listener(lambda trade: None)
+    if venue == "binance_spot":
+        return feed, feed._process_spot
+    if venue == "binance_perp":
+        return feed, feed._process_perp
+    return feed, feed._process
+
+
+def bench(messages, listener=False, repeat=3):
+    results = {}
+    for venue, msgs in messages.items():
+        rates, states = {}, {}
+        for path, fast in (("current", False), ("fast", True)):
+            best = 0.0
+            for _ in range(repeat):
+                feed, process = _handler(venue, fast, listener)
+                started = time.perf_counter()
+                for msg in msgs:
+                    process(msg)
+                best = max(best, len(msgs) / (time.perf_counter() - started))
+            rates[path] = best
+            states[path] = feed.get_cvd()
+        if states["current"] != states["fast"]:
+            print(f"[X] {venue}: fast path CVD {states['fast']} != current {states['current']}")
+        results[venue] = rates
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark venue message parsing")
+    parser.add_argument("--count", type=int, default=100000, help="messages per venue")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    parser.add_argument("--listener", action="store_true", help="attach a no-op trade listener (recorder / hub cost)")
+    args = parser.parse_args()
+
+    backend = "orjson" if fast_decode.HAVE_ORJSON else "string slicing + json fallback"
+    print(f"⚙️ {args.count} messages per venue, fast path uses {backend}"
+          f"{', with listener' if args.listener else ''}")
+
+    results = bench(build_messages(args.count), args.listener, args.repeat)
+    print(f"\n{'venue':<14} {'current msg/s':>14} {'fast msg/s':>12} {'speedup':>8}")
+    for venue, rates in results.items():
+        print(f"{venue:<14} {rates['current']:>14,.0f} {rates['fast']:>12,.0f} {rates['fast'] / rates['current']:>7.2f}x")
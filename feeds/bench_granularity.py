@@ -0,0 +1,162 @@
+# feeds/bench_granularity.py (message volume and parse CPU per Binance granularity: trade / aggTrade / kline)
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from feeds.binance_feed import STREAMS, BinanceCVDTracker
+
+
+# --- One synthetic taker tape rendered as each stream would carry it ---
+def build_tape(orders, seed=0):
+    """
+    Taker orders as lists of fills (ts_ms, price, qty, buy). An order sweeps one or two
+    price levels and fills against several resting orders per level, which is what
+    aggTrade collapses.
+    """
+    rng = random.Random(seed)
+    price, ts_ms = 37000.0, 1700000000000
+    tape = []
+    for _ in range(orders):
+        ts_ms += int(rng.expovariate(1 / 20))
+        price = round(price + rng.uniform(-2, 2), 2)
+        buy = rng.random() < 0.5
+        fills = []
+        for level in range(1 if rng.random() < 0.7 else 2):
+            level_price = round(price + (0.01 * level if buy else -0.01 * level), 2)
+            for _ in range(1 + int(rng.expovariate(1 / 2))):
+                fills.append((ts_ms, level_price, round(rng.expovariate(50), 5), buy))
+        tape.append(fills)
+    return tape
+
+
+def _dump(obj):
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def trade_messages(tape):
+    msgs, trade_id = [], 3300000000
+    for fills in tape:
+        for ts_ms, price, qty, buy in fills:
+            trade_id += 1
+            msgs.append(_dump({"e": "trade", "E": ts_ms + 1, "s": "BTCUSDT", "t": trade_id, "p": f"{price:.2f}",
+                               "q": f"{qty:.5f}", "T": ts_ms, "m": not buy, "M": True}))
+    return msgs
+
+
+def agg_trade_messages(tape):
+    msgs, agg_id = [], 1800000000
+    for fills in tape:
+        levels = {}
+        for ts_ms, price, qty, buy in fills:
+            levels[price] = levels.get(price, 0) + round(qty * 100000)  # integer lots keep sums exact
+        for price, lots in levels.items():
+            agg_id += 1
+            ts_ms, buy = fills[0][0], fills[0][3]
+            msgs.append(_dump({"e": "aggTrade", "E": ts_ms + 1, "s": "BTCUSDT", "a": agg_id, "p": f"{price:.2f}",
+                               "q": f"{lots / 100000:.5f}", "f": 0, "l": 0, "T": ts_ms, "m": not buy, "M": True}))
+    return msgs
+
+
+def kline_messages(tape, push_ms):
+    """One kline_1m update every push_ms while trades happen, as Binance pushes them."""
+    msgs = []
+    open_ms = volume = taker_buy = 0
+    last_push = None
+    close = 0.0
+    for fills in tape:
+        for ts_ms, price, qty, buy in fills:
+            minute = ts_ms - ts_ms % 60000
+            if minute != open_ms:
+                if last_push is not None:
+                    msgs.append(_kline(open_ms, close, volume, taker_buy, open_ms + 59999, True))
+                open_ms, volume, taker_buy, last_push = minute, 0, 0, ts_ms
+            volume += round(qty * 100000)
+            taker_buy += round(qty * 100000) if buy else 0
+            close = price
+            if ts_ms - last_push >= push_ms:
+                msgs.append(_kline(open_ms, close, volume, taker_buy, ts_ms, False))
+                last_push = ts_ms
+    msgs.append(_kline(open_ms, close, volume, taker_buy, last_push, False))
+    return msgs
+
+
+def _kline(open_ms, close, volume, taker_buy, event_ms, closed):
+    return _dump({"e": "kline", "E": event_ms, "s": "BTCUSDT", "k": {
+        "t": open_ms, "T": open_ms + 59999, "s": "BTCUSDT", "i": "1m", "c": f"{close:.2f}",
+        "v": f"{volume / 100000:.5f}", "V": f"{taker_buy / 100000:.5f}", "x": closed}})
+
+
+def bench(tape, push_ms, fast_decode=True, repeat=3):
+    streams = {
+        "trade": trade_messages(tape),
+        "aggTrade": agg_trade_messages(tape),
+        "kline": kline_messages(tape, push_ms)
+    }
+    results = {}
+    for granularity, msgs in streams.items():
+        best = None
+        for _ in range(repeat):
+            feed = BinanceCVDTracker(fast_decode=fast_decode, granularity=granularity)
+            process = feed._process_perp
+            started = time.process_time()
+            for msg in msgs:
+                process(msg)
+            elapsed = time.process_time() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results[granularity] = (len(msgs), best, round(feed.perp_cvds[0], 4))
+    return results
+
+
+async def count_live(seconds, symbol="btcusdt"):
+    """Messages per granularity from the live Binance spot and perp streams over the same seconds."""
+    import websockets
+
+    counts = {}
+
+    async def count(market, url, granularity):
+        counts[(market, granularity)] = 0
+        async with websockets.connect(url) as ws:
+            async for _ in ws:
+                counts[(market, granularity)] += 1
+
+    tasks = [
+        asyncio.create_task(count(market, f"{base}/ws/{symbol}@{STREAMS[granularity]}", granularity))
+        for market, base in (("spot", "wss://stream.binance.com:9443"), ("perp", "wss://fstream.binance.com"))
+        for granularity in STREAMS
+    ]
+    await asyncio.sleep(seconds)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Binance CVD granularities")
+    parser.add_argument("--orders", type=int, default=100000, help="synthetic taker orders")
+    parser.add_argument("--push-ms", type=int, default=250, help="kline update interval (perp 250, spot 2000)")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    parser.add_argument("--json-path", action="store_true", help="parse with json.loads instead of feeds/fast_decode.py")
+    parser.add_argument("--live", type=float, default=0, help="also count live Binance messages for N seconds")
+    args = parser.parse_args()
+
+    tape = build_tape(args.orders)
+    fills = sum(len(fills) for fills in tape)
+    print(f"⚙️ {args.orders} taker orders, {fills} fills, {(tape[-1][0][0] - tape[0][0][0]) / 1000:.0f}s of tape, "
+          f"kline push every {args.push_ms}ms")
+
+    results = bench(tape, args.push_ms, not args.json_path, args.repeat)
+    base_msgs, base_cpu, base_cvd = results["trade"]
+    print(f"\n{'granularity':<11} {'messages':>10} {'vs trade':>9} {'CPU ms':>9} {'CPU saved':>10} {'CVD':>12}")
+    for granularity, (msgs, cpu, cvd) in results.items():
+        print(f"{granularity:<11} {msgs:>10,} {msgs / base_msgs:>8.1%} {cpu * 1000:>9.1f} "
+              f"{1 - cpu / base_cpu:>9.1%} {cvd:>12}{'' if abs(cvd - base_cvd) < 1e-6 else '  [X] differs'}")
+
+    if args.live:
+        counts = asyncio.run(count_live(args.live))
+        print(f"\nLive over {args.live:.0f}s:")
+        for (market, granularity), count in sorted(counts.items()):
+            print(f"{market:<5} {granularity:<9} {count:>8,} msgs  {count / args.live:>8.1f}/s")
@@ -1,49 +1,189 @@
 # feeds/binance_feed.py
 
 import asyncio
-import websockets
 import json
 
-class BinanceCVDTracker:
-    def __init__(self):
-        self.spot_cvd = 0
-        self.perp_cvd = 0
-        self.price = 0
+from feeds.backfill import GapFiller
+from feeds.base_feed import BaseFeed
+from feeds.fast_decode import decode_binance_agg_trade, decode_binance_kline, decode_binance_trade
+from feeds.feed_supervisor import supervisor
+from feeds.symbols import SymbolIndex, state_array
+
+KLINE_INTERVAL = "1m"
+STREAMS = {"trade": "trade", "aggTrade": "aggTrade", "kline": f"kline_{KLINE_INTERVAL}"}
+
+class BinanceCVDTracker(BaseFeed):
+    """
+    Spot and USD-M perp CVD for every symbol over one combined-stream socket per market.
+    Per-symbol state lives in arrays indexed by symbol id (feeds/symbols.py); trade
+    listeners see the primary symbol (symbols[0]) only.
+
+    granularity picks the stream CVD is built from, always as the running sum of signed
+    taker quantity:
+      trade     every fill (@trade), the default
+      aggTrade  fills of one taker order at one price merged (@aggTrade), same CVD
+      kline     1m klines (@kline_1m): CVD moves by the change in taker buy minus taker
+                sell volume (2 * V - v) of the open kline; listeners get that change as
+                one net trade per update
+    """
+
+    granularities = ("trade", "aggTrade", "kline")
+
+    def __init__(self, fast_decode=False, symbols=None, granularity="trade"):
+        super().__init__()
+        self.granularity = self.check_granularity(granularity)
+        self.index = SymbolIndex("binance", symbols)
+        self.symbols = self.index.symbols
+        self._ids = self.index.ids
+        self.spot_cvds = state_array(len(self.index))
+        self.perp_cvds = state_array(len(self.index))
+        self.prices = state_array(len(self.index))
+        # last trade id (aggregate id / kline open ms) applied per symbol and stream, for gap backfill
+        self.last_spot_ids = [None] * len(self.index)
+        self.last_perp_ids = [None] * len(self.index)
+        self._id_key = "a" if granularity == "aggTrade" else "t"
+        self._decode = decode_binance_agg_trade if granularity == "aggTrade" else decode_binance_trade
+        if granularity == "kline":
+            # Net taker qty of each symbol's open kline as last applied
+            self.spot_kline_nets = state_array(len(self.index))
+            self.perp_kline_nets = state_array(len(self.index))
+            self._process_spot = self._process_spot_kline
+            self._process_perp = self._process_perp_kline
+        elif fast_decode:
+            self._process_spot = self._process_spot_fast
+            self._process_perp = self._process_perp_fast
+
+    def _stream_path(self):
+        stream = STREAMS[self.granularity]
+        return "/stream?streams=" + "/".join(f"{instrument.lower()}@{stream}" for instrument in self.index.instruments)
 
     async def connect(self):
-        asyncio.create_task(self._track_spot())
-        asyncio.create_task(self._track_perp())
-
-    async def _track_spot(self):
-        uri = "wss://stream.binance.com:9443/ws/btcusdt@trade"
-        async for ws in websockets.connect(uri, ping_interval=None):
-            try:
-                async for msg in ws:
-                    data = json.loads(msg)
-                    qty = float(data["q"])
-                    is_buyer_maker = data["m"]
-                    self.spot_cvd += -qty if is_buyer_maker else qty
-                    self.price = float(data["p"])
-            except Exception as e:
-                print("[X] Binance Spot error:", e)
-                await asyncio.sleep(3)
-
-    async def _track_perp(self):
-        uri = "wss://fstream.binance.com/ws/btcusdt@trade"
-        async for ws in websockets.connect(uri, ping_interval=None):
-            try:
-                async for msg in ws:
-                    data = json.loads(msg)
-                    qty = float(data["q"])
-                    is_buyer_maker = data["m"]
-                    self.perp_cvd += -qty if is_buyer_maker else qty
-            except Exception as e:
-                print("[X] Binance Perp error:", e)
-                await asyncio.sleep(3)
-
-    def get_cvd(self):
+        # Binance pings the client itself; websockets answers those automatically
+        suffix = "" if self.granularity == "trade" else "@" + self.granularity
+        kline = self.granularity == "kline"
+        spot = GapFiller("binance_spot" + suffix, self._process_spot, self.last_spot_ids, self._ids,
+                         self._apply_spot_kline if kline else self._apply_spot)
+        perp = GapFiller("binance_perp" + suffix, self._process_perp, self.last_perp_ids, self._ids,
+                         self._apply_perp_kline if kline else self._apply_perp)
+        asyncio.create_task(supervisor.run_stream(
+            self, "binance_spot", "wss://stream.binance.com:9443" + self._stream_path(), self._process_spot,
+            on_connect=spot.on_connect
+        ))
+        asyncio.create_task(supervisor.run_stream(
+            self, "binance_perp", "wss://fstream.binance.com" + self._stream_path(), self._process_perp,
+            on_connect=perp.on_connect
+        ))
+
+    def _process_spot(self, msg):
+        data = json.loads(msg)
+        data = data.get("data", data)
+        sid = self._ids.get(data["s"])
+        if sid is None:
+            return
+        qty = float(data["q"])
+        is_buyer_maker = data["m"]
+        self.spot_cvds[sid] += -qty if is_buyer_maker else qty
+        self.prices[sid] = float(data["p"])
+        self.last_spot_ids[sid] = data[self._id_key]
+        if self.listeners and sid == 0:
+            self._emit_trade("binance_spot", self.prices[0], qty, -1 if is_buyer_maker else 1,
+                             data["T"] / 1000, data[self._id_key])
+
+    def _process_perp(self, msg):
+        data = json.loads(msg)
+        data = data.get("data", data)
+        sid = self._ids.get(data["s"])
+        if sid is None:
+            return
+        qty = float(data["q"])
+        is_buyer_maker = data["m"]
+        self.perp_cvds[sid] += -qty if is_buyer_maker else qty
+        self.last_perp_ids[sid] = data[self._id_key]
+        if self.listeners and sid == 0:
+            self._emit_trade("binance_perp", float(data["p"]), qty, -1 if is_buyer_maker else 1,
+                             data["T"] / 1000, data[self._id_key])
+
+    def _process_spot_fast(self, msg):
+        price, qty, side, trade_ms, trade_id, instrument = self._decode(msg)
+        sid = self._ids.get(instrument)
+        if sid is None:
+            return
+        self.spot_cvds[sid] += qty * side
+        self.prices[sid] = price
+        self.last_spot_ids[sid] = trade_id
+        if self.listeners and sid == 0:
+            self._emit_trade("binance_spot", price, qty, side, int(trade_ms) / 1000, trade_id)
+
+    def _process_perp_fast(self, msg):
+        price, qty, side, trade_ms, trade_id, instrument = self._decode(msg)
+        sid = self._ids.get(instrument)
+        if sid is None:
+            return
+        self.perp_cvds[sid] += qty * side
+        self.last_perp_ids[sid] = trade_id
+        if self.listeners and sid == 0:
+            self._emit_trade("binance_perp", price, qty, side, int(trade_ms) / 1000, trade_id)
+
+    # Backfilled trades (feeds/backfill.py), applied in trade id order before live parsing resumes
+    def _apply_spot(self, sid, price, qty, side, exch_ts, trade_id):
+        self.spot_cvds[sid] += qty * side
+        self.last_spot_ids[sid] = trade_id
+        if self.listeners and sid == 0:
+            self._emit_trade("binance_spot", price, qty, side, exch_ts, trade_id)
+
+    def _apply_perp(self, sid, price, qty, side, exch_ts, trade_id):
+        self.perp_cvds[sid] += qty * side
+        self.last_perp_ids[sid] = trade_id
+        if self.listeners and sid == 0:
+            self._emit_trade("binance_perp", price, qty, side, exch_ts, trade_id)
+
+    def _process_spot_kline(self, msg):
+        close, net, open_ms, event_ms, instrument = decode_binance_kline(msg)
+        sid = self._ids.get(instrument)
+        if sid is None:
+            return
+        self.prices[sid] = close
+        self._apply_spot_kline(sid, open_ms, net, close, event_ms / 1000)
+
+    def _process_perp_kline(self, msg):
+        close, net, open_ms, event_ms, instrument = decode_binance_kline(msg)
+        sid = self._ids.get(instrument)
+        if sid is None:
+            return
+        self._apply_perp_kline(sid, open_ms, net, close, event_ms / 1000)
+
+    # Live kline updates and backfilled klines both go through these
+    def _apply_spot_kline(self, sid, open_ms, net, close, exch_ts):
+        change = self._kline_change(self.last_spot_ids, self.spot_kline_nets, sid, open_ms, net)
+        if change:
+            self.spot_cvds[sid] += change
+            if self.listeners and sid == 0:
+                self._emit_trade("binance_spot", close, abs(change), 1 if change > 0 else -1, exch_ts)
+
+    def _apply_perp_kline(self, sid, open_ms, net, close, exch_ts):
+        change = self._kline_change(self.last_perp_ids, self.perp_kline_nets, sid, open_ms, net)
+        if change:
+            self.perp_cvds[sid] += change
+            if self.listeners and sid == 0:
+                self._emit_trade("binance_perp", close, abs(change), 1 if change > 0 else -1, exch_ts)
+
+    @staticmethod
+    def _kline_change(opens, nets, sid, open_ms, net):
+        """CVD change from a kline's running net taker qty: the increment within a kline, all of it for a new one."""
+        if opens[sid] == open_ms:
+            change = net - nets[sid]
+        elif opens[sid] is None or open_ms > opens[sid]:
+            change = net
+        else:
+            return 0.0  # older kline than the one already applied
+        opens[sid] = open_ms
+        nets[sid] = net
+        return change
+
+    def get_cvd(self, symbol=None):
+        sid = self.index.id(symbol)
         return {
-            "spot": round(self.spot_cvd, 2),
-            "perp": round(self.perp_cvd, 2),
-            "price": self.price
+            "spot": round(self.spot_cvds[sid], 2),
+            "perp": round(self.perp_cvds[sid], 2),
+            "price": self.prices[sid]
         }
@@ -1,36 +1,79 @@
 # feeds/bybit_feed.py
 
-import asyncio
-import websockets
 import json
 
-class BybitCVDTracker:
-    def __init__(self):
-        self.cvd = 0
-        self.price = 0
+from feeds.backfill import GapFiller
+from feeds.base_feed import BaseFeed
+from feeds.fast_decode import HAVE_ORJSON, decode_bybit_trades
+from feeds.feed_supervisor import supervisor
+from feeds.symbols import SymbolIndex, state_array
+
+class BybitCVDTracker(BaseFeed):
+    """
+    Linear perp CVD for every symbol over one publicTrade subscription.
+    Per-symbol state lives in arrays indexed by symbol id (feeds/symbols.py); trade
+    listeners see the primary symbol (symbols[0]) only.
+    """
+
+    def __init__(self, fast_decode=False, symbols=None, granularity="trade"):
+        super().__init__()
+        self.granularity = self.check_granularity(granularity)  # no exchange-side taker volume stream
+        self.index = SymbolIndex("bybit", symbols)
+        self.symbols = self.index.symbols
+        self._ids = self.index.ids
+        self.cvds = state_array(len(self.index))
+        self.prices = state_array(len(self.index))
+        self.last_trade_ms = [None] * len(self.index)  # trade ids are not sequential, backfill keys on trade time
+        if fast_decode and HAVE_ORJSON:
+            # Batched messages need a full parse either way; without orjson json.loads in _process is faster
+            self._process = self._process_fast
 
     async def connect(self):
-        uri = "wss://stream.bybit.com/v5/public/linear"
-        async for ws in websockets.connect(uri, ping_interval=None):
-            try:
-                await ws.send(json.dumps({
-                    "op": "subscribe",
-                    "args": ["publicTrade.BTCUSDT"]
-                }))
-                async for msg in ws:
-                    data = json.loads(msg)
-                    if "data" in data:
-                        for trade in data["data"]:
-                            qty = float(trade["v"])
-                            side = trade["S"]
-                            self.cvd += qty if side == "Buy" else -qty
-                            self.price = float(trade["p"])
-            except Exception as e:
-                print("[X] Bybit Perp error:", e)
-                await asyncio.sleep(3)
-
-    def get_cvd(self):
-        return round(self.cvd, 2)
-
-    def get_price(self):
-        return self.price
+        # Bybit drops connections that send nothing: {"op": "ping"} every 20s, answered with a pong op
+        backfill = GapFiller("bybit", self._process, self.last_trade_ms, self._ids, self._apply)
+        await supervisor.run_stream(
+            self, "bybit", "wss://stream.bybit.com/v5/public/linear", self._process,
+            subscribe={"op": "subscribe", "args": [f"publicTrade.{instrument}" for instrument in self.index.instruments]},
+            ping={"op": "ping"}, is_pong=lambda msg: "pong" in msg and '"topic"' not in msg,
+            on_connect=backfill.on_connect
+        )
+
+    def _process(self, msg):
+        data = json.loads(msg)
+        if "data" in data:
+            for trade in data["data"]:
+                sid = self._ids.get(trade["s"])
+                if sid is None:
+                    continue
+                qty = float(trade["v"])
+                side = trade["S"]
+                self.cvds[sid] += qty if side == "Buy" else -qty
+                self.last_trade_ms[sid] = trade["T"]
+                self.prices[sid] = float(trade["p"])
+                if self.listeners and sid == 0:
+                    self._emit_trade("bybit", self.prices[0], qty, 1 if side == "Buy" else -1,
+                                     trade["T"] / 1000, trade["i"])
+
+    def _process_fast(self, msg):
+        for price, qty, side, trade_ms, trade_id, instrument in decode_bybit_trades(msg):
+            sid = self._ids.get(instrument)
+            if sid is None:
+                continue
+            self.cvds[sid] += qty * side
+            self.prices[sid] = price
+            self.last_trade_ms[sid] = trade_ms
+            if self.listeners and sid == 0:
+                self._emit_trade("bybit", price, qty, side, int(trade_ms) / 1000, trade_id)
+
+    def _apply(self, sid, price, qty, side, exch_ts, trade_id):
+        """Backfilled trade (feeds/backfill.py), applied in order before live parsing resumes."""
+        self.cvds[sid] += qty * side
+        self.last_trade_ms[sid] = round(exch_ts * 1000)
+        if self.listeners and sid == 0:
+            self._emit_trade("bybit", price, qty, side, exch_ts, trade_id)
+
+    def get_cvd(self, symbol=None):
+        return round(self.cvds[self.index.id(symbol)], 2)
+
+    def get_price(self, symbol=None):
+        return self.prices[self.index.id(symbol)]
@@ -1,48 +1,95 @@
 # feeds/coinbase_feed.py (patched with reconnect logic)
 
-import asyncio
-import websockets
 import json
+from datetime import datetime
 
-class CoinbaseSpotCVD:
-    def __init__(self):
+from feeds.backfill import GapFiller
+from feeds.base_feed import BaseFeed
+from feeds.fast_decode import decode_coinbase_match
+from feeds.feed_supervisor import supervisor
+from feeds.symbols import SymbolIndex, state_array
+
+class CoinbaseSpotCVD(BaseFeed):
+    """
+    Spot CVD for every symbol's USD product over one matches subscription.
+    Per-symbol state lives in arrays indexed by symbol id (feeds/symbols.py); trade
+    listeners see the primary symbol (symbols[0]) only.
+    """
+
+    def __init__(self, fast_decode=False, symbols=None, granularity="trade"):
+        super().__init__()
+        self.granularity = self.check_granularity(granularity)  # no exchange-side taker volume stream
         self.ws_url = "wss://ws-feed.exchange.coinbase.com"
-        self.product_id = "BTC-USD"
-        self.cvd = 0
-        self.last_price = None
+        self.index = SymbolIndex("coinbase", symbols)
+        self.symbols = self.index.symbols
+        self._ids = self.index.ids
+        self.cvds = state_array(len(self.index))
+        self.prices = state_array(len(self.index))  # 0.0 until the first match
+        self.last_trade_ids = [None] * len(self.index)  # for gap backfill on reconnect
+        if fast_decode:
+            self._process = self._process_fast
 
     async def connect(self):
-        while True:
-            try:
-                async with websockets.connect(self.ws_url) as ws:
-                    sub_msg = {
-                        "type": "subscribe",
-                        "product_ids": [self.product_id],
-                        "channels": ["matches"]
-                    }
-                    await ws.send(json.dumps(sub_msg))
-
-                    async for msg in ws:
-                        await self._process(msg)
-            except Exception as e:
-                print("[X] Coinbase reconnecting:", e)
-                await asyncio.sleep(5)
-
-    async def _process(self, msg):
+        sub_msg = {
+            "type": "subscribe",
+            "product_ids": list(self.index.instruments),
+            "channels": ["matches"]
+        }
+        # Protocol-level pings; BTC-USD matches can pause for a while, hence the longer stale_after
+        backfill = GapFiller("coinbase", self._process, self.last_trade_ids, self._ids, self._apply)
+        await supervisor.run_stream(self, "coinbase", self.ws_url, self._process, subscribe=sub_msg,
+                                    stale_after=60, ws_ping_interval=20, on_connect=backfill.on_connect)
+
+    def _process(self, msg):
         try:
             data = json.loads(msg)
             if data.get("type") == "match":
+                sid = self._ids.get(data["product_id"])
+                if sid is None:
+                    return
                 price = float(data["price"])
                 size = float(data["size"])
                 side = data["side"]
 
-                self.last_price = price
-                self.cvd += size if side == "buy" else -size
+                self.prices[sid] = price
+                self.cvds[sid] += size if side == "buy" else -size
+                if data.get("trade_id") is not None:
+                    self.last_trade_ids[sid] = data["trade_id"]
+                if self.listeners and sid == 0:
+                    exch_ts = datetime.fromisoformat(data["time"].replace("Z", "+00:00")).timestamp()
+                    self._emit_trade("coinbase", price, size, 1 if side == "buy" else -1,
+                                     exch_ts, data.get("trade_id"))
+        except Exception as e:
+            print("[X] Coinbase parse error:", e)
+
+    def _process_fast(self, msg):
+        try:
+            match = decode_coinbase_match(msg)
+            if match is None:
+                return
+            price, size, side, time_str, trade_id, product_id = match
+            sid = self._ids.get(product_id)
+            if sid is None:
+                return
+            self.prices[sid] = price
+            self.cvds[sid] += size * side
+            if trade_id is not None:
+                self.last_trade_ids[sid] = trade_id
+            if self.listeners and sid == 0:
+                exch_ts = datetime.fromisoformat(time_str.replace("Z", "+00:00")).timestamp()
+                self._emit_trade("coinbase", price, size, side, exch_ts, trade_id)
         except Exception as e:
             print("[X] Coinbase parse error:", e)
 
-    def get_cvd(self):
-        return round(self.cvd, 2)
+    def _apply(self, sid, price, size, side, exch_ts, trade_id):
+        """Backfilled match (feeds/backfill.py), applied in trade id order before live parsing resumes."""
+        self.cvds[sid] += size * side
+        self.last_trade_ids[sid] = trade_id
+        if self.listeners and sid == 0:
+            self._emit_trade("coinbase", price, size, side, exch_ts, trade_id)
+
+    def get_cvd(self, symbol=None):
+        return round(self.cvds[self.index.id(symbol)], 2)
 
-    def get_last_price(self):
-        return self.last_price
+    def get_last_price(self, symbol=None):
+        return self.prices[self.index.id(symbol)] or None
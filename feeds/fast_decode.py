@@ -0,0 +1,158 @@
+# feeds/fast_decode.py (typed decoders that pull only the fields the feeds use)
+
+import json
+
+try:
+    import orjson
+    loads = orjson.loads
+    HAVE_ORJSON = True
+except ImportError:
+    loads = json.loads
+    HAVE_ORJSON = False
+
+# Every decoder returns plain tuples in the same order:
+#   (price: float, qty: float, side: +1 / -1, raw_time, trade_id, instrument)
+# side follows the feeds' CVD sign: +1 is taker buy, -1 is taker sell.
+# raw_time is the venue's own time field, unconverted (ms int or str, ISO string for
+# Coinbase); the feeds only turn it into epoch seconds when a listener is attached.
+# instrument is the venue's symbol name (BTCUSDT, BTC-USD, BTC-USDT-SWAP), which the
+# feeds map to a symbol id (feeds/symbols.py).
+#
+# Without orjson the single-trade streams (Binance, Coinbase) are sliced straight out
+# of the message text, which beats json.loads on these small flat objects. Anything the
+# slicer does not recognise falls back to a full parse. The batched Bybit / OKX decoders
+# only pay off with orjson; without it those feeds keep their json.loads path.
+
+
+def _str_at(msg, key):
+    i = msg.index(key) + len(key)
+    return msg[i:msg.index('"', i)]
+
+
+def _num_at(msg, key):
+    i = msg.index(key) + len(key)
+    end = msg.find(",", i)
+    if end == -1:
+        end = msg.index("}", i)
+    return msg[i:end]
+
+
+# --- Binance spot / perp: {"e":"trade","s":"..","t":..,"p":"..","q":"..","T":..,"m":bool,...} ---
+# Combined streams wrap the same object as {"stream":"btcusdt@trade","data":{...}}.
+def _binance_dict(data):
+    data = data.get("data", data)
+    return float(data["p"]), float(data["q"]), -1 if data["m"] else 1, data["T"], data["t"], data["s"]
+
+
+def _binance_scan(msg):
+    try:
+        price = _str_at(msg, '"p":"')
+        qty = _str_at(msg, '"q":"')
+        trade_ms = _num_at(msg, '"T":')
+        trade_id = _num_at(msg, '"t":')
+        is_buyer_maker = msg[msg.index('"m":') + 4] == "t"
+        symbol = _str_at(msg, '"s":"')
+        return float(price), float(qty), -1 if is_buyer_maker else 1, trade_ms, int(trade_id), symbol
+    except ValueError:
+        return _binance_dict(json.loads(msg))
+
+
+def _binance_orjson(msg):
+    return _binance_dict(orjson.loads(msg))
+
+
+decode_binance_trade = _binance_orjson if HAVE_ORJSON else _binance_scan
+
+
+# --- Binance aggTrade: the same object with "a" (aggregate id) instead of "t" ---
+def _binance_agg_dict(data):
+    data = data.get("data", data)
+    return float(data["p"]), float(data["q"]), -1 if data["m"] else 1, data["T"], data["a"], data["s"]
+
+
+def _binance_agg_scan(msg):
+    try:
+        price = _str_at(msg, '"p":"')
+        qty = _str_at(msg, '"q":"')
+        trade_ms = _num_at(msg, '"T":')
+        agg_id = _num_at(msg, '"a":')
+        is_buyer_maker = msg[msg.index('"m":') + 4] == "t"
+        symbol = _str_at(msg, '"s":"')
+        return float(price), float(qty), -1 if is_buyer_maker else 1, trade_ms, int(agg_id), symbol
+    except ValueError:
+        return _binance_agg_dict(json.loads(msg))
+
+
+def _binance_agg_orjson(msg):
+    return _binance_agg_dict(orjson.loads(msg))
+
+
+decode_binance_agg_trade = _binance_agg_orjson if HAVE_ORJSON else _binance_agg_scan
+
+
+# --- Binance kline: {"e":"kline","E":..,"s":"..","k":{"t":open ms,"c":"..","v":"..","V":"..",...}} ---
+def decode_binance_kline(msg):
+    """
+    (close: float, net taker qty so far: float, open_ms, event_ms, instrument) of the
+    kline being updated; net taker qty is taker buy volume V minus taker sell volume (v - V).
+    """
+    data = loads(msg)
+    data = data.get("data", data)
+    k = data["k"]
+    volume, taker_buy = float(k["v"]), float(k["V"])
+    return float(k["c"]), 2 * taker_buy - volume, k["t"], data["E"], data["s"]
+
+
+# --- Coinbase matches: {"type":"match","trade_id":..,"side":"..","size":"..","price":"..","time":"..",...} ---
+def _coinbase_dict(data):
+    if data.get("type") != "match":
+        return None
+    return (float(data["price"]), float(data["size"]), 1 if data["side"] == "buy" else -1,
+            data["time"], data.get("trade_id"), data["product_id"])
+
+
+def _coinbase_scan(msg):
+    if '"type":"match"' not in msg:
+        # Subscriptions, heartbeats and last_match are skipped; non-compact JSON gets a full parse
+        return None if '"type":"' in msg else _coinbase_dict(json.loads(msg))
+    try:
+        price = _str_at(msg, '"price":"')
+        size = _str_at(msg, '"size":"')
+        side = _str_at(msg, '"side":"')
+        time_str = _str_at(msg, '"time":"')
+        product_id = _str_at(msg, '"product_id":"')
+        trade_id = None
+        if '"trade_id":' in msg:
+            raw = _num_at(msg, '"trade_id":')
+            trade_id = int(raw)
+        return float(price), float(size), 1 if side == "buy" else -1, time_str, trade_id, product_id
+    except ValueError:
+        return _coinbase_dict(json.loads(msg))
+
+
+def _coinbase_orjson(msg):
+    return _coinbase_dict(orjson.loads(msg))
+
+
+decode_coinbase_match = _coinbase_orjson if HAVE_ORJSON else _coinbase_scan
+
+
+# --- Bybit / OKX batch several trades per message, so they always go through loads() ---
+def decode_bybit_trades(msg):
+    data = loads(msg).get("data")
+    if not data:
+        return ()
+    return [
+        (float(t["p"]), float(t["v"]), 1 if t["S"] == "Buy" else -1, t["T"], t["i"], t["s"])
+        for t in data
+    ]
+
+
+def decode_okx_trades(msg):
+    data = loads(msg).get("data")
+    if not data:
+        return ()
+    return [
+        (float(t["px"]), float(t["sz"]), 1 if t["side"] == "buy" else -1, t["ts"], t["tradeId"], t["instId"])
+        for t in data
+    ]
@@ -0,0 +1,102 @@
+# feeds/feed_set.py
+
+import asyncio
+import os
+
+from feeds.coinbase_feed import CoinbaseSpotCVD
+from feeds.binance_feed import BinanceCVDTracker
+from feeds.bybit_feed import BybitCVDTracker
+from feeds.okx_feed import OKXCVDTracker
+from feeds.symbols import DEFAULT_SYMBOLS, symbols_from_env
+
+
+def parse_granularity(value):
+    """"binance=aggTrade, okx=trade" -> {"binance": "aggTrade", "okx": "trade"}."""
+    pairs = (item.split("=", 1) for item in (value or "").split(",") if "=" in item)
+    return {venue.strip().lower(): granularity.strip() for venue, granularity in pairs}
+
+
+class FeedSet:
+    """
+    The four venue trackers an engine reads from.
+    Built-in websockets by default; set MARKET_HUB_SOCKET (or pass hub_socket)
+    to attach to a running feeds/market_hub.py instead.
+    Set TICK_RECORD_DIR (or pass record_dir) to archive every trade with feeds/tick_recorder.py
+    (one symbol per archive: recording refuses more than one FEED_SYMBOLS entry).
+    Set FAST_DECODE=1 (or pass fast_decode) to parse venue messages with feeds/fast_decode.py.
+    Set MICRO_BAR_SECONDS (or pass bar_seconds) to build micro-bars on every feed.
+    Set FEED_SYMBOLS=BTC,ETH,... (or pass symbols) to follow several base assets, one
+    multiplexed socket per venue; the first is the primary symbol the engines read by default.
+    Set FEED_GRANULARITY=binance=aggTrade,okx=trade (or pass granularity) to pick the stream
+    each venue builds CVD from (see each tracker's granularities); unset venues keep their default.
+    """
+
+    def __init__(self, hub_socket=None, record_dir=None, record_compress=False, fast_decode=False,
+                 bar_seconds=None, symbols=None, granularity=None):
+        self.hub_socket = hub_socket
+        self.symbols = tuple(s.upper() for s in symbols) if symbols else DEFAULT_SYMBOLS
+        if hub_socket:
+            from feeds.hub_client import HubClient, HubCoinbaseFeed, HubBinanceFeed, HubBybitFeed, HubOKXFeed
+
+            client = HubClient(hub_socket)
+            self.coinbase = HubCoinbaseFeed(client)
+            self.binance = HubBinanceFeed(client)
+            self.bybit = HubBybitFeed(client)
+            self.okx = HubOKXFeed(client)
+        else:
+            options = {venue: {"fast_decode": fast_decode, "symbols": symbols} for venue in
+                       ("coinbase", "binance", "bybit", "okx")}
+            for venue, value in (granularity or {}).items():
+                if venue not in options:
+                    raise ValueError(f"Unknown venue {venue!r} in granularity, expected one of {', '.join(options)}")
+                options[venue]["granularity"] = value
+            self.coinbase = CoinbaseSpotCVD(**options["coinbase"])
+            self.binance = BinanceCVDTracker(**options["binance"])
+            self.bybit = BybitCVDTracker(**options["bybit"])
+            self.okx = OKXCVDTracker(**options["okx"])
+
+        if bar_seconds:
+            for feed in self.all():
+                feed.enable_bars(bar_seconds)
+
+        self.recorder = None
+        if record_dir:
+            from feeds.tick_recorder import TickRecorder
+
+            self.recorder = TickRecorder(record_dir, compress=record_compress, symbol=self.symbols[0])
+            self.recorder.attach(*self.all())
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            hub_socket=os.getenv("MARKET_HUB_SOCKET"),
+            record_dir=os.getenv("TICK_RECORD_DIR"),
+            record_compress=os.getenv("TICK_RECORD_COMPRESS", "") == "1",
+            fast_decode=os.getenv("FAST_DECODE", "") == "1",
+            bar_seconds=float(os.getenv("MICRO_BAR_SECONDS", "0")) or None,
+            symbols=symbols_from_env(),
+            granularity=parse_granularity(os.getenv("FEED_GRANULARITY"))
+        )
+
+    def all(self):
+        return [self.coinbase, self.binance, self.bybit, self.okx]
+
+    def get_bars(self, since=None):
+        """Closed micro-bars from every venue, oldest first."""
+        bars = [bar for feed in self.all() for bar in feed.get_bars(since=since)]
+        bars.sort(key=lambda bar: bar.start)
+        return bars
+
+    def close(self):
+        if self.recorder:
+            self.recorder.close()
+
+    async def connect(self):
+        if self.recorder:
+            self.recorder.start()
+        await asyncio.gather(
+            self.coinbase.connect(),
+            self.binance.connect(),
+            self.bybit.connect(),
+            self.okx.connect()
+        )
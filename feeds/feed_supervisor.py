@@ -0,0 +1,168 @@
+# feeds/feed_supervisor.py (websocket lifecycle for the venue feeds: keepalive, staleness, backoff)
+
+import asyncio
+import json
+import random
+import time
+
+import websockets
+
+from utils import clock, metrics
+
+
+class StreamHealth:
+    """
+    Liveness of one websocket stream. last_data / messages only count venue data;
+    keepalive replies update last_pong. healthy means connected with data no older
+    than stale_after seconds.
+    """
+
+    def __init__(self, name, stale_after):
+        self.name = name
+        self.stale_after = stale_after
+        self.ws = None
+        self.connected = False
+        self.connected_at = None
+        self.last_data = None   # time.monotonic() of the last data message
+        self.last_pong = None
+        self.messages = 0
+        self.reconnects = 0
+        self.rate = 0.0         # data messages per second over the last supervisor tick
+        self._rate_count = 0
+        self._rate_at = time.monotonic()
+
+    def age(self, now=None):
+        if self.last_data is None:
+            return None
+        return (now or time.monotonic()) - self.last_data
+
+    @property
+    def healthy(self):
+        age = self.age()
+        return self.connected and age is not None and age <= self.stale_after
+
+
+class FeedSupervisor:
+    """
+    Runs every venue stream through one reconnect loop:
+      - sends the application-level ping a venue expects (Bybit {"op": "ping"},
+        OKX "ping") every ping_interval seconds and keeps the replies away from the parser
+      - a watchdog (every check_interval) refreshes message rates and closes any stream
+        whose last data message is older than its stale_after, forcing a reconnect
+      - reconnects back off exponentially (base_delay doubling up to max_delay) with
+        +/-50% jitter, so venues and processes do not reconnect in lockstep; the
+        attempt count resets once a connection has delivered data
+    Feeds register their streams and read their health flag through feed.is_healthy().
+    """
+
+    def __init__(self, base_delay=1.0, max_delay=60.0, check_interval=1.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.check_interval = check_interval
+        self.streams = {}  # name -> StreamHealth
+        self._watchdog = None
+
+    def backoff(self, attempt):
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.5)
+
+    async def run_stream(self, feed, name, uri, handler, subscribe=None, ping=None, is_pong=None,
+                         ping_interval=20, stale_after=30, ws_ping_interval=None, on_connect=None):
+        """
+        Keeps one stream connected forever. handler(msg) is the feed's parser (feed.recv_ts is
+        stamped just before it runs); subscribe is sent (JSON-encoded) on every connect; ping
+        is the keepalive payload and is_pong(msg) recognises its reply. ws_ping_interval
+        enables protocol-level pings instead. on_connect() runs on every connect and may return
+        a handler to use for that connection instead (feeds/backfill.py buffers through one).
+        """
+        health = StreamHealth(name, stale_after)
+        self.streams[name] = health
+        feed.streams[name] = health
+        if self._watchdog is None or self._watchdog.done():
+            self._watchdog = asyncio.get_running_loop().create_task(self._watch())
+
+        attempt = 0
+        while True:
+            keepalive = None
+            try:
+                async with websockets.connect(uri, ping_interval=ws_ping_interval) as ws:
+                    health.ws = ws
+                    health.connected = True
+                    health.connected_at = health.last_data = time.monotonic()  # grace period until data
+                    if subscribe is not None:
+                        await ws.send(json.dumps(subscribe))
+                    if ping is not None:
+                        keepalive = asyncio.create_task(self._keepalive(ws, ping, ping_interval))
+                    current = (on_connect() if on_connect is not None else None) or handler
+
+                    got_data = False
+                    async for msg in ws:
+                        if is_pong is not None and is_pong(msg):
+                            health.last_pong = time.monotonic()
+                            continue
+                        health.last_data = time.monotonic()
+                        health.messages += 1
+                        feed.recv_ts = clock.now()
+                        current(msg)
+                        if not got_data:
+                            got_data = True
+                            attempt = 0
+                reason = "connection closed"
+            except Exception as e:
+                reason = str(e) or type(e).__name__
+            finally:
+                health.connected = False
+                health.ws = None
+                if keepalive is not None:
+                    keepalive.cancel()
+
+            delay = self.backoff(attempt)
+            attempt += 1
+            health.reconnects += 1
+            print(f"[X] {name} reconnecting in {delay:.1f}s: {reason}")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _keepalive(ws, ping, interval):
+        payload = ping if isinstance(ping, str) else json.dumps(ping)
+        while True:
+            await asyncio.sleep(interval)
+            await ws.send(payload)
+
+    async def _watch(self):
+        was_healthy = {}
+        while True:
+            await asyncio.sleep(self.check_interval)
+            now = time.monotonic()
+            for name, health in self.streams.items():
+                elapsed = now - health._rate_at
+                health.rate = (health.messages - health._rate_count) / elapsed if elapsed > 0 else 0.0
+                health._rate_count, health._rate_at = health.messages, now
+
+                age = health.age(now)
+                if health.ws is not None and age is not None and age > health.stale_after:
+                    print(f"[X] {name} stale: no data for {age:.0f}s, forcing a reconnect")
+                    health.last_data = None
+                    asyncio.create_task(health.ws.close())
+
+                healthy = health.healthy
+                if was_healthy.get(name, True) != healthy:
+                    print(f"[{'✓' if healthy else 'X'}] {name} {'healthy' if healthy else 'unhealthy'}")
+                was_healthy[name] = healthy
+
+
+supervisor = FeedSupervisor()
+
+
+def _health_metrics():
+    values = {}
+    for name, health in supervisor.streams.items():
+        age = health.age()
+        values[(name, "healthy")] = int(health.healthy)
+        values[(name, "data_age_seconds")] = round(age, 3) if age is not None else -1
+        values[(name, "messages_per_second")] = round(health.rate, 2)
+        values[(name, "reconnects")] = health.reconnects
+    return values
+
+
+metrics.registry.gauge("spotperp_feed_health", "Feed stream health by stream", _health_metrics, ("stream", "field"))
@@ -0,0 +1,149 @@
+# feeds/hub_client.py (drop-in trackers backed by feeds/market_hub.py)
+
+import asyncio
+import json
+import time
+
+from feeds.base_feed import BaseFeed, Trade
+from feeds.market_hub import DEFAULT_SOCKET
+
+# A hub that has not published state for this long counts as unhealthy for every venue
+HUB_STATE_MAX_AGE = 5
+
+
+class HubClient:
+    """
+    One Unix-socket connection to the market hub, shared by the proxy trackers below.
+    connect() is safe to call from every proxy; only the first call opens the socket.
+    Trades are asked for in the handshake when a proxy has listeners, or later by
+    subscribe_trades() when the first listener is added after connect.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET):
+        self.socket_path = socket_path
+        self.state = {}
+        self.feeds = {}  # hub venue -> proxy tracker
+        self._task = None
+        self._writer = None
+        self._trades = False  # what the hub was last told
+
+    def attach(self, venue, feed):
+        self.feeds.setdefault(venue, []).append(feed)
+
+    async def connect(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        await asyncio.shield(self._task)
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=2 ** 20)
+                self._trades = any(f.listeners for feeds in self.feeds.values() for f in feeds)
+                writer.write((json.dumps({"trades": self._trades}) + "\n").encode())
+                self._writer = writer
+                print(f"[HUB] Attached to {self.socket_path} (trades={self._trades})")
+
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        raise ConnectionError("hub closed the connection")
+                    self._process(line)
+            except Exception as e:
+                self._writer = None
+                print("[X] Hub client reconnecting:", e)
+                await asyncio.sleep(3)
+
+    def subscribe_trades(self):
+        if self._writer is not None and not self._trades and not self._writer.is_closing():
+            self._writer.write((json.dumps({"trades": True}) + "\n").encode())
+            self._trades = True
+            print(f"[HUB] Subscribed to trades on {self.socket_path}")
+
+    def _process(self, line):
+        msg = json.loads(line)
+        if msg["type"] == "state":
+            self.state = msg
+        elif msg["type"] == "trade":
+            venue = msg["venue"]
+            trade = Trade(venue, msg["price"], msg["qty"], msg["side"], msg["recv_ts"],
+                          msg.get("exch_ts"), msg.get("trade_id"))
+            # binance_spot / binance_perp both belong to the binance proxy
+            for feed in self.feeds.get(venue.split("_")[0], ()):
+                for listener in feed.listeners:
+                    try:
+                        listener(trade)
+                    except Exception as e:
+                        print(f"[X] Trade listener error [{venue}]:", e)
+
+    def venue_state(self, venue, symbol=None):
+        """A venue's state, or one symbol's when the hub follows several (None: the primary symbol)."""
+        state = self.state.get(venue) or {}
+        if symbol is not None and "symbols" in state:
+            return state["symbols"].get(symbol.upper()) or {}
+        return state
+
+
+class _HubFeed(BaseFeed):
+    venue = None
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+        client.attach(self.venue, self)
+
+    async def connect(self):
+        await self.client.connect()
+
+    def add_listener(self, listener):
+        super().add_listener(listener)
+        self.client.subscribe_trades()
+
+    def is_healthy(self):
+        """The hub's health flag for this venue, as of a state message no older than HUB_STATE_MAX_AGE."""
+        state_ts = self.client.state.get("ts")
+        if state_ts is None or time.time() - state_ts > HUB_STATE_MAX_AGE:
+            return False
+        return self.client.venue_state(self.venue).get("healthy", True)
+
+
+class HubCoinbaseFeed(_HubFeed):
+    venue = "coinbase"
+
+    def get_cvd(self, symbol=None):
+        return self.client.venue_state("coinbase", symbol).get("cvd", 0)
+
+    def get_last_price(self, symbol=None):
+        return self.client.venue_state("coinbase", symbol).get("price")
+
+
+class HubBinanceFeed(_HubFeed):
+    venue = "binance"
+
+    def get_cvd(self, symbol=None):
+        state = self.client.venue_state("binance", symbol)
+        return {
+            "spot": state.get("spot", 0),
+            "perp": state.get("perp", 0),
+            "price": state.get("price", 0)
+        }
+
+
+class HubBybitFeed(_HubFeed):
+    venue = "bybit"
+
+    def get_cvd(self, symbol=None):
+        return self.client.venue_state("bybit", symbol).get("cvd", 0)
+
+    def get_price(self, symbol=None):
+        return self.client.venue_state("bybit", symbol).get("price", 0)
+
+
+class HubOKXFeed(_HubFeed):
+    venue = "okx"
+
+    def get_cvd(self, symbol=None):
+        return self.client.venue_state("okx", symbol).get("cvd", 0)
+
+    def get_price(self, symbol=None):
+        return self.client.venue_state("okx", symbol).get("price", 0)
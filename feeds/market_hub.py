@@ -0,0 +1,154 @@
+# feeds/market_hub.py (one set of venue sockets shared by every engine)
+
+import asyncio
+import json
+import os
+import time
+
+from feeds.feed_set import FeedSet, parse_granularity
+from feeds.symbols import symbols_from_env
+
+DEFAULT_SOCKET = os.getenv("MARKET_HUB_SOCKET", "/tmp/spot_perp_hub.sock")
+
+# Consumers that fall this far behind are dropped instead of buffering forever
+MAX_CLIENT_BUFFER = 4 * 1024 * 1024
+
+
+class MarketDataHub:
+    """
+    Owns the Coinbase / Binance / Bybit / OKX connections and publishes
+    newline-delimited JSON over a Unix socket:
+      {"type": "state", ...}  every state_interval seconds to every client
+      {"type": "trade", ...}  per trade, only to clients that asked for trades
+    A client opens with one hello line: {"trades": true|false}, and may send the same
+    line again later to change its subscription.
+    With record_dir set the hub is also the single place that archives ticks.
+    With several symbols each venue's state also carries "symbols": {symbol: state};
+    trades are the primary symbol's only.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, state_interval=0.25, record_dir=None, record_compress=False,
+                 fast_decode=False, symbols=None, granularity=None):
+        self.socket_path = socket_path
+        self.state_interval = state_interval
+
+        self.feeds = FeedSet(record_dir=record_dir, record_compress=record_compress, fast_decode=fast_decode,
+                             symbols=symbols, granularity=granularity)
+        self.coinbase = self.feeds.coinbase
+        self.binance = self.feeds.binance
+        self.bybit = self.feeds.bybit
+        self.okx = self.feeds.okx
+
+        self.clients = {}  # writer -> wants_trades
+
+        for feed in self.feeds.all():
+            feed.add_listener(self._on_trade)
+
+    async def run(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        print(f"[HUB] Serving market data on {self.socket_path}")
+
+        async with server:
+            await asyncio.gather(
+                self.feeds.connect(),
+                self._publish_state()
+            )
+
+    def _venue_states(self, symbol=None):
+        return {
+            "coinbase": {"cvd": self.coinbase.get_cvd(symbol), "price": self.coinbase.get_last_price(symbol)},
+            "binance": self.binance.get_cvd(symbol),
+            "bybit": {"cvd": self.bybit.get_cvd(symbol), "price": self.bybit.get_price(symbol)},
+            "okx": {"cvd": self.okx.get_cvd(symbol), "price": self.okx.get_price(symbol)}
+        }
+
+    def snapshot(self):
+        states = self._venue_states()
+        health = {venue: feed.is_healthy() for venue, feed in
+                  (("coinbase", self.coinbase), ("binance", self.binance), ("bybit", self.bybit), ("okx", self.okx))}
+        for venue, state in states.items():
+            state["healthy"] = health[venue]
+        if len(self.feeds.symbols) > 1:
+            per_symbol = {symbol: self._venue_states(symbol) for symbol in self.feeds.symbols}
+            for venue, state in states.items():
+                state["symbols"] = {symbol: {**venues[venue], "healthy": health[venue]}
+                                    for symbol, venues in per_symbol.items()}
+        return {"type": "state", "ts": time.time(), **states}
+
+    async def _handle_client(self, reader, writer):
+        try:
+            hello = await asyncio.wait_for(reader.readline(), timeout=5)
+            wants_trades = bool(json.loads(hello or b"{}").get("trades", False))
+        except Exception as e:
+            print("[X] Hub client handshake failed:", e)
+            writer.close()
+            return
+
+        self.clients[writer] = wants_trades
+        writer.write(self._encode(self.snapshot()))
+        print(f"[HUB] Client attached (trades={wants_trades}) → {len(self.clients)} connected")
+
+        # Later lines change the subscription, e.g. a trade listener added after connect
+        try:
+            while line := await reader.readline():
+                if writer in self.clients:
+                    self.clients[writer] = bool(json.loads(line).get("trades", False))
+                    print(f"[HUB] Client changed subscription (trades={self.clients[writer]})")
+        except Exception:
+            pass
+        self._drop(writer)
+
+    def _drop(self, writer):
+        if self.clients.pop(writer, None) is not None:
+            writer.close()
+            print(f"[HUB] Client detached → {len(self.clients)} connected")
+
+    def _broadcast(self, line, trades_only=False):
+        for writer, wants_trades in list(self.clients.items()):
+            if trades_only and not wants_trades:
+                continue
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                print("[X] Hub client too slow, dropping")
+                self._drop(writer)
+                continue
+            writer.write(line)
+
+    def _on_trade(self, trade):
+        if not any(self.clients.values()):
+            return  # nobody asked for trades: skip the encode
+        self._broadcast(self._encode({
+            "type": "trade",
+            "venue": trade.venue,
+            "price": trade.price,
+            "qty": trade.qty,
+            "side": trade.side,
+            "recv_ts": trade.recv_ts,
+            "exch_ts": trade.exch_ts,
+            "trade_id": trade.trade_id
+        }), trades_only=True)
+
+    async def _publish_state(self):
+        while True:
+            if self.clients:
+                self._broadcast(self._encode(self.snapshot()))
+            await asyncio.sleep(self.state_interval)
+
+    @staticmethod
+    def _encode(msg):
+        return (json.dumps(msg, separators=(",", ":")) + "\n").encode()
+
+
+if __name__ == "__main__":
+    hub = MarketDataHub(
+        record_dir=os.getenv("TICK_RECORD_DIR"),
+        record_compress=os.getenv("TICK_RECORD_COMPRESS", "") == "1",
+        fast_decode=os.getenv("FAST_DECODE", "") == "1",
+        symbols=symbols_from_env(),
+        granularity=parse_granularity(os.getenv("FEED_GRANULARITY"))
+    )
+    try:
+        asyncio.run(hub.run())
+    finally:
+        hub.feeds.close()
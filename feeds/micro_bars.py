@@ -0,0 +1,101 @@
+# feeds/micro_bars.py (fixed-interval trade bars built inside the feed layer)
+
+from collections import deque, namedtuple
+
+from utils import clock
+
+# One closed bar for one venue. start is the bar's epoch-aligned open time (local receive clock),
+# so every venue shares the same boundaries. delta = buy_qty - sell_qty for the bar;
+# cvd is the running sum of delta since bars were enabled on the feed.
+Bar = namedtuple(
+    "Bar",
+    ["venue", "start", "open", "high", "low", "close", "buy_qty", "sell_qty", "count", "delta", "cvd"]
+)
+
+
+class BarAggregator:
+    """
+    Trade listener that folds trades into bar_seconds bars per venue.
+    Bars are aligned to multiples of bar_seconds on the receive clock and closed by the
+    first trade of a later bar (or by close_due() when the market goes quiet); intervals
+    without trades produce no bar. Closed bars are kept in a bounded deque per venue and
+    pushed to bar listeners, which run inline like trade listeners and must be cheap.
+    """
+
+    def __init__(self, bar_seconds=1.0, maxlen=3600):
+        self.bar_seconds = bar_seconds
+        self.maxlen = maxlen
+        self.bars = {}      # venue -> deque of closed Bars
+        self.listeners = []
+        self._open = {}     # venue -> [start, open, high, low, close, buy_qty, sell_qty, count]
+        self._cvd = {}
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def __call__(self, trade):
+        venue, price, qty = trade.venue, trade.price, trade.qty
+        start = trade.recv_ts - trade.recv_ts % self.bar_seconds
+        bar = self._open.get(venue)
+
+        if bar is None or start > bar[0]:
+            if bar is not None:
+                self._close(venue, bar)
+            self._open[venue] = [start, price, price, price, price,
+                                 qty if trade.side > 0 else 0.0, 0.0 if trade.side > 0 else qty, 1]
+            return
+
+        if price > bar[2]:
+            bar[2] = price
+        elif price < bar[3]:
+            bar[3] = price
+        bar[4] = price
+        if trade.side > 0:
+            bar[5] += qty
+        else:
+            bar[6] += qty
+        bar[7] += 1
+
+    def _close(self, venue, bar):
+        start, open_, high, low, close, buy_qty, sell_qty, count = bar
+        delta = buy_qty - sell_qty
+        cvd = self._cvd.get(venue, 0.0) + delta
+        self._cvd[venue] = cvd
+
+        closed = Bar(venue, start, open_, high, low, close, buy_qty, sell_qty, count, delta, cvd)
+        history = self.bars.get(venue)
+        if history is None:
+            history = self.bars[venue] = deque(maxlen=self.maxlen)
+        history.append(closed)
+
+        for listener in self.listeners:
+            try:
+                listener(closed)
+            except Exception as e:
+                print(f"[X] Bar listener error [{venue}]:", e)
+
+    def close_due(self, now=None):
+        """Closes every open bar whose interval has ended by now."""
+        now = clock.now() if now is None else now
+        for venue, bar in list(self._open.items()):
+            if bar[0] + self.bar_seconds <= now:
+                del self._open[venue]
+                self._close(venue, bar)
+
+    def get_bars(self, venue=None, since=None):
+        """
+        Closed bars, oldest first. venue=None merges every venue this aggregator has seen;
+        since keeps only bars that started at or after that epoch time.
+        """
+        self.close_due()
+        if venue is not None:
+            bars = list(self.bars.get(venue, ()))
+        else:
+            bars = sorted((b for history in self.bars.values() for b in history), key=lambda b: b.start)
+        if since is not None:
+            bars = [b for b in bars if b.start >= since]
+        return bars
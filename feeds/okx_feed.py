@@ -1,36 +1,85 @@
 # feeds/okx_feed.py
 
-import asyncio
-import websockets
 import json
 
-class OKXCVDTracker:
-    def __init__(self):
-        self.cvd = 0
-        self.price = 0
+from feeds.backfill import GapFiller
+from feeds.base_feed import BaseFeed
+from feeds.fast_decode import HAVE_ORJSON, decode_okx_trades
+from feeds.feed_supervisor import supervisor
+from feeds.symbols import SymbolIndex, state_array
+
+class OKXCVDTracker(BaseFeed):
+    """
+    USDT swap CVD for every symbol over one trades subscription.
+    Per-symbol state lives in arrays indexed by symbol id (feeds/symbols.py); trade
+    listeners see the primary symbol (symbols[0]) only.
+
+    granularity "aggTrade" (default) is the trades channel, where fills of one taker
+    order at one price arrive as a single trade; "trade" is trades-all, every fill.
+    """
+
+    granularities = ("aggTrade", "trade")
+
+    def __init__(self, fast_decode=False, symbols=None, granularity="aggTrade"):
+        super().__init__()
+        self.granularity = self.check_granularity(granularity)
+        self.index = SymbolIndex("okx", symbols)
+        self.symbols = self.index.symbols
+        self._ids = self.index.ids
+        self.cvds = state_array(len(self.index))
+        self.prices = state_array(len(self.index))
+        self.last_trade_ids = [None] * len(self.index)  # for gap backfill on reconnect
+        if fast_decode and HAVE_ORJSON:
+            # Batched messages need a full parse either way; without orjson json.loads in _process is faster
+            self._process = self._process_fast
 
     async def connect(self):
-        uri = "wss://ws.okx.com:8443/ws/v5/public"
-        async for ws in websockets.connect(uri, ping_interval=None):
-            try:
-                await ws.send(json.dumps({
-                    "op": "subscribe",
-                    "args": [{"channel": "trades", "instId": "BTC-USDT-SWAP"}]
-                }))
-                async for msg in ws:
-                    data = json.loads(msg)
-                    if "data" in data:
-                        for trade in data["data"]:
-                            qty = float(trade["sz"])
-                            side = trade["side"]
-                            self.cvd += qty if side == "buy" else -qty
-                            self.price = float(trade["px"])
-            except Exception as e:
-                print("[X] OKX error:", e)
-                await asyncio.sleep(3)
-
-    def get_cvd(self):
-        return round(self.cvd, 2)
-
-    def get_price(self):
-        return self.price
+        # OKX closes connections idle for 30s: plain-text "ping" every 20s, answered with "pong"
+        backfill = GapFiller("okx", self._process, self.last_trade_ids, self._ids, self._apply)
+        raw = self.granularity == "trade"  # trades-all is served on the business endpoint
+        await supervisor.run_stream(
+            self, "okx", f"wss://ws.okx.com:8443/ws/v5/{'business' if raw else 'public'}", self._process,
+            subscribe={"op": "subscribe", "args": [{"channel": "trades-all" if raw else "trades", "instId": instrument}
+                                                   for instrument in self.index.instruments]},
+            ping="ping", is_pong=lambda msg: msg == "pong", on_connect=backfill.on_connect
+        )
+
+    def _process(self, msg):
+        data = json.loads(msg)
+        if "data" in data:
+            for trade in data["data"]:
+                sid = self._ids.get(trade["instId"])
+                if sid is None:
+                    continue
+                qty = float(trade["sz"])
+                side = trade["side"]
+                self.cvds[sid] += qty if side == "buy" else -qty
+                self.last_trade_ids[sid] = trade["tradeId"]
+                self.prices[sid] = float(trade["px"])
+                if self.listeners and sid == 0:
+                    self._emit_trade("okx", self.prices[0], qty, 1 if side == "buy" else -1,
+                                     int(trade["ts"]) / 1000, trade["tradeId"])
+
+    def _process_fast(self, msg):
+        for price, qty, side, trade_ms, trade_id, instrument in decode_okx_trades(msg):
+            sid = self._ids.get(instrument)
+            if sid is None:
+                continue
+            self.cvds[sid] += qty * side
+            self.prices[sid] = price
+            self.last_trade_ids[sid] = trade_id
+            if self.listeners and sid == 0:
+                self._emit_trade("okx", price, qty, side, int(trade_ms) / 1000, trade_id)
+
+    def _apply(self, sid, price, qty, side, exch_ts, trade_id):
+        """Backfilled trade (feeds/backfill.py), applied in order before live parsing resumes."""
+        self.cvds[sid] += qty * side
+        self.last_trade_ids[sid] = trade_id
+        if self.listeners and sid == 0:
+            self._emit_trade("okx", price, qty, side, exch_ts, trade_id)
+
+    def get_cvd(self, symbol=None):
+        return round(self.cvds[self.index.id(symbol)], 2)
+
+    def get_price(self, symbol=None):
+        return self.prices[self.index.id(symbol)]
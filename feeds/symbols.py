@@ -0,0 +1,53 @@
+# feeds/symbols.py (symbol lists, venue instrument names and per-symbol feed state)
+
+import os
+from array import array
+
+DEFAULT_SYMBOLS = ("BTC",)
+
+# Base asset -> the instrument each tracker follows (Binance spot and USD-M perp share a name)
+INSTRUMENTS = {
+    "binance": "{}USDT",
+    "coinbase": "{}-USD",
+    "bybit": "{}USDT",
+    "okx": "{}-USDT-SWAP"
+}
+
+
+def parse_symbols(value):
+    """"BTC, eth,SOL" -> ("BTC", "ETH", "SOL"); empty -> DEFAULT_SYMBOLS."""
+    symbols = tuple(dict.fromkeys(s.strip().upper() for s in (value or "").split(",") if s.strip()))
+    return symbols or DEFAULT_SYMBOLS
+
+
+def symbols_from_env():
+    return parse_symbols(os.getenv("FEED_SYMBOLS"))
+
+
+class SymbolIndex:
+    """
+    Symbol ids for one venue. ids maps the venue's instrument name (as it appears in
+    messages) to the symbol's position in symbols; id 0 is the primary symbol that
+    the engines and trade listeners follow.
+    """
+
+    def __init__(self, venue, symbols=None):
+        self.symbols = tuple(s.upper() for s in symbols) if symbols else DEFAULT_SYMBOLS
+        self.instruments = tuple(INSTRUMENTS[venue].format(s) for s in self.symbols)
+        self.ids = {instrument: i for i, instrument in enumerate(self.instruments)}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def id(self, symbol=None):
+        if symbol is None:
+            return 0
+        try:
+            return self.symbols.index(symbol.upper())
+        except ValueError:
+            raise KeyError(f"{symbol} is not one of this feed's symbols {self.symbols}") from None
+
+
+def state_array(size):
+    """Zeroed float64 array, one slot per symbol."""
+    return array("d", bytes(8 * size))
@@ -0,0 +1,286 @@
+# feeds/tick_recorder.py (columnar binary trade archive, written off the websocket path)
+
+import asyncio
+import bisect
+import glob
+import os
+import struct
+import threading
+import zlib
+from array import array
+from collections import deque
+from datetime import datetime, timezone
+
+from feeds.symbols import DEFAULT_SYMBOLS
+
+VENUES = ["coinbase", "binance_spot", "binance_perp", "bybit", "okx"]
+VENUE_IDS = {venue: i for i, venue in enumerate(VENUES)}
+
+# Column order and array typecodes inside every block
+COLUMNS = [
+    ("venue", "B"),      # index into VENUES
+    ("exch_ts", "q"),    # venue trade time, epoch microseconds (0 if unknown)
+    ("recv_ts", "q"),    # local receive time, epoch microseconds
+    ("price", "d"),
+    ("qty", "d"),
+    ("side", "b"),       # +1 / -1, same sign convention as the feeds' CVD
+    ("trade_id", "q")    # venue trade id, -1 if not numeric
+]
+
+# Block = header + column payload. One index record per block makes the time index sparse.
+BLOCK_MAGIC = b"TBLK"
+BLOCK_HEADER = struct.Struct("<4sIIqqI")  # magic, rows, flags, first_recv_us, last_recv_us, payload_len
+INDEX_RECORD = struct.Struct("<qqQ")      # first_recv_us, last_recv_us, block offset
+FLAG_ZLIB = 1
+
+DATA_SUFFIX = ".ticks"
+INDEX_SUFFIX = ".idx"
+SYMBOL_FILE = "SYMBOL"  # base asset of the archive, one line
+
+
+def archive_symbol(directory):
+    """Base asset a TickRecorder directory holds; archives from before SYMBOL_FILE are BTC."""
+    try:
+        with open(os.path.join(directory, SYMBOL_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return DEFAULT_SYMBOLS[0] if glob.glob(os.path.join(directory, "*" + DATA_SUFFIX)) else None
+
+
+def hour_key(ts_us):
+    return datetime.fromtimestamp(ts_us / 1e6, tz=timezone.utc).strftime("%Y%m%d-%H")
+
+
+def _trade_id(raw):
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return -1
+
+
+class TickRecorder:
+    """
+    Listener that streams every trade into hourly columnar files:
+      <directory>/<YYYYMMDD-HH>.ticks  blocks of column-packed trades (optionally zlib)
+      <directory>/<YYYYMMDD-HH>.idx    one (first_recv, last_recv, offset) record per block
+
+      <directory>/SYMBOL               the base asset the trades belong to
+
+    Calling the recorder only appends the Trade to a deque; packing, compression and
+    disk writes happen in a background thread every flush_seconds or batch_size trades.
+    Trades carry no symbol (trade listeners only see a feed's primary symbol), so an
+    archive holds one symbol: attach() refuses feeds following several, and start()
+    refuses a directory recorded for another symbol.
+    """
+
+    def __init__(self, directory="ticks", compress=False, batch_size=20000, flush_seconds=1.0,
+                 symbol=DEFAULT_SYMBOLS[0]):
+        self.directory = directory
+        self.symbol = symbol.upper()
+        self.compress = compress
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._hour = None
+        self._data_file = None
+        self._index_file = None
+
+        self.recorded = 0
+
+    def __call__(self, trade):
+        self._pending.append(trade)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def attach(self, *feeds):
+        for feed in feeds:
+            symbols = getattr(feed, "symbols", (self.symbol,))
+            if tuple(symbols) != (self.symbol,):
+                raise ValueError(f"Tick recording follows one symbol ({self.symbol}), "
+                                 f"{type(feed).__name__} follows {', '.join(symbols)}")
+        for feed in feeds:
+            feed.add_listener(self)
+
+    def start(self):
+        if self._thread is None:
+            recorded = archive_symbol(self.directory)
+            if recorded is not None and recorded != self.symbol:
+                raise ValueError(f"{self.directory} holds {recorded} ticks, not {self.symbol}")
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, SYMBOL_FILE), "w") as f:
+                f.write(self.symbol + "\n")
+            self._thread = threading.Thread(target=self._run, name="tick-recorder", daemon=True)
+            self._thread.start()
+            print(f"[REC] Recording ticks to {self.directory} (compress={self.compress})")
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._close_files()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        while self._pending:
+            batch = []
+            pending = self._pending
+            for _ in range(min(len(pending), self.batch_size)):
+                batch.append(pending.popleft())
+            try:
+                self._write_block(batch)
+            except Exception as e:
+                print(f"[X] Tick recorder write failed, dropped {len(batch)} trades:", e)
+
+    def _write_block(self, batch):
+        columns = [array(code) for _, code in COLUMNS]
+        venue, exch_ts, recv_ts, price, qty, side, trade_id = columns
+        for t in batch:
+            venue.append(VENUE_IDS[t.venue])
+            exch_ts.append(int(t.exch_ts * 1e6) if t.exch_ts else 0)
+            recv_ts.append(int(t.recv_ts * 1e6))
+            price.append(t.price)
+            qty.append(t.qty)
+            side.append(t.side)
+            trade_id.append(_trade_id(t.trade_id))
+
+        payload = b"".join(col.tobytes() for col in columns)
+        flags = 0
+        if self.compress:
+            payload = zlib.compress(payload, 1)
+            flags |= FLAG_ZLIB
+
+        self._rotate(hour_key(recv_ts[0]))
+        offset = self._data_file.tell()
+        self._data_file.write(BLOCK_HEADER.pack(BLOCK_MAGIC, len(batch), flags, recv_ts[0], recv_ts[-1], len(payload)))
+        self._data_file.write(payload)
+        self._data_file.flush()
+        # Index goes after the data so an index record never points past the end of the file
+        self._index_file.write(INDEX_RECORD.pack(recv_ts[0], recv_ts[-1], offset))
+        self._index_file.flush()
+        self.recorded += len(batch)
+
+    def _rotate(self, hour):
+        if hour == self._hour:
+            return
+        self._close_files()
+        base = os.path.join(self.directory, hour)
+        self._data_file = open(base + DATA_SUFFIX, "ab")
+        self._index_file = open(base + INDEX_SUFFIX, "ab")
+        self._hour = hour
+
+    def _close_files(self):
+        for f in (self._data_file, self._index_file):
+            if f is not None:
+                f.close()
+        self._data_file = self._index_file = None
+        self._hour = None
+
+
+class TickReader:
+    """
+    Reads a TickRecorder directory back, in recv-time order within each hourly file.
+    start / end (epoch seconds) are resolved through the sparse index, so only the
+    blocks overlapping the range are read.
+    """
+
+    def __init__(self, directory="ticks"):
+        self.directory = directory
+
+    @property
+    def symbol(self):
+        return archive_symbol(self.directory) or DEFAULT_SYMBOLS[0]
+
+    def files(self):
+        return sorted(glob.glob(os.path.join(self.directory, "*" + DATA_SUFFIX)))
+
+    def _load_index(self, data_path):
+        index_path = data_path[:-len(DATA_SUFFIX)] + INDEX_SUFFIX
+        with open(index_path, "rb") as f:
+            raw = f.read()
+        usable = len(raw) - len(raw) % INDEX_RECORD.size
+        return [INDEX_RECORD.unpack_from(raw, i) for i in range(0, usable, INDEX_RECORD.size)]
+
+    def iter_blocks(self, start=None, end=None):
+        """Yields dicts of column arrays, one per stored block overlapping [start, end]."""
+        start_us = int(start * 1e6) if start is not None else None
+        end_us = int(end * 1e6) if end is not None else None
+        # Blocks are filed by the hour of their first trade, so the previous hour can spill into start
+        first_hour = hour_key(start_us - 3600 * 1e6) if start_us is not None else None
+        last_hour = hour_key(end_us) if end_us is not None else None
+
+        for path in self.files():
+            hour = os.path.basename(path)[:-len(DATA_SUFFIX)]
+            if (first_hour and hour < first_hour) or (last_hour and hour > last_hour):
+                continue
+
+            index = self._load_index(path)
+            first = 0
+            if start_us is not None:
+                # Blocks are appended in time order; skip every block that ends before start
+                first = bisect.bisect_left([rec[1] for rec in index], start_us)
+
+            with open(path, "rb") as f:
+                for first_recv, last_recv, offset in index[first:]:
+                    if end_us is not None and first_recv > end_us:
+                        break
+                    yield self._read_block(f, offset)
+
+    def _read_block(self, f, offset):
+        f.seek(offset)
+        magic, rows, flags, _, _, payload_len = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+        if magic != BLOCK_MAGIC:
+            raise ValueError(f"Corrupt tick block at offset {offset}")
+        payload = f.read(payload_len)
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+
+        block, pos = {}, 0
+        for name, code in COLUMNS:
+            col = array(code)
+            size = col.itemsize * rows
+            col.frombytes(payload[pos:pos + size])
+            block[name] = col
+            pos += size
+        return block
+
+    def __iter__(self):
+        return self.read()
+
+    def read(self, start=None, end=None):
+        """Yields (venue, exch_ts, recv_ts, price, qty, side, trade_id) rows with times in seconds."""
+        start_us = int(start * 1e6) if start is not None else None
+        end_us = int(end * 1e6) if end is not None else None
+        for block in self.iter_blocks(start, end):
+            for venue, exch_ts, recv_ts, price, qty, side, trade_id in zip(*(block[name] for name, _ in COLUMNS)):
+                if start_us is not None and recv_ts < start_us:
+                    continue
+                if end_us is not None and recv_ts > end_us:
+                    return
+                yield VENUES[venue], exch_ts / 1e6, recv_ts / 1e6, price, qty, side, trade_id
+
+
+if __name__ == "__main__":
+    from feeds.feed_set import FeedSet
+
+    feeds = FeedSet(
+        record_dir=os.getenv("TICK_RECORD_DIR", "ticks"),
+        record_compress=os.getenv("TICK_RECORD_COMPRESS", "") == "1",
+        fast_decode=os.getenv("FAST_DECODE", "") == "1"
+    )
+    try:
+        asyncio.run(feeds.connect())
+    finally:
+        feeds.close()
@@ -0,0 +1,123 @@
+# multi_strategy_runner.py (sniper + reversal + swing in one process)
+
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+
+from feeds.feed_set import FeedSet
+from strategy_engine import read_market, stale_venues
+from utils import clock, metrics
+from utils.multi_tf_memory import MultiTFMemory
+from utils.global_volume_fetcher import get_cached_volume, volume_cache
+from utils.horizon_resolver import get_resolver
+from utils.gpt_commentary import commentary_worker
+from utils.discord_alert import close_discord
+from utils.signal_trigger import SignalTrigger
+
+from spot_vs_perp_engine import SpotVsPerpEngine
+from reversal_vs_trend_engine import ReversalVsTrendEngine
+from swing_vs_perp_engine import SwingVsPerpEngine
+
+load_dotenv()
+
+
+class MultiStrategyRunner:
+    """
+    Runs several StrategyEngines on one FeedSet and one MultiTFMemory.
+    Each cycle reads the feeds, updates memory and fetches volume once, then hands
+    the same snapshot to every engine whose interval has come due.
+    Scorers, cooldowns and alert dispatchers stay per engine.
+
+    With event_driven (or EVENT_TRIGGER=1) one shared SignalTrigger also wakes the cycle
+    early; on a market event every engine whose trigger_debounce has passed runs, and
+    interval stays each engine's maximum gap between runs.
+    """
+
+    def __init__(self, engine_classes=(SpotVsPerpEngine, ReversalVsTrendEngine, SwingVsPerpEngine), feeds=None,
+                 event_driven=None):
+        self.feeds = feeds or FeedSet.from_env()
+        self.memory = MultiTFMemory(path="multi_strategy_tf_memory.bin")
+        self.engines = [cls(feeds=self.feeds, memory=self.memory, event_driven=False) for cls in engine_classes]
+
+        if event_driven is None:
+            event_driven = os.getenv("EVENT_TRIGGER", "") == "1"
+        self.trigger = None
+        if event_driven:
+            self.trigger = SignalTrigger(
+                self.feeds,
+                cvd_threshold=min(engine.trigger_cvd for engine in self.engines),
+                on_bar_close=any(feed.bars is not None for feed in self.feeds.all()),
+                debounce=min(engine.trigger_debounce for engine in self.engines)
+            ).attach()
+
+    async def run(self):
+        # Attached before the feeds connect, so a hub client asks for trades in its handshake;
+        # also resumes horizon tracking of traps left open by the last run
+        get_resolver(self.feeds)
+        await metrics.start(self.feeds)
+        try:
+            await asyncio.gather(
+                self.feeds.connect(),
+                self.schedule()
+            )
+        finally:
+            # Commentary still in flight is delivered (each request is bounded by its timeout)
+            await commentary_worker.drain()
+            await close_discord()
+            await volume_cache.close()
+
+    async def schedule(self):
+        # The first cycle scores with volume bias: wait for the first fetch while the feeds connect
+        await volume_cache.prime()
+        next_due = {engine: clock.now() for engine in self.engines}
+        last_run = {engine: float("-inf") for engine in self.engines}
+        event = False
+
+        while True:
+            now = clock.now()
+            due = [
+                engine for engine in self.engines
+                if next_due[engine] <= now or (event and now - last_run[engine] >= engine.trigger_debounce)
+            ]
+
+            if due:
+                try:
+                    market = self.snapshot()
+                    for engine in due:
+                        await engine.step(market)
+                except Exception as e:
+                    print(f"[ERROR] Multi-strategy cycle error: {e}")
+
+                for engine in due:
+                    last_run[engine] = now
+                    if event:
+                        next_due[engine] = now + engine.interval
+                        continue
+                    next_due[engine] += engine.interval
+                    # Fell behind (slow cycle) — realign instead of firing a backlog
+                    if next_due[engine] <= clock.now():
+                        next_due[engine] = clock.now() + engine.interval
+
+            if self.trigger is None:
+                await clock.sleep(max(0, min(next_due.values()) - clock.now()))
+            else:
+                event = await self.trigger.wait(deadline=min(next_due.values())) != "interval"
+
+    def snapshot(self):
+        market = read_market(self.feeds)
+        started = time.perf_counter()
+        has_price = market["bin_price"] or market["cb_price"] or market["bybit_price"] or market["okx_price"]
+        # Frozen CVD from a stale feed would read as a flat delta; leave the memory alone until it recovers
+        required = {venue for engine in self.engines for venue in engine.required_venues}
+        if has_price and not stale_venues(market, required):
+            self.memory.update(market["cb_cvd"], market["bin_spot"], market["bin_perp"])
+        market["deltas"] = self.memory.get_all_deltas()
+        metrics.engine_stage.observe(time.perf_counter() - started, "Multi-Strategy", "memory")
+        market["volume_data"] = get_cached_volume()
+        return market
+
+
+if __name__ == "__main__":
+    runner = MultiStrategyRunner()
+    asyncio.run(runner.run())
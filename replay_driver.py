@@ -0,0 +1,213 @@
+# replay_driver.py (feed a recorded tick archive through the real feeds and engines)
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from functools import partial
+
+from feeds.feed_set import FeedSet
+from feeds.symbols import INSTRUMENTS
+from feeds.tick_recorder import TickReader
+from utils import clock
+from utils.multi_tf_memory import MultiTFMemory
+
+from spot_vs_perp_engine import SpotVsPerpEngine
+from reversal_vs_trend_engine import ReversalVsTrendEngine
+from swing_vs_perp_engine import SwingVsPerpEngine
+
+
+# --- Venue-native messages rebuilt from recorded rows, for the archive's symbol ---
+def _coinbase_msg(instrument, exch_ts, price, qty, side, trade_id):
+    return json.dumps({
+        "type": "match",
+        "trade_id": trade_id,
+        "side": "buy" if side > 0 else "sell",
+        "size": repr(qty),
+        "price": repr(price),
+        "product_id": instrument,
+        "time": datetime.fromtimestamp(exch_ts, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+    })
+
+
+def _binance_msg(instrument, exch_ts, price, qty, side, trade_id):
+    return json.dumps({
+        "e": "trade",
+        "s": instrument,
+        "t": trade_id,
+        "p": repr(price),
+        "q": repr(qty),
+        "T": round(exch_ts * 1000),
+        "m": side < 0
+    })
+
+
+def _bybit_msg(instrument, exch_ts, price, qty, side, trade_id):
+    return json.dumps({
+        "topic": f"publicTrade.{instrument}",
+        "data": [{
+            "T": round(exch_ts * 1000),
+            "s": instrument,
+            "S": "Buy" if side > 0 else "Sell",
+            "v": repr(qty),
+            "p": repr(price),
+            "i": str(trade_id)
+        }]
+    })
+
+
+def _okx_msg(instrument, exch_ts, price, qty, side, trade_id):
+    return json.dumps({
+        "arg": {"channel": "trades", "instId": instrument},
+        "data": [{
+            "instId": instrument,
+            "tradeId": str(trade_id),
+            "px": repr(price),
+            "sz": repr(qty),
+            "side": "buy" if side > 0 else "sell",
+            "ts": str(round(exch_ts * 1000))
+        }]
+    })
+
+
+class ReplayDriver:
+    """
+    Replays a TickRecorder archive through the feed parsers and the engines' real
+    monitor() loops on a virtual clock, with the feeds following the archive's symbol.
+    speed=1 is real time, speed=100 is 100x, speed=None runs as fast as possible.
+    Alerts are captured in self.alerts; nothing goes to Discord, Supabase, OpenAI or
+    the REST volume endpoints (volume_data is replayed as a fixed snapshot).
+    """
+
+    def __init__(self, directory, engine_classes=(SpotVsPerpEngine, ReversalVsTrendEngine, SwingVsPerpEngine),
+                 speed=None, start=None, end=None, volume_data=None, fast_decode=False, event_driven=False):
+        self.reader = TickReader(directory)
+        self.symbol = self.reader.symbol
+        self.speed = speed
+        self.start = start
+        self.end = end
+        self.volume_data = volume_data or {}
+
+        self.feeds = FeedSet(fast_decode=fast_decode, symbols=(self.symbol,))
+        self.engines = [cls(feeds=self.feeds, memory=MultiTFMemory(), event_driven=event_driven)
+                        for cls in engine_classes]
+        self.triggers = [engine.trigger for engine in self.engines if engine.trigger is not None]
+        self.alerts = []
+        self.replayed = 0
+
+        for engine in self.engines:
+            self._capture(engine)
+
+        instrument = {venue: pattern.format(self.symbol) for venue, pattern in INSTRUMENTS.items()}
+        self.handlers = {
+            "coinbase": (self.feeds.coinbase._process, partial(_coinbase_msg, instrument["coinbase"])),
+            "binance_spot": (self.feeds.binance._process_spot, partial(_binance_msg, instrument["binance"])),
+            "binance_perp": (self.feeds.binance._process_perp, partial(_binance_msg, instrument["binance"])),
+            "bybit": (self.feeds.bybit._process, partial(_bybit_msg, instrument["bybit"])),
+            "okx": (self.feeds.okx._process, partial(_okx_msg, instrument["okx"]))
+        }
+
+    def _capture(self, engine):
+        name = engine.name
+
+        def alert_logger(alert):
+            self.alerts.append({"engine": name, "kind": "sniper_alert", "ts": clock.now(), **alert})
+
+        def trap_logger(snapshot):
+            self.alerts.append({"engine": name, "kind": "trap", "ts": clock.now(), **snapshot})
+
+        async def sender(message, mode="sniper", event_ts=None):
+            self.alerts.append({"engine": name, "kind": "discord", "ts": clock.now(), "mode": mode, "message": message})
+
+        engine.alert_logger = alert_logger
+        engine.trap_logger = trap_logger
+        engine.fetch_volume = lambda: dict(self.volume_data)
+        engine.alert_dispatcher.sender = sender
+        engine.alert_dispatcher.commentary = None
+
+    async def run(self):
+        rows = self.reader.read(self.start, self.end)
+        first = next(rows, None)
+        if first is None:
+            print("[REPLAY] No ticks in range")
+            return self.alerts
+
+        virtual = clock.VirtualClock(first[2])
+        previous = clock.get_clock()
+        clock.set_clock(virtual)
+
+        tasks = [asyncio.create_task(engine.monitor()) for engine in self.engines]
+        wall_start = time.perf_counter()
+        replay_start = first[2]
+        try:
+            # Let every monitor run its first cycle and go to sleep
+            await virtual.settle(len(tasks))
+            await self._replay_row(virtual, first)
+            for row in rows:
+                await self._replay_row(virtual, row)
+                if self.speed:
+                    ahead = (row[2] - replay_start) / self.speed - (time.perf_counter() - wall_start)
+                    if ahead > 0.005:
+                        await asyncio.sleep(ahead)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            clock.set_clock(previous)
+
+        elapsed = time.perf_counter() - wall_start
+        span = virtual.now() - replay_start
+        print(f"[REPLAY] {self.replayed} trades, {span / 3600:.2f}h of data in {elapsed:.1f}s "
+              f"({span / max(elapsed, 1e-9):.0f}x) → {len(self.alerts)} captured outputs")
+        return self.alerts
+
+    async def _replay_row(self, virtual, row):
+        venue, exch_ts, recv_ts, price, qty, side, trade_id = row
+        # Wake any engine due before this trade arrived, then deliver it at its receive time
+        await virtual.advance(recv_ts)
+
+        process, build = self.handlers[venue]
+        process(build(exch_ts or recv_ts, price, qty, side, trade_id))
+        self.replayed += 1
+
+        # An event-driven engine fired by this trade gets to run before the next trade arrives
+        for _ in range(1000):
+            if not any(trigger.pending for trigger in self.triggers):
+                break
+            await asyncio.sleep(0)
+
+
+def _parse_ts(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded ticks through the feeds and engines")
+    parser.add_argument("directory", nargs="?", default="ticks")
+    parser.add_argument("--speed", type=float, default=None, help="1 = real time, 100 = 100x; omit for max speed")
+    parser.add_argument("--start", help="epoch seconds or ISO time (UTC)")
+    parser.add_argument("--end", help="epoch seconds or ISO time (UTC)")
+    parser.add_argument("--volume-json", help="fixed volume snapshot fed to score_volume_bias")
+    parser.add_argument("--fast-decode", action="store_true", help="parse with feeds/fast_decode.py")
+    parser.add_argument("--event-driven", action="store_true", help="run the engines on SignalTrigger events")
+    args = parser.parse_args()
+
+    driver = ReplayDriver(
+        args.directory,
+        speed=args.speed,
+        start=_parse_ts(args.start),
+        end=_parse_ts(args.end),
+        volume_data=json.loads(args.volume_json) if args.volume_json else None,
+        fast_decode=args.fast_decode,
+        event_driven=args.event_driven
+    )
+    alerts = asyncio.run(driver.run())
+    for alert in alerts:
+        if alert["kind"] == "sniper_alert":
+            print(f"{datetime.fromtimestamp(alert['ts'], tz=timezone.utc).isoformat()} [{alert['engine']}] {alert['signal']}")
@@ -0,0 +1,310 @@
+# scorer_batch.py (vectorized sniper / swing / reversal scoring for backtests)
+
+import numpy as np
+
+import scorer_sniper
+import scorer_swing
+import scorer_reversal
+from utils.multi_tf_memory import TIMEFRAMES
+
+# Label codes used by the batch API
+NEUTRAL, SPOT_DOMINANT, PERP_DOMINANT = 0, 1, -1
+LABEL_NAMES = {NEUTRAL: "neutral", SPOT_DOMINANT: "spot_dominant", PERP_DOMINANT: "perp_dominant"}
+LABEL_CODES = {name: code for code, name in LABEL_NAMES.items()}
+
+
+def py_round(x, ndigits=2):
+    """
+    Element-wise equivalent of Python's round(x, ndigits).
+    np.round agrees everywhere except values sitting on a .5 boundary after scaling,
+    so those few are handed to round() itself.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    scale = 10.0 ** ndigits
+    scaled = x * scale
+    out = np.rint(scaled) / scale
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_half.any():
+        out[near_half] = [round(v, ndigits) for v in x[near_half].tolist()]
+    return out
+
+
+def label_names(codes):
+    return np.vectorize(LABEL_NAMES.get, otypes=[object])(codes)
+
+
+def _label(final_score, threshold):
+    return np.where(final_score > threshold, SPOT_DOMINANT,
+                    np.where(final_score < -threshold, PERP_DOMINANT, NEUTRAL)).astype(np.int8)
+
+
+def _columns(deltas, tf):
+    d = deltas[tf]
+    return (np.asarray(d["cb_cvd"], dtype=np.float64),
+            np.asarray(d["bin_spot"], dtype=np.float64),
+            np.asarray(d["bin_perp"], dtype=np.float64))
+
+
+# --- Delta construction (mirrors utils/multi_tf_memory.py) ---
+def deltas_from_samples(ts, cb_cvd, bin_spot, bin_perp, windows=None):
+    """
+    Computes MultiTFMemory.get_all_deltas() as if it were called after every sample.
+    Inputs are aligned 1-D arrays of memory.update() inputs; returns
+    {tf: {"cb_cvd": arr, "bin_spot": arr, "bin_perp": arr}}.
+    """
+    ts = np.asarray(ts, dtype=np.float64)
+    series = {
+        "cb_cvd": np.asarray(cb_cvd, dtype=np.float64),
+        "bin_spot": np.asarray(bin_spot, dtype=np.float64),
+        "bin_perp": np.asarray(bin_perp, dtype=np.float64)
+    }
+    idx = np.arange(len(ts))
+    deltas = {}
+
+    for tf, max_age in (windows or TIMEFRAMES).items():
+        # Start slightly early, then step forward until the memory's own rule holds
+        start = np.searchsorted(ts, ts - max_age - 1e-6, side="left")
+        while True:
+            stale = (ts - ts[start]) > max_age
+            if not stale.any():
+                break
+            start = start + stale
+        too_few = (idx - start + 1) < 2
+
+        deltas[tf] = {}
+        for name, values in series.items():
+            first = values[start]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                change = py_round(((values - first) / np.abs(first)) * 100, 2)
+            deltas[tf][name] = np.where(too_few | (first == 0), 0.0, change)
+    return deltas
+
+
+# --- Scorers ---
+def score_sniper_batch(deltas, vol_score=None, vol_label=None, tf_weights=None, threshold=None,
+                       trap_cb=-5, trap_perp=5, neutral_blend=0.7, directional_blend=0.5):
+    """
+    Vectorized score_sniper_confluence. vol_score / vol_label (codes) are optional
+    arrays of score_volume_bias() output. Returns (score, label_code) arrays.
+    """
+    tf_weights = scorer_sniper.TF_WEIGHTS if tf_weights is None else tf_weights
+    threshold = scorer_sniper.LABEL_THRESHOLD if threshold is None else threshold
+
+    n = len(next(iter(deltas.values()))["cb_cvd"])
+    score = np.zeros(n)
+    trap = np.zeros(n, dtype=bool)
+    total_weight = 0
+
+    for tf, weight in tf_weights.items():
+        cb, spot, perp = _columns(deltas, tf)
+        trap |= (cb < trap_cb) & (perp > trap_perp) & (spot <= 0)
+        score += np.select(
+            [(cb > 0) & (spot > 0) & (perp < 0),
+             (perp > 0) & (cb < 0) & (spot <= 0),
+             (cb > 0) & (spot < 0),
+             (cb < 0) & (spot > 0)],
+            [1.5 * weight, -1.5 * weight, 0.5 * weight, -0.5 * weight],
+            0.0
+        )
+        total_weight += weight
+
+    final_score = py_round((score / total_weight) * 10, 2)
+    if vol_score is not None:
+        vol_score = np.asarray(vol_score, dtype=np.float64)
+        blend = np.where(np.asarray(vol_label) == NEUTRAL, neutral_blend, directional_blend)
+        final_score = py_round((final_score * blend) + (vol_score * (1 - blend)), 2)
+
+    label = _label(final_score, threshold)
+    final_score = np.where(trap, 9.0, final_score)
+    label = np.where(trap, PERP_DOMINANT, label).astype(np.int8)
+    return final_score, label
+
+
+def score_swing_batch(deltas, tf_weights=None, threshold=None):
+    """Vectorized score_swing_confluence. Returns (score, label_code) arrays."""
+    tf_weights = scorer_swing.TF_WEIGHTS if tf_weights is None else tf_weights
+    threshold = scorer_swing.LABEL_THRESHOLD if threshold is None else threshold
+
+    n = len(next(iter(deltas.values()))["cb_cvd"])
+    score = np.zeros(n)
+    total_weight = 0
+
+    for tf, weight in tf_weights.items():
+        cb, spot, perp = _columns(deltas, tf)
+        score += np.select(
+            [(cb > 0) & (spot > 0) & (perp < 0),
+             (perp > 0) & (cb < 0) & (spot <= 0),
+             (cb > 0) & (spot < 0),
+             (cb < 0) & (spot > 0)],
+            [1.5 * weight, -1.5 * weight, 0.5 * weight, -0.5 * weight],
+            0.0
+        )
+        total_weight += weight
+
+    final_score = py_round((score / total_weight) * 10, 2) if total_weight else np.zeros(n)
+    return final_score, _label(final_score, threshold)
+
+
+def score_reversal_batch(deltas, tf_weights=None, threshold=None):
+    """Vectorized score_reversal_confluence. Returns (score, label_code) arrays."""
+    tf_weights = scorer_reversal.TF_WEIGHTS if tf_weights is None else tf_weights
+    threshold = scorer_reversal.LABEL_THRESHOLD if threshold is None else threshold
+
+    n = len(next(iter(deltas.values()))["cb_cvd"])
+    score = np.zeros(n)
+    total_weight = 0
+
+    for tf, weight in tf_weights.items():
+        cb, spot, perp = _columns(deltas, tf)
+        score += np.select(
+            [(cb > 0) & (spot > 0) & (perp < 0),
+             (cb < 0) & (spot < 0) & (perp > 0),
+             (cb > 0) & (spot < 0),
+             (cb < 0) & (spot > 0)],
+            [1.5 * weight, -1.5 * weight, 0.5 * weight, -0.5 * weight],
+            0.0
+        )
+        total_weight += weight
+
+    final_score = py_round(score / total_weight * 10, 2) if total_weight else np.zeros(n)
+    return final_score, _label(final_score, threshold)
+
+
+def blend_volume(cvd_score, vol_score, cvd_weight=0.7, volume_weight=0.3):
+    """The swing / reversal engines' final_score = round(cvd * 0.7 + volume * 0.3, 2)."""
+    return py_round((np.asarray(cvd_score) * cvd_weight) + (np.asarray(vol_score) * volume_weight), 2)
+
+
+def score_all(deltas, vol_score=None, vol_label=None):
+    """All three scorers in one pass: {"sniper": (score, label), "swing": ..., "reversal": ...}."""
+    return {
+        "sniper": score_sniper_batch(deltas, vol_score, vol_label),
+        "swing": score_swing_batch(deltas),
+        "reversal": score_reversal_batch(deltas)
+    }
+
+
+# --- Outcomes ---
+def forward_returns(price_ts, prices, signal_ts, horizons=(300, 900, 3600, 14400)):
+    """
+    Percent return from the last price at or before each signal to the first price at or
+    after signal + horizon, found with searchsorted. NaN where the series runs out.
+    Returns {horizon: array}.
+    """
+    price_ts = np.asarray(price_ts, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    signal_ts = np.asarray(signal_ts, dtype=np.float64)
+
+    entry_idx = np.searchsorted(price_ts, signal_ts, side="right") - 1
+    entry = np.where(entry_idx >= 0, prices[np.clip(entry_idx, 0, None)], np.nan)
+
+    out = {}
+    for horizon in horizons:
+        exit_idx = np.searchsorted(price_ts, signal_ts + horizon, side="left")
+        valid = exit_idx < len(prices)
+        exit_price = np.where(valid, prices[np.clip(exit_idx, None, len(prices) - 1)], np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[horizon] = (exit_price - entry) / entry * 100
+    return out
+
+
+def samples_from_ticks(reader, step=1.0, start=None, end=None):
+    """
+    Rebuilds the engines' memory inputs from a TickRecorder archive on a fixed grid:
+    cumulative Coinbase / Binance spot / Binance perp CVD (rounded like get_cvd())
+    and the Binance spot price (Coinbase as fallback), sampled every `step` seconds.
+    """
+    from feeds.tick_recorder import VENUE_IDS
+
+    blocks = list(reader.iter_blocks(start, end))
+    if not blocks:
+        return {name: np.array([]) for name in ("ts", "cb_cvd", "bin_spot", "bin_perp", "price")}
+
+    def col(name, dtype):
+        return np.concatenate([np.frombuffer(b[name], dtype=dtype) for b in blocks])
+
+    venue = col("venue", np.uint8)
+    recv_ts = col("recv_ts", np.int64) / 1e6
+    price = col("price", np.float64)
+    signed = col("qty", np.float64) * col("side", np.int8)
+
+    order = np.argsort(recv_ts, kind="stable")
+    venue, recv_ts, price, signed = venue[order], recv_ts[order], price[order], signed[order]
+
+    t0 = recv_ts[0] if start is None else start
+    t1 = recv_ts[-1] if end is None else end
+    grid = np.arange(np.ceil(t0 / step) * step, t1 + step / 2, step)
+    out = {"ts": grid}
+
+    for name, venue_name in (("cb_cvd", "coinbase"), ("bin_spot", "binance_spot"), ("bin_perp", "binance_perp")):
+        mask = venue == VENUE_IDS[venue_name]
+        cum = np.cumsum(signed[mask])
+        pos = np.searchsorted(recv_ts[mask], grid, side="right") - 1
+        out[name] = np.where(pos >= 0, py_round(cum[np.clip(pos, 0, None)], 2) if len(cum) else 0.0, 0.0)
+
+    for venue_name in ("binance_spot", "coinbase"):
+        mask = venue == VENUE_IDS[venue_name]
+        pos = np.searchsorted(recv_ts[mask], grid, side="right") - 1
+        last = np.where(pos >= 0, price[mask][np.clip(pos, 0, None)], np.nan) if mask.any() else np.full(len(grid), np.nan)
+        out["price"] = last if "price" not in out else np.where(np.isnan(out["price"]), last, out["price"])
+    return out
+
+
+def check_parity(deltas, vol_score=None, vol_label=None, sample=2000, seed=0):
+    """
+    Scores a random sample of rows with the scalar scorers and asserts the batch
+    results match exactly. Returns the number of rows checked.
+    """
+    results = score_all(deltas, vol_score, vol_label)
+    n = len(results["sniper"][0])
+    rows = np.random.default_rng(seed).choice(n, size=min(sample, n), replace=False) if n else []
+
+    for i in rows:
+        row = {tf: {k: float(v[i]) for k, v in d.items()} for tf, d in deltas.items()}
+        volume_bias = None
+        if vol_score is not None:
+            volume_bias = (float(vol_score[i]), LABEL_NAMES[int(vol_label[i])])
+        expected = {
+            "sniper": scorer_sniper.score_sniper_confluence(row, volume_bias),
+            "swing": scorer_swing.score_swing_confluence(row),
+            "reversal": scorer_reversal.score_reversal_confluence(row)
+        }
+        for name, scalar in expected.items():
+            score, label = results[name][0][i], LABEL_NAMES[int(results[name][1][i])]
+            assert scalar["score"] == score and scalar["label"] == label, (name, i, scalar, score, label)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from feeds.tick_recorder import TickReader
+
+    parser = argparse.ArgumentParser(description="Vectorized backtest of the three scorers over a tick archive")
+    parser.add_argument("directory", nargs="?", default="ticks")
+    parser.add_argument("--step", type=float, default=1.0, help="sample spacing in seconds")
+    parser.add_argument("--horizons", default="300,900,3600,14400")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    samples = samples_from_ticks(TickReader(args.directory), step=args.step)
+    deltas = deltas_from_samples(samples["ts"], samples["cb_cvd"], samples["bin_spot"], samples["bin_perp"])
+    results = score_all(deltas)
+    horizons = [float(h) for h in args.horizons.split(",")]
+    returns = forward_returns(samples["ts"], samples["price"], samples["ts"], horizons)
+    print(f"📦 {len(samples['ts'])} samples scored in {time.perf_counter() - started:.2f}s")
+
+    for name, (score, label) in results.items():
+        print(f"\n🔎 {name.upper()}")
+        for code in (SPOT_DOMINANT, PERP_DOMINANT):
+            hits = label == code
+            line = f"   {LABEL_NAMES[code]:<14} {int(hits.sum()):>8} rows"
+            for horizon in horizons:
+                r = returns[horizon][hits] * code
+                r = r[~np.isnan(r)]
+                if len(r):
+                    line += f" | {int(horizon)}s: hit {np.mean(r > 0) * 100:.1f}% avg {r.mean():+.3f}%"
+            print(line)
+
+    checked = check_parity(deltas)
+    print(f"\n✅ Scalar parity verified on {checked} rows")
@@ -1,5 +1,13 @@
 # scorer_reversal.py
 
+TF_WEIGHTS = {
+    "5m": 1,
+    "15m": 2,
+    "1h": 2.5
+}
+
+LABEL_THRESHOLD = 3
+
 def score_reversal_confluence(deltas):
     """
     Reversal bot logic: detects counter-trend divergences.
@@ -9,11 +17,7 @@ def score_reversal_confluence(deltas):
     """
 
     try:
-        tf_weights = {
-            "5m": 1,
-            "15m": 2,
-            "1h": 2.5
-        }
+        tf_weights = TF_WEIGHTS
 
         score = 0
         total_weight = 0
@@ -43,9 +47,9 @@ def score_reversal_confluence(deltas):
 
         final_score = round(score / total_weight * 10, 2) if total_weight else 0
 
-        if final_score > 3:
+        if final_score > LABEL_THRESHOLD:
             label = "spot_dominant"  # Reversal long trap
-        elif final_score < -3:
+        elif final_score < -LABEL_THRESHOLD:
             label = "perp_dominant"  # Reversal short trap
         else:
             label = "neutral"
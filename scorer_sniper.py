@@ -1,16 +1,20 @@
 # scorer_sniper.py (AI-enhanced directional scoring logic)
 
+TF_WEIGHTS = {
+    "1m": 1,
+    "3m": 1.5,
+    "5m": 2
+}
+
+LABEL_THRESHOLD = 2
+
 def score_sniper_confluence(deltas, volume_bias=None):
     """
     Multi-timeframe CVD scoring logic with enhanced SHORT detection and volume confluence.
     Returns score (float) and label (str).
     """
     try:
-        tf_weights = {
-            "1m": 1,
-            "3m": 1.5,
-            "5m": 2
-        }
+        tf_weights = TF_WEIGHTS
 
         score = 0
         total_weight = 0
@@ -53,9 +57,9 @@ def score_sniper_confluence(deltas, volume_bias=None):
             final_score = round((cvd_score * blend_ratio) + (vol_score * (1 - blend_ratio)), 2)
 
         # 🧭 Final label
-        if final_score > 2:
+        if final_score > LABEL_THRESHOLD:
             label = "spot_dominant"
-        elif final_score < -2:
+        elif final_score < -LABEL_THRESHOLD:
             label = "perp_dominant"
         else:
             label = "neutral"
@@ -0,0 +1,194 @@
+# scorer_sweep.py (grid / random search over scorer weights and thresholds on a process pool)
+
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import scorer_sniper
+import scorer_swing
+import scorer_reversal
+from scorer_batch import (
+    deltas_from_samples, forward_returns, samples_from_ticks, blend_volume,
+    score_sniper_batch, score_swing_batch, score_reversal_batch
+)
+from utils.spot_perp_alert_dispatcher import MIN_CONFIDENCE
+
+SCORERS = {
+    "sniper": (scorer_sniper, score_sniper_batch, 300),
+    "swing": (scorer_swing, score_swing_batch, 1800),
+    "reversal": (scorer_reversal, score_reversal_batch, 900)
+}
+
+# Search space per parameter; each scorer's own tf_weights keys are swept with WEIGHT_CHOICES.
+# The swing / reversal volume blend is not swept: tick archives carry no volume history, so
+# it could only rescale the CVD score. Those engines are scored as with a volume score of 0.
+WEIGHT_CHOICES = [0.5, 1, 1.5, 2, 2.5, 3]
+THRESHOLD_CHOICES = [1, 1.5, 2, 2.5, 3, 4, 5]
+
+
+# --- Shared-memory plumbing: the parent publishes arrays once, workers map them read-only ---
+def share_arrays(arrays):
+    blocks, spec = [], {}
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+        blocks.append(shm)
+        spec[name] = (shm.name, arr.shape, arr.dtype.str)
+    return blocks, spec
+
+
+_worker_shm = []
+_worker_data = {}
+
+
+def _attach(spec):
+    for name, (shm_name, shape, dtype) in spec.items():
+        # Pool workers share the parent's resource tracker; the parent unlinks when the sweep ends
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _worker_shm.append(shm)
+        _worker_data[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _deltas_view(data):
+    deltas = {}
+    for key, arr in data.items():
+        if key.startswith("d:"):
+            _, tf, col = key.split(":")
+            deltas.setdefault(tf, {})[col] = arr
+    return deltas
+
+
+def _cooldown_alerts(ts, dominant, cooldown):
+    """Indices the engines would alert on: dominant rows spaced at least `cooldown` apart."""
+    candidates = np.flatnonzero(dominant)
+    picked = []
+    i = 0
+    while i < len(candidates):
+        idx = candidates[i]
+        picked.append(idx)
+        i = np.searchsorted(candidates, np.searchsorted(ts, ts[idx] + cooldown, side="right"))
+    return np.array(picked, dtype=np.int64)
+
+
+def evaluate(task):
+    """
+    Scores one parameter set against the shared history and returns one result row.
+    Rows alert by the dispatcher's rule: a dominant label and a signed score >= min_confidence.
+    """
+    scorer, params, horizon, min_confidence = task
+    data = _worker_data
+    deltas = _deltas_view(data)
+    _, batch_fn, cooldown = SCORERS[scorer]
+
+    score, label = batch_fn(deltas, tf_weights=params["tf_weights"], threshold=params["threshold"])
+    if scorer != "sniper":
+        # Engine confidence for swing / reversal: cvd * 0.7 + volume * 0.3, no volume in history
+        score = blend_volume(score, 0.0)
+
+    dominant = (label != 0) & (score >= min_confidence)
+    alerts = _cooldown_alerts(data["ts"], dominant, cooldown)
+
+    returns = data[f"r:{horizon}"][alerts] * label[alerts]
+    returns = returns[~np.isnan(returns)]
+    return {
+        "scorer": scorer,
+        "params": params,
+        "alerts": int(len(alerts)),
+        "hit_rate": float(np.mean(returns > 0) * 100) if len(returns) else 0.0,
+        "expectancy": float(returns.mean()) if len(returns) else 0.0
+    }
+
+
+# --- Parameter spaces ---
+def _param_sets(scorer, mode, samples, seed):
+    module = SCORERS[scorer][0]
+    tfs = list(module.TF_WEIGHTS)
+
+    if mode == "grid":
+        for weights in itertools.product(WEIGHT_CHOICES, repeat=len(tfs)):
+            for threshold in THRESHOLD_CHOICES:
+                yield {"tf_weights": dict(zip(tfs, weights)), "threshold": threshold}
+    else:
+        rng = random.Random(seed)
+        for _ in range(samples):
+            yield {
+                "tf_weights": {tf: rng.choice(WEIGHT_CHOICES) for tf in tfs},
+                "threshold": rng.choice(THRESHOLD_CHOICES)
+            }
+
+
+def run_sweep(arrays, scorers, mode="random", samples=500, horizon=900, min_confidence=MIN_CONFIDENCE,
+              workers=None, seed=0, min_alerts=30):
+    """
+    Result rows ranked by expectancy, then hit rate. Sets with fewer than min_alerts alerts
+    are dropped first: a couple of lucky alerts would otherwise top the table.
+    """
+    blocks, spec = share_arrays(arrays)
+    tasks = [
+        (scorer, params, horizon, min_confidence)
+        for scorer in scorers
+        for params in _param_sets(scorer, mode, samples, seed)
+    ]
+    workers = workers or os.cpu_count()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(spec,)) as pool:
+            results = list(pool.map(evaluate, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    results = [row for row in results if row["alerts"] >= min_alerts]
+    return sorted(results, key=lambda r: (r["expectancy"], r["hit_rate"]), reverse=True)
+
+
+def build_arrays(directory, step=1.0, horizon=900):
+    from feeds.tick_recorder import TickReader
+
+    samples = samples_from_ticks(TickReader(directory), step=step)
+    deltas = deltas_from_samples(samples["ts"], samples["cb_cvd"], samples["bin_spot"], samples["bin_perp"])
+    arrays = {"ts": samples["ts"], f"r:{horizon}": forward_returns(samples["ts"], samples["price"], samples["ts"], [horizon])[horizon]}
+    for tf, cols in deltas.items():
+        for col, arr in cols.items():
+            arrays[f"d:{tf}:{col}"] = arr
+    return arrays
+
+
+def print_table(results, top=20):
+    print(f"\n{'#':>3} {'scorer':<9} {'alerts':>7} {'hit%':>6} {'exp%':>8}  params")
+    for rank, row in enumerate(results[:top], 1):
+        params = row["params"]
+        weights = ",".join(f"{tf}={w}" for tf, w in params["tf_weights"].items())
+        print(f"{rank:>3} {row['scorer']:<9} {row['alerts']:>7} {row['hit_rate']:>6.1f} {row['expectancy']:>+8.4f}  "
+              f"[{weights}] thr={params['threshold']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep scorer weights / thresholds over a tick archive")
+    parser.add_argument("directory", nargs="?", default="ticks")
+    parser.add_argument("--scorers", default="sniper,swing,reversal")
+    parser.add_argument("--mode", choices=["grid", "random"], default="random")
+    parser.add_argument("--samples", type=int, default=500, help="parameter sets per scorer in random mode")
+    parser.add_argument("--horizon", type=float, default=900, help="forward return horizon in seconds")
+    parser.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE, help="signed, as the dispatcher")
+    parser.add_argument("--min-alerts", type=int, default=30, help="drop parameter sets with fewer alerts")
+    parser.add_argument("--step", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    arrays = build_arrays(args.directory, args.step, args.horizon)
+    print(f"📦 {len(arrays['ts'])} samples loaded in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    results = run_sweep(arrays, args.scorers.split(","), args.mode, args.samples, args.horizon,
+                        args.min_confidence, args.workers, min_alerts=args.min_alerts)
+    print(f"⚙️ {len(results)} parameter sets with >= {args.min_alerts} alerts in {time.perf_counter() - started:.1f}s")
+    print_table(results, args.top)
@@ -1,5 +1,14 @@
 # scorer_swing.py (polished + production ready)
 
+TF_WEIGHTS = {
+    "15m": 1,
+    "30m": 1.5,
+    "1h":  2,
+    "4h":  2.5
+}
+
+LABEL_THRESHOLD = 3
+
 def score_swing_confluence(deltas):
     """
     Swing scoring engine: Evaluates higher timeframes for directional bias.
@@ -7,12 +16,7 @@ def score_swing_confluence(deltas):
     Returns: { score: float, label: "spot_dominant" | "perp_dominant" | "neutral" }
     """
     try:
-        tf_weights = {
-            "15m": 1,
-            "30m": 1.5,
-            "1h":  2,
-            "4h":  2.5
-        }
+        tf_weights = TF_WEIGHTS
 
         score = 0
         total_weight = 0
@@ -39,9 +43,9 @@ def score_swing_confluence(deltas):
 
         final_score = round((score / total_weight) * 10, 2) if total_weight else 0
 
-        if final_score > 3:
+        if final_score > LABEL_THRESHOLD:
             label = "spot_dominant"
-        elif final_score < -3:
+        elif final_score < -LABEL_THRESHOLD:
             label = "perp_dominant"
         else:
             label = "neutral"
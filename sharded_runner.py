@@ -0,0 +1,287 @@
+# sharded_runner.py (sniper scoring for many symbols across worker processes, top-N alerts)
+
+import argparse
+import asyncio
+import heapq
+import multiprocessing
+import os
+import queue
+import time
+from dotenv import load_dotenv
+
+from feeds.feed_set import FeedSet
+from feeds.symbols import symbols_from_env
+from scorer_sniper import TF_WEIGHTS, score_sniper_confluence
+from strategy_engine import read_market, stale_venues
+from utils import clock
+from utils.multi_tf_memory import TIMEFRAMES, MultiTFMemory
+from utils.spot_perp_alert_dispatcher import SpotPerpAlertDispatcher
+
+load_dotenv()
+
+DOMINANT = ("spot_dominant", "perp_dominant")
+
+
+def shard(symbols, workers):
+    """Round-robin split, so every worker gets a similar mix of busy and quiet symbols."""
+    return [list(symbols[i::workers]) for i in range(workers) if symbols[i::workers]]
+
+
+class ShardWorker:
+    """
+    Runs inside one worker process: its own multiplexed FeedSet for its shard of
+    symbols, one MultiTFMemory per symbol (only the sniper scorer's timeframes) and
+    the sniper scorer. Every interval it scores each symbol and sends the whole batch
+    to the coordinator as one list of results. Trade listeners only see the shard's first
+    symbol, so only its results carry the newest exchange event time; the others send
+    event_ts None rather than a time that belongs to another symbol.
+    """
+
+    required_venues = ("coinbase", "binance")
+
+    def __init__(self, symbols, interval=5, fast_decode=False, feeds=None):
+        self.symbols = symbols
+        self.interval = interval
+        self.feeds = feeds or FeedSet(symbols=symbols, fast_decode=fast_decode)
+        windows = {tf: TIMEFRAMES[tf] for tf in TF_WEIGHTS}
+        # Slots for the longest window at this cadence, with headroom
+        capacity = 4 * int(max(windows.values()) / interval) + 16
+        self.memories = {symbol: MultiTFMemory(capacity=capacity, windows=windows) for symbol in symbols}
+        # utils/metrics.py's feed listener is not running in worker processes: track the
+        # primary symbol's event time here
+        self.event_ts = None
+        self.observed = self.feeds.symbols[0]
+        for feed in self.feeds.all():
+            feed.add_listener(self._on_trade)
+
+    def _on_trade(self, trade):
+        if trade.exch_ts is not None and (self.event_ts is None or trade.exch_ts > self.event_ts):
+            self.event_ts = trade.exch_ts
+
+    def score(self):
+        results = []
+        for symbol in self.symbols:
+            market = read_market(self.feeds, symbol)
+            price = market["bin_price"] or market["cb_price"] or market["bybit_price"] or market["okx_price"]
+            if not price or stale_venues(market, self.required_venues):
+                continue
+            memory = self.memories[symbol]
+            memory.update(market["cb_cvd"], market["bin_spot"], market["bin_perp"])
+            deltas = memory.get_all_deltas()
+            # Volume bias comes from BTC-only 24h tickers, so the shards score CVD confluence alone
+            scored = score_sniper_confluence(deltas)
+            results.append({
+                "symbol": symbol,
+                "score": scored["score"],
+                "label": scored["label"],
+                "price": price,
+                "deltas": deltas["3m"],
+                "ts": clock.now(),
+                "event_ts": self.event_ts if symbol == self.observed else None
+            })
+        return results
+
+    async def run(self, out):
+        asyncio.create_task(self.feeds.connect())
+        while True:
+            started = time.perf_counter()
+            try:
+                out.put(self.score())
+            except Exception as e:
+                print(f"[ERROR] Shard {self.symbols[0]}.. scoring error: {e}")
+            await clock.sleep(max(0, self.interval - (time.perf_counter() - started)))
+
+
+def _worker_main(symbols, out, interval, fast_decode):
+    asyncio.run(ShardWorker(symbols, interval, fast_decode).run(out))
+
+
+class TopSignals:
+    """
+    The coordinator's view: the latest result per symbol, and top(n) ranks the
+    dominant ones by |score| through a bounded min-heap of n entries (O(symbols * log n)).
+    Results older than max_age (a dead or stuck worker) drop out of the ranking.
+    """
+
+    def __init__(self, top_n=5, max_age=30):
+        self.top_n = top_n
+        self.max_age = max_age
+        self.latest = {}
+
+    def update(self, results):
+        for result in results:
+            self.latest[result["symbol"]] = result
+
+    def top(self, now=None):
+        now = now or clock.now()
+        heap = []
+        for symbol, result in self.latest.items():
+            if result["label"] not in DOMINANT or now - result["ts"] > self.max_age:
+                continue
+            entry = (abs(result["score"]), symbol, result)
+            if len(heap) < self.top_n:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        return [result for _, _, result in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+class ShardedRunner:
+    """
+    Splits symbols across worker processes (one per core by default), each scoring its
+    shard with ShardWorker; throughput grows with the core count because parsing and
+    scoring no longer share one event loop. The coordinator collects every batch into
+    TopSignals and, each interval, sends alerts only for the top_n strongest
+    spot_dominant / perp_dominant setups across all symbols (per-symbol dispatchers keep
+    the usual strength, cooldown and duplicate checks). A worker that dies is restarted.
+    """
+
+    def __init__(self, symbols=None, workers=None, top_n=5, interval=5, fast_decode=None, cooldown_seconds=300):
+        self.symbols = list(symbols or symbols_from_env())
+        self.workers = min(workers or os.cpu_count() or 1, len(self.symbols))
+        self.interval = interval
+        if fast_decode is None:
+            fast_decode = os.getenv("FAST_DECODE", "") == "1"
+        self.fast_decode = fast_decode
+        self.shards = shard(self.symbols, self.workers)
+        self.ranking = TopSignals(top_n, max_age=6 * interval)
+        self.dispatchers = {symbol: SpotPerpAlertDispatcher(cooldown_seconds=cooldown_seconds)
+                            for symbol in self.symbols}
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self.results = self._ctx.Queue()
+        self.processes = [None] * len(self.shards)
+
+    def _start(self, i):
+        process = self._ctx.Process(target=_worker_main, name=f"shard-{i}", daemon=True,
+                                    args=(self.shards[i], self.results, self.interval, self.fast_decode))
+        process.start()
+        self.processes[i] = process
+
+    def start(self):
+        for i in range(len(self.shards)):
+            self._start(i)
+        print(f"[✓] {len(self.symbols)} symbols across {len(self.shards)} worker processes")
+
+    def stop(self):
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+
+    def drain(self, timeout=0):
+        """Moves every queued batch into the ranking; waits up to timeout for the first."""
+        try:
+            self.ranking.update(self.results.get(timeout=timeout) if timeout else self.results.get_nowait())
+            while True:
+                self.ranking.update(self.results.get_nowait())
+        except queue.Empty:
+            pass
+
+    async def dispatch(self):
+        top = self.ranking.top()
+        for rank, result in enumerate(top, 1):
+            symbol, score, label = result["symbol"], result["score"], result["label"]
+            side = "SPOT" if label == "spot_dominant" else "PERP"
+            signal_text = (
+                f"Brucy Bonus💥 {symbol} {side} SIGNAL | Confidence {score}/10 → {label} | "
+                f"Rank {rank}/{len(top)} of {len(self.symbols)} symbols"
+            )
+            # The sniper score is signed (perp_dominant is negative), so both sides are checked
+            await self.dispatchers[symbol].maybe_alert(
+                signal_text, score, label, result["deltas"], event_ts=result["event_ts"], two_sided=True
+            )
+
+    async def run(self):
+        self.start()
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                deadline = time.monotonic() + self.interval
+                while (remaining := deadline - time.monotonic()) > 0:
+                    await loop.run_in_executor(None, self.drain, min(remaining, 1.0))
+                for i, process in enumerate(self.processes):
+                    if not process.is_alive():
+                        print(f"[X] Shard {i} exited ({process.exitcode}), restarting")
+                        self._start(i)
+                try:
+                    await self.dispatch()
+                except Exception as e:
+                    print(f"[ERROR] Sharded dispatch error: {e}")
+        finally:
+            self.stop()
+
+
+# --- Benchmark: synthetic messages through the shard workers, no sockets ---
+def _bench_worker(symbols, count, out):
+    from feeds.bench_decode import build_messages
+
+    worker = ShardWorker(symbols, fast_decode=True)
+    feeds = worker.feeds
+    handlers = {"coinbase": feeds.coinbase._process, "binance_spot": feeds.binance._process_spot,
+                "binance_perp": feeds.binance._process_perp, "bybit": feeds.bybit._process, "okx": feeds.okx._process}
+    batches = []
+    for symbol in symbols:
+        for venue, msgs in build_messages(count).items():
+            instrument = {"coinbase": f"{symbol}-USD", "okx": f"{symbol}-USDT-SWAP"}.get(venue, f"{symbol}USDT")
+            default = {"coinbase": "BTC-USD", "okx": "BTC-USDT-SWAP"}.get(venue, "BTCUSDT")
+            batches.append((handlers[venue], [msg.replace(default, instrument) for msg in msgs]))
+
+    started = time.perf_counter()
+    messages = 0
+    for n, (handler, msgs) in enumerate(batches, 1):
+        for msg in msgs:
+            handler(msg)
+        messages += len(msgs)
+        if n % 5 == 0:
+            worker.score()
+    out.put((messages, time.perf_counter() - started))
+
+
+def bench(symbols, worker_counts, count):
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for workers in worker_counts:
+        out = ctx.Queue()
+        processes = [ctx.Process(target=_bench_worker, args=(part, count, out)) for part in shard(symbols, workers)]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        done = [out.get() for _ in processes]
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            process.join()
+        messages = sum(m for m, _ in done)
+        rows.append((len(processes), messages, elapsed, messages / max(seconds for _, seconds in done)))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded multi-symbol sniper runner")
+    parser.add_argument("--symbols", help="comma-separated base assets (default FEED_SYMBOLS)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--top", type=int, default=5, help="alert on the N strongest setups")
+    parser.add_argument("--interval", type=float, default=5, help="scoring interval in seconds")
+    parser.add_argument("--bench", action="store_true", help="measure parse + score throughput per worker count")
+    parser.add_argument("--count", type=int, default=5000, help="bench: messages per symbol per stream")
+    args = parser.parse_args()
+
+    from feeds.symbols import parse_symbols
+    symbols = list(parse_symbols(args.symbols) if args.symbols else symbols_from_env())
+
+    if args.bench:
+        cores = os.cpu_count() or 1
+        # More workers than cores only time-slice, which says nothing about scaling
+        max_workers = min(args.workers or cores, cores)
+        if args.workers and args.workers > cores:
+            print(f"⚠️ --workers {args.workers} capped at {cores} cores")
+        counts = sorted({1, *(2 ** k for k in range(8) if 2 ** k <= max_workers), max_workers})
+        print(f"⚙️ {len(symbols)} symbols x 5 streams x {args.count} messages, {cores} cores")
+        print(f"\n{'workers':>7} {'messages':>10} {'wall s':>8} {'msg/s':>12} {'per core':>9}")
+        single = None
+        for workers, messages, elapsed, rate in bench(symbols, counts, args.count):
+            single = single or rate
+            # Per-core efficiency: 100% is perfect scaling from the single-worker rate
+            print(f"{workers:>7} {messages:>10,} {elapsed:>8.2f} {rate:>12,.0f} {rate / (workers * single):>8.0%}")
+    else:
+        runner = ShardedRunner(symbols, workers=args.workers, top_n=args.top, interval=args.interval)
+        asyncio.run(runner.run())
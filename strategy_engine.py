@@ -0,0 +1,208 @@
+# strategy_engine.py (shared monitor loop for the sniper / swing / reversal engines)
+
+import asyncio
+import os
+import time
+
+from feeds.feed_set import FeedSet
+from utils import clock, metrics
+from utils.multi_tf_memory import MultiTFMemory
+from utils.signal_trigger import SignalTrigger
+from utils.spot_perp_alert_dispatcher import SpotPerpAlertDispatcher
+from utils.global_volume_fetcher import get_cached_volume, volume_cache
+from utils.sniper_alert_logger import log_sniper_alert
+from utils.horizon_resolver import get_resolver
+from utils.gpt_commentary import commentary_worker
+from utils.discord_alert import close_discord
+from utils.trap_journal import log_trap_signal
+
+# Spot price sources in order of preference
+PRICE_KEYS = (("binance", "bin_price"), ("coinbase", "cb_price"), ("bybit", "bybit_price"), ("okx", "okx_price"))
+
+
+def read_market(feeds, symbol=None):
+    """
+    Reads the current CVD and price values off a FeedSet into one flat dict, for one
+    of its symbols (None: the primary symbol).
+    "healthy" carries each venue's feed health flag (see feeds/feed_supervisor.py).
+    """
+    bin_data = feeds.binance.get_cvd(symbol)
+    return {
+        "cb_cvd": feeds.coinbase.get_cvd(symbol),
+        "cb_price": feeds.coinbase.get_last_price(symbol),
+        "bin_spot": bin_data["spot"],
+        "bin_perp": bin_data["perp"],
+        "bin_price": bin_data["price"],
+        "bybit_cvd": feeds.bybit.get_cvd(symbol),
+        "bybit_price": feeds.bybit.get_price(symbol),
+        "okx_cvd": feeds.okx.get_cvd(symbol),
+        "okx_price": feeds.okx.get_price(symbol),
+        "event_ts": metrics.last_event_ts(),  # newest exchange event time, for signal age metrics
+        "healthy": {
+            "coinbase": feeds.coinbase.is_healthy(),
+            "binance": feeds.binance.is_healthy(),
+            "bybit": feeds.bybit.is_healthy(),
+            "okx": feeds.okx.is_healthy()
+        }
+    }
+
+
+def stale_venues(market, venues):
+    healthy = market.get("healthy", {})
+    return [venue for venue in venues if not healthy.get(venue, True)]
+
+
+class StrategyEngine:
+    """
+    Base class for the strategy engines.
+    Subclasses set name / interval / cooldown_seconds and implement evaluate(market),
+    which scores one snapshot and sends any alert. The same evaluate() is driven either
+    by this class's own monitor() loop or by multi_strategy_runner.py.
+
+    With event_driven (or EVENT_TRIGGER=1) monitor() waits on a SignalTrigger instead of
+    sleeping a fixed interval: it runs when any venue's CVD moves trigger_cvd, when a
+    micro-bar closes (if the feeds build bars), and at the latest every interval seconds.
+
+    Cycle stage timings go to utils/metrics.py; with METRICS_PORT set, run() also serves
+    them (with per-venue feed latency and alert delivery latency) on /metrics.
+    """
+
+    name = "Strategy"
+    log_tag = "STRATEGY"
+    interval = 5
+    cooldown_seconds = 900
+    memory_file = None  # mmap file that keeps MultiTFMemory warm across restarts
+    trigger_cvd = 25.0  # base-qty CVD move on one venue that wakes an event-driven monitor()
+    trigger_debounce = 1.0
+    # Venues whose CVD the engine scores; a cycle is skipped while any of them is stale
+    required_venues = ("coinbase", "binance")
+    # Venues pick_price() may price alerts off, in PRICE_KEYS order
+    price_venues = ("binance", "coinbase", "bybit", "okx")
+
+    def __init__(self, feeds=None, memory=None, event_driven=None):
+        self.feeds = feeds or FeedSet.from_env()
+        self.coinbase = self.feeds.coinbase
+        self.binance = self.feeds.binance
+        self.bybit = self.feeds.bybit
+        self.okx = self.feeds.okx
+
+        self.memory = memory if memory is not None else MultiTFMemory(path=self.memory_file)
+        self.alert_dispatcher = SpotPerpAlertDispatcher(cooldown_seconds=self.cooldown_seconds)
+
+        self.last_signal_time = 0
+        self.last_signal_hash = ""
+
+        # Output hooks; replay_driver.py swaps these for in-memory capture
+        self.alert_logger = log_sniper_alert
+        self.trap_logger = self.log_trap
+        self.fetch_volume = get_cached_volume
+
+        if event_driven is None:
+            event_driven = os.getenv("EVENT_TRIGGER", "") == "1"
+        self.trigger = None
+        if event_driven:
+            self.trigger = SignalTrigger(
+                self.feeds,
+                cvd_threshold=self.trigger_cvd,
+                on_bar_close=any(feed.bars is not None for feed in self.feeds.all()),
+                max_interval=self.interval,
+                debounce=self.trigger_debounce
+            ).attach()
+
+    async def run(self):
+        # Attached before the feeds connect, so a hub client asks for trades in its handshake;
+        # also resumes horizon tracking of traps left open by the last run
+        get_resolver(self.feeds)
+        await metrics.start(self.feeds)
+        try:
+            await asyncio.gather(
+                self.feeds.connect(),
+                self.start_monitor()
+            )
+        finally:
+            # Commentary still in flight is delivered (each request is bounded by its timeout)
+            await commentary_worker.drain()
+            await close_discord()
+            await volume_cache.close()
+
+    async def start_monitor(self):
+        # The first cycle scores with volume bias: wait for the first fetch while the feeds connect
+        await volume_cache.prime()
+        await self.monitor()
+
+    def pick_price(self, market):
+        """First price from a healthy venue in price_venues, else the first of their prices at all."""
+        healthy = market.get("healthy", {})
+        keys = [(venue, key) for venue, key in PRICE_KEYS if venue in self.price_venues]
+        for venue, key in keys:
+            if market[key] and healthy.get(venue, True):
+                return market[key]
+        return next((market[key] for _, key in keys if market[key]), None)
+
+    def check_feeds(self, market):
+        stale = stale_venues(market, self.required_venues)
+        if stale:
+            print(f"[{self.log_tag}] Skipping cycle, stale feeds: {', '.join(stale)}")
+        return not stale
+
+    async def monitor(self):
+        while True:
+            try:
+                market = read_market(self.feeds)
+
+                if not self.pick_price(market):
+                    print(f"[{self.log_tag} ERROR] No valid spot price found, skipping...")
+                    await self.wait()
+                    continue
+                if not self.check_feeds(market):
+                    await self.wait()
+                    continue
+
+                started = time.perf_counter()
+                self.memory.update(market["cb_cvd"], market["bin_spot"], market["bin_perp"])
+                market["deltas"] = self.memory.get_all_deltas()
+                metrics.engine_stage.observe(time.perf_counter() - started, self.name, "memory")
+                market["volume_data"] = self.fetch_volume()
+
+                await self.timed_evaluate(market)
+
+            except Exception as e:
+                print(f"[ERROR] {self.name} Engine Error: {e}")
+
+            await self.wait()
+
+    def log_trap(self, snapshot):
+        """Journals the trap, then hands it to the horizon resolver for its outcome."""
+        log_trap_signal(snapshot)
+        if "uuid" in snapshot:
+            get_resolver(self.feeds).track(
+                snapshot["uuid"], snapshot["price"], snapshot.get("direction"), snapshot["timestamp"]
+            )
+
+    async def wait(self):
+        if self.trigger is None:
+            await clock.sleep(self.interval)
+        else:
+            await self.trigger.wait()
+
+    async def step(self, market):
+        """
+        Runs evaluate() on a shared snapshot (used by the multi-strategy runner).
+        """
+        if not self.pick_price(market):
+            print(f"[{self.log_tag} ERROR] No valid spot price found, skipping...")
+            return
+        if not self.check_feeds(market):
+            return
+        try:
+            await self.timed_evaluate(market)
+        except Exception as e:
+            print(f"[ERROR] {self.name} Engine Error: {e}")
+
+    async def timed_evaluate(self, market):
+        started = time.perf_counter()
+        await self.evaluate(market)
+        metrics.engine_stage.observe(time.perf_counter() - started, self.name, "evaluate")
+
+    async def evaluate(self, market):
+        raise NotImplementedError
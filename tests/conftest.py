@@ -0,0 +1,59 @@
+# tests/conftest.py (shared fixtures: local HTTP stubs for the remote services)
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def serve_app():
+    """
+    Serves aiohttp web.Applications on 127.0.0.1 from an event loop on its own thread,
+    so both blocking clients (requests) and the code under test's own loop can reach
+    them. serve_app(app) returns the base URL; everything stops with the test.
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="http-stub", daemon=True)
+    thread.start()
+    runners = []
+
+    async def start(app):
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        runners.append(runner)
+        return runner.addresses[0][1]
+
+    def serve(app):
+        port = asyncio.run_coroutine_threadsafe(start(app), loop).result(10)
+        return f"http://127.0.0.1:{port}"
+
+    yield serve
+    for runner in runners:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result(10)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(10)
+    loop.close()
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.02)
+
+
+async def async_wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        await asyncio.sleep(0.02)
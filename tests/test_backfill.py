@@ -0,0 +1,224 @@
+# tests/test_backfill.py
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from aiohttp import web
+
+from feeds import backfill
+from feeds.binance_feed import BinanceCVDTracker
+from feeds.bybit_feed import BybitCVDTracker
+from feeds.coinbase_feed import CoinbaseSpotCVD
+from feeds.okx_feed import OKXCVDTracker
+
+SYMBOLS = ("BTC", "ETH")
+
+
+# --- One synthetic history: trade n has id n, time n ms, alternating sides ---
+def _trade(n):
+    return n, str(100000 + n), f"{0.001 * (1 + n % 7):.3f}", n % 2 == 0, n  # id, price, qty, buyer maker, ms
+
+
+def _net(ids):
+    return sum(float(q) * (-1 if maker else 1) for _, _, q, maker, _ in map(_trade, ids))
+
+
+def history_stub(latest):
+    """
+    Stand-in for the venues' REST trade history (backfill.REST), serving trades 1..latest for
+    every instrument; the Bybit list is the last 1000 and klines hold 60000 trades each.
+    """
+    async def binance(request):
+        start = int(request.query["fromId"])
+        stop = min(latest + 1, start + int(request.query.get("limit", 500)))
+        return web.json_response([{"id": n, "price": p, "qty": q, "time": t, "isBuyerMaker": m}
+                                  for n, p, q, m, t in map(_trade, range(start, stop))])
+
+    async def binance_agg(request):
+        # One aggregate per trade, so aggregate ids match trade ids
+        start = int(request.query["fromId"])
+        stop = min(latest + 1, start + int(request.query.get("limit", 500)))
+        return web.json_response([{"a": n, "p": p, "q": q, "f": n, "l": n, "T": t, "m": m}
+                                  for n, p, q, m, t in map(_trade, range(start, stop))])
+
+    async def binance_klines(request):
+        start, end = int(request.query["startTime"]), int(request.query["endTime"])
+        rows = []
+        for open_ms in range(start - start % 60000, min(end, latest) + 1, 60000):
+            trades = [_trade(n) for n in range(max(1, open_ms), min(latest, open_ms + 59999) + 1)]
+            volume = sum(float(q) for _, _, q, _, _ in trades)
+            taker_buy = sum(float(q) for _, _, q, m, _ in trades if not m)
+            rows.append([open_ms, "0", "0", "0", trades[-1][1] if trades else "0", f"{volume:.3f}",
+                         open_ms + 59999, "0", len(trades), f"{taker_buy:.3f}", "0", "0"])
+        return web.json_response(rows)
+
+    def before(request, limit):
+        after = int(request.query.get("after", latest + 1))
+        return range(after - 1, max(0, after - 1 - min(limit, int(request.query.get("limit", limit)))), -1)
+
+    async def coinbase(request):
+        return web.json_response([{"trade_id": n, "price": p, "size": q, "side": "sell" if m else "buy",
+                                   "time": _iso(t)} for n, p, q, m, t in map(_trade, before(request, 1000))])
+
+    async def okx(request):
+        return web.json_response({"code": "0", "data": [
+            {"tradeId": str(n), "px": p, "sz": q, "side": "sell" if m else "buy", "ts": str(t)}
+            for n, p, q, m, t in map(_trade, before(request, 100))]})
+
+    async def bybit(request):
+        return web.json_response({"retCode": 0, "result": {"list": [
+            {"execId": f"stub-{n}", "price": p, "size": q, "side": "Sell" if m else "Buy", "time": str(t)}
+            for n, p, q, m, t in map(_trade, range(latest, max(0, latest - 1000), -1))]}})
+
+    app = web.Application()
+    app.router.add_get("/api/v3/historicalTrades", binance)
+    app.router.add_get("/fapi/v1/historicalTrades", binance)
+    app.router.add_get("/api/v3/aggTrades", binance_agg)
+    app.router.add_get("/fapi/v1/aggTrades", binance_agg)
+    app.router.add_get("/api/v3/klines", binance_klines)
+    app.router.add_get("/fapi/v1/klines", binance_klines)
+    app.router.add_get("/products/{product}/trades", coinbase)
+    app.router.add_get("/api/v5/market/history-trades", okx)
+    app.router.add_get("/v5/market/recent-trade", bybit)
+    return app
+
+
+def _iso(ms):
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+# --- The same trades as live websocket messages ---
+def _binance_msg(n):
+    _, p, q, m, t = _trade(n)
+    return json.dumps({"e": "trade", "s": "BTCUSDT", "t": n, "p": p, "q": q, "T": t, "m": m})
+
+
+def _binance_agg_msg(n):
+    _, p, q, m, t = _trade(n)
+    return json.dumps({"stream": "btcusdt@aggTrade", "data": {"e": "aggTrade", "E": t, "s": "BTCUSDT", "a": n,
+                                                               "p": p, "q": q, "f": n, "l": n, "T": t, "m": m}})
+
+
+def _binance_kline_msg(open_ms, upto):
+    trades = [_trade(n) for n in range(max(1, open_ms), upto + 1)]
+    volume = sum(float(q) for _, _, q, _, _ in trades)
+    taker_buy = sum(float(q) for _, _, q, m, _ in trades if not m)
+    return json.dumps({"stream": "btcusdt@kline_1m", "data": {"e": "kline", "E": upto, "s": "BTCUSDT", "k": {
+        "t": open_ms, "T": open_ms + 59999, "s": "BTCUSDT", "i": "1m", "c": str(100000 + upto),
+        "v": f"{volume:.3f}", "V": f"{taker_buy:.3f}", "x": False}}})
+
+
+def _coinbase_msg(n):
+    _, p, q, m, t = _trade(n)
+    return json.dumps({"type": "match", "trade_id": n, "side": "sell" if m else "buy", "size": q, "price": p,
+                       "product_id": "BTC-USD", "time": _iso(t)})
+
+
+def _okx_msg(n):
+    _, p, q, m, t = _trade(n)
+    return json.dumps({"arg": {}, "data": [{"instId": "BTC-USDT-SWAP", "tradeId": str(n), "px": p, "sz": q,
+                                            "side": "sell" if m else "buy", "ts": str(t)}]})
+
+
+def _bybit_msg(n):
+    _, p, q, m, t = _trade(n)
+    return json.dumps({"topic": "publicTrade.BTCUSDT", "data": [{"s": "BTCUSDT", "i": f"x{n}", "p": p, "v": q,
+                                                                 "S": "Sell" if m else "Buy", "T": t}]})
+
+
+def _binance_spot(fast):
+    feed = BinanceCVDTracker(fast, SYMBOLS)
+    return feed, feed._process_spot, feed.last_spot_ids, feed._apply_spot, lambda: feed.spot_cvds[0]
+
+
+def _binance_agg(fast):
+    feed = BinanceCVDTracker(fast, SYMBOLS, granularity="aggTrade")
+    return feed, feed._process_spot, feed.last_spot_ids, feed._apply_spot, lambda: feed.spot_cvds[0]
+
+
+def _binance_kline(fast):
+    feed = BinanceCVDTracker(fast, SYMBOLS, granularity="kline")
+    return feed, feed._process_spot, feed.last_spot_ids, feed._apply_spot_kline, lambda: feed.spot_cvds[0]
+
+
+def _coinbase(fast):
+    feed = CoinbaseSpotCVD(fast, SYMBOLS)
+    return feed, feed._process, feed.last_trade_ids, feed._apply, lambda: feed.cvds[0]
+
+
+def _okx(fast):
+    feed = OKXCVDTracker(fast, SYMBOLS)
+    return feed, feed._process, feed.last_trade_ids, feed._apply, lambda: feed.cvds[0]
+
+
+def _bybit(fast):
+    feed = BybitCVDTracker(fast, SYMBOLS)
+    return feed, feed._process, feed.last_trade_ms, feed._apply, lambda: feed.cvds[0]
+
+
+LATEST = 5000
+# The stream drops after trade 50 and reconnects at trade 4700
+BEFORE, AFTER = range(1, 51), range(4700, LATEST + 1)
+# stream: (feed factory, message builder, trades the CVD ends up holding)
+CASES = {
+    "binance_spot": (_binance_spot, _binance_msg, range(1, LATEST + 1)),
+    "binance_spot@aggTrade": (_binance_agg, _binance_agg_msg, range(1, LATEST + 1)),
+    "coinbase": (_coinbase, _coinbase_msg, range(1, LATEST + 1)),
+    "okx": (_okx, _okx_msg, range(1, LATEST + 1)),
+    # Bybit only has the last 1000 trades to recover from
+    "bybit": (_bybit, _bybit_msg, [*BEFORE, *range(LATEST - 999, LATEST + 1)]),
+}
+
+
+@pytest.fixture
+def history(serve_app, monkeypatch):
+    def serve(latest):
+        monkeypatch.setattr(backfill, "BACKFILL_BASE_URL", serve_app(history_stub(latest)))
+
+    return serve
+
+
+def _reconnect(stream, factory, before, after, fast):
+    feed, process, last_keys, apply, cvd = factory(fast)
+    for msg in before:
+        process(msg)
+    filler = backfill.GapFiller(stream, process, last_keys, feed._ids, apply)
+
+    async def run():
+        handle = filler.on_connect()
+        for msg in after:
+            handle(msg)
+        while filler._tasks:
+            await asyncio.gather(*list(filler._tasks.values()))
+
+    asyncio.run(run())
+    return filler, cvd()
+
+
+@pytest.mark.parametrize("fast", [False, True], ids=["json", "fast_decode"])
+@pytest.mark.parametrize("stream", CASES)
+def test_gap_is_backfilled(history, stream, fast):
+    factory, build, expected = CASES[stream]
+    history(LATEST)
+    filler, cvd = _reconnect(stream, factory, map(build, BEFORE), map(build, AFTER), fast)
+    assert filler.failed == 0 and filler.backfilled > 0
+    assert cvd == pytest.approx(_net(expected))
+
+
+def test_kline_gap_is_backfilled(history):
+    latest = 200000
+    history(latest)
+    before = [_binance_kline_msg(0, 30), _binance_kline_msg(0, 50)]
+    after = [_binance_kline_msg(180000, 190000), _binance_kline_msg(180000, latest)]
+    filler, cvd = _reconnect("binance_spot@kline", _binance_kline, before, after, True)
+    assert filler.failed == 0
+    assert cvd == pytest.approx(_net(range(1, latest + 1)))
+
+
+def test_unreachable_history_reports_the_gap(monkeypatch):
+    monkeypatch.setattr(backfill, "BACKFILL_BASE_URL", "http://127.0.0.1:9")
+    filler, cvd = _reconnect("binance_spot", _binance_spot, map(_binance_msg, BEFORE), map(_binance_msg, AFTER), False)
+    assert (filler.failed, filler.backfilled) == (1, 0)
+    assert cvd == pytest.approx(_net([*BEFORE, *AFTER]))  # the buffered trades still count
@@ -0,0 +1,82 @@
+# tests/test_gpt_commentary.py
+
+import asyncio
+import types
+
+import pytest
+from aiohttp import web
+
+from utils.commentary_cache import CommentaryCache
+from utils.gpt_commentary import CommentaryWorker
+
+SNAPSHOT = {"direction": "🟢 LONG", "label": "spot_dominant", "confidence": 7, "mode": "sniper",
+            "cb_cvd": 1.0, "bin_spot": 2.0, "bin_perp": 0.5}
+
+
+def model_stub():
+    """OpenAI-compatible chat endpoint that answers after state.delay seconds and counts requests."""
+    state = types.SimpleNamespace(delay=0.0, requests=0)
+
+    async def completions(request):
+        body = await request.json()
+        state.requests += 1
+        await asyncio.sleep(state.delay)
+        return web.json_response({
+            "id": "stub", "object": "chat.completion", "created": 0, "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"stub commentary {state.requests}"}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    return app, state
+
+
+@pytest.fixture
+def stub(serve_app, tmp_path):
+    app, state = model_stub()
+    worker = CommentaryWorker(api_key="stub-key", base_url=serve_app(app) + "/v1", timeout=1,
+                              cache=CommentaryCache(path=str(tmp_path / "cache.json")))
+    return worker, state
+
+
+def test_submit_delivers_and_caches(stub):
+    worker, state = stub
+    received = []
+
+    async def run():
+        worker.submit(SNAPSHOT, received.append)
+        await worker.drain()
+        worker.submit(dict(SNAPSHOT), received.append)  # same features: served from the cache
+        await worker.drain()
+
+    asyncio.run(run())
+    assert received == ["stub commentary 1", "stub commentary 1"]
+    assert (state.requests, worker.completed, worker.cache.hits) == (1, 1, 1)
+
+
+def test_concurrent_requests_for_one_key_share_a_call(stub):
+    worker, state = stub
+    state.delay = 0.2
+
+    async def run():
+        return await asyncio.gather(*(worker.comment(dict(SNAPSHOT)) for _ in range(3)))
+
+    assert asyncio.run(run()) == ["stub commentary 1"] * 3
+    assert state.requests == 1
+
+
+def test_slow_model_times_out_without_delivering(stub):
+    worker, state = stub
+    worker.timeout = 0.2
+    state.delay = 1.0
+    received = []
+
+    async def run():
+        worker.submit(SNAPSHOT, received.append)
+        await worker.drain()
+
+    asyncio.run(run())
+    assert not received
+    assert (worker.timed_out, worker.completed) == (1, 0)
@@ -0,0 +1,67 @@
+# tests/test_horizon_resolver.py
+
+import asyncio
+import time
+
+from conftest import async_wait_until
+from feeds.feed_set import FeedSet
+from feeds.market_hub import MarketDataHub
+from strategy_engine import StrategyEngine
+from utils import horizon_resolver, trap_journal
+from utils.horizon_resolver import HORIZONS
+from utils.trap_journal import get_journal
+
+
+async def _hub_scenario(socket_path):
+    hub = MarketDataHub(socket_path=socket_path)  # feeds never connect: trades are emitted below
+    server = await asyncio.start_unix_server(hub._handle_client, path=socket_path)
+
+    engine = StrategyEngine(feeds=FeedSet(hub_socket=socket_path))
+    engine.start_monitor = asyncio.Event().wait  # feeds and resolver only
+    tasks = [asyncio.create_task(engine.run())]
+    try:
+        await async_wait_until(lambda: any(hub.clients.values()))
+
+        engine.log_trap({"signal": "hub check", "label": "spot_dominant", "price": 100.0, "direction": "LONG"})
+        start = time.time()
+        for offset, price in ((1, 101.0), (2, 99.0), (HORIZONS["4h"] + 1, 102.0)):
+            hub.binance.recv_ts = start + offset
+            hub.binance._emit_trade("binance_spot", price, 0.1, 1)
+        await async_wait_until(lambda: not get_journal().open)
+        trap = get_journal().read()[-1]
+
+        late = FeedSet(hub_socket=socket_path)
+        tasks.append(asyncio.create_task(late.connect()))
+        await async_wait_until(lambda: len(hub.clients) == 2)
+        trades = []
+        late.binance.add_listener(trades.append)
+        await async_wait_until(lambda: all(hub.clients.values()))
+        hub.binance._emit_trade("binance_spot", 103.0, 0.1, 1)
+        await async_wait_until(lambda: trades)
+        return trap, trades
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for writer in list(hub.clients):
+            hub._drop(writer)
+        await asyncio.sleep(0.1)  # let the hub's client handlers see the close
+        server.close()
+        await server.wait_closed()
+
+
+def test_hub_engine_resolves_trap_and_late_listener_gets_trades(tmp_path, monkeypatch):
+    """
+    A trap logged by an engine attached to the market hub, started with no open traps,
+    resolves at every horizon from hub-forwarded trades; a hub client that adds its
+    first trade listener after connect gets trades too.
+    """
+    monkeypatch.chdir(tmp_path)  # the trap journal lives in the working directory
+    monkeypatch.setattr(horizon_resolver, "_resolver", None)
+    monkeypatch.setattr(trap_journal, "_journal", None)
+
+    trap, trades = asyncio.run(_hub_scenario(str(tmp_path / "hub.sock")))
+
+    assert set(trap["horizons"]) == set(HORIZONS)
+    assert (trap["exit_price"], trap["outcome"], trap["mfe_pct"], trap["mae_pct"]) == (102.0, "win", 2.0, -1.0)
+    assert trades[0].price == 103.0
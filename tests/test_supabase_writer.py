@@ -0,0 +1,92 @@
+# tests/test_supabase_writer.py
+
+import types
+
+import pytest
+from aiohttp import web
+
+from conftest import wait_until
+from utils.storage import SCHEMA
+from utils.supabase_writer import SupabaseWriter
+
+
+def supabase_stub():
+    """
+    PostgREST stand-in: bulk inserts into the utils/storage.py tables are kept in
+    state.rows, any other table answers 404, a batch holding a row with "bad" set
+    answers 400, 503 while state.down is set, and the next state.rate_limited requests 429.
+    """
+    state = types.SimpleNamespace(rows={}, down=False, rate_limited=0)
+
+    async def insert(request):
+        table = request.match_info["table"]
+        if state.down:
+            return web.json_response({"message": "stub down"}, status=503)
+        if state.rate_limited > 0:
+            state.rate_limited -= 1
+            return web.json_response({"message": "rate limited"}, status=429, headers={"Retry-After": "0"})
+        if table not in SCHEMA:
+            return web.json_response({"message": "relation does not exist"}, status=404)
+        rows = await request.json()
+        if any(row.get("bad") for row in rows):
+            return web.json_response({"message": "invalid input syntax"}, status=400)
+        state.rows.setdefault(table, []).extend(rows)
+        return web.Response(status=201)
+
+    app = web.Application()
+    app.router.add_post("/rest/v1/{table}", insert)
+    return app, state
+
+
+@pytest.fixture
+def stub(serve_app, tmp_path):
+    app, state = supabase_stub()
+    writer = SupabaseWriter(serve_app(app), "stub-key", spool_path=str(tmp_path / "spool.jsonl"),
+                            flush_seconds=0.1, max_retries=1, backoff=0.01, probe_seconds=0.2)
+    yield writer, state
+    writer.close()
+
+
+def test_outage_spools_and_drains(stub):
+    writer, state = stub
+    state.down = True
+    for n in range(4):
+        writer.enqueue("sniper_alerts", {"n": n})
+    writer.enqueue("no_such_table", {"n": 4})
+    wait_until(lambda: writer.spooled == 5)
+    assert not state.rows and writer._has_spool()
+
+    state.down = False
+    wait_until(lambda: not writer._has_spool())
+    assert state.rows == {"sniper_alerts": [{"n": n} for n in range(4)]}
+    assert (writer.sent, writer.dropped) == (4, 1)
+
+
+def test_rejected_table_is_dropped(stub):
+    writer, state = stub
+    writer.enqueue("sniper_alerts", {"n": 0})
+    writer.enqueue("no_such_table", {"n": 1})
+    wait_until(lambda: writer.sent + writer.dropped == 2)
+    assert (writer.sent, writer.dropped, writer.spooled) == (1, 1, 0)
+
+
+def test_bad_row_costs_only_itself(stub):
+    writer, state = stub
+    for n in range(10):
+        writer.enqueue("cvd_snapshots", {"n": n, "bad": n == 6})
+    wait_until(lambda: writer.sent + writer.dropped == 10)
+    assert [row["n"] for row in state.rows["cvd_snapshots"]] == [0, 1, 2, 3, 4, 5, 7, 8, 9]
+    assert (writer.sent, writer.dropped) == (9, 1)
+
+
+def test_rate_limited_batch_is_spooled_not_dropped(stub):
+    writer, state = stub
+    state.rate_limited = 1000
+    writer.enqueue("Traps", {"uuid": "t1"})
+    wait_until(lambda: writer.spooled == 1)
+    assert writer.dropped == 0
+
+    state.rate_limited = 0
+    wait_until(lambda: not writer._has_spool())
+    assert state.rows["Traps"] == [{"uuid": "t1"}]
+    assert (writer.sent, writer.dropped) == (1, 0)
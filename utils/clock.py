@@ -0,0 +1,87 @@
+# utils/clock.py (swappable time source so recorded data can be replayed through live code)
+
+import asyncio
+import heapq
+import time
+
+
+class SystemClock:
+    def now(self):
+        return time.time()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Clock driven by replay_driver.py. Time only moves when advance() is called;
+    sleepers are woken in deadline order as the replayed data passes their wake time.
+    """
+
+    def __init__(self, start=0.0):
+        self._now = start
+        self._sleepers = []  # heap of (wake_ts, seq, future)
+        self._seq = 0
+
+    def now(self):
+        return self._now
+
+    async def sleep(self, seconds):
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        entry = (self._now + max(seconds, 0), self._seq, future)
+        heapq.heappush(self._sleepers, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            # A cancelled sleeper must not hold a slot that settle() / advance() count on
+            if entry in self._sleepers:
+                self._sleepers.remove(entry)
+                heapq.heapify(self._sleepers)
+            raise
+
+    @property
+    def sleepers(self):
+        return len(self._sleepers)
+
+    async def settle(self, count, rounds=1000):
+        """Yields to the event loop until at least count tasks are asleep on this clock."""
+        for _ in range(rounds):
+            if len(self._sleepers) >= count:
+                return
+            await asyncio.sleep(0)
+
+    async def advance(self, ts):
+        """
+        Moves time forward to ts. Every sleeper due on the way is woken at its own
+        wake time and allowed to run until it sleeps again before time moves on.
+        """
+        while self._sleepers and self._sleepers[0][0] <= ts:
+            wake_ts, _, future = heapq.heappop(self._sleepers)
+            if future.done():
+                continue
+            self._now = max(self._now, wake_ts)
+            future.set_result(None)
+            await self.settle(len(self._sleepers) + 1)
+        self._now = max(self._now, ts)
+
+
+_clock = SystemClock()
+
+
+def now():
+    return _clock.now()
+
+
+async def sleep(seconds):
+    await _clock.sleep(seconds)
+
+
+def set_clock(clock):
+    global _clock
+    _clock = clock
+
+
+def get_clock():
+    return _clock
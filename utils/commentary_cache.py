@@ -0,0 +1,114 @@
+# utils/commentary_cache.py (GPT commentary reused across signals of the same shape)
+
+import bisect
+import json
+import os
+from collections import OrderedDict
+
+from utils import clock
+
+GPT_CACHE_FILE = os.getenv("GPT_CACHE_FILE", "commentary_cache.json")
+GPT_CACHE_TTL = float(os.getenv("GPT_CACHE_TTL", str(6 * 60 * 60)))
+
+# |CVD Δ %| bucket edges; a delta's bucket is its sign times the number of edges it reaches
+DELTA_BUCKETS = (0.5, 2, 5, 15, 50)
+CONFIDENCE_BUCKET = 2  # confidence points per bucket
+DELTA_KEYS = ("cb_cvd", "bin_spot", "bin_perp")
+
+
+def _delta_bucket(value):
+    if not isinstance(value, (int, float)):
+        return None
+    bucket = bisect.bisect_right(DELTA_BUCKETS, abs(value))
+    return bucket if value >= 0 else -bucket
+
+
+def feature_key(snapshot):
+    """
+    Quantized signal shape: mode, label, direction, confidence bucket and a signed
+    magnitude bucket per CVD delta. Snapshots with the same key share commentary.
+    """
+    confidence = snapshot.get("confidence")
+    if isinstance(confidence, (int, float)):
+        confidence = int(confidence // CONFIDENCE_BUCKET)
+    direction = str(snapshot.get("direction", ""))
+    direction = "LONG" if "LONG" in direction else "SHORT" if "SHORT" in direction else direction
+    return "|".join(str(part) for part in (
+        snapshot.get("mode", "trap"),
+        snapshot.get("label"),
+        direction,
+        confidence,
+        *(_delta_bucket(snapshot.get(key)) for key in DELTA_KEYS)
+    ))
+
+
+class CommentaryCache:
+    """
+    LRU cache of commentary by feature_key() with a ttl, capped at max_entries.
+    Entries are written through to path (one JSON object, replaced atomically) so
+    they survive restarts; expired entries are dropped on load and on lookup.
+    hits / misses count lookups; stats() reports them with the hit rate.
+    """
+
+    def __init__(self, path=GPT_CACHE_FILE, ttl=GPT_CACHE_TTL, max_entries=512):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (stored_at, text), least recently used first
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[X] Commentary cache {self.path} unreadable, starting empty:", e)
+            return
+        now = clock.now()
+        for key, (stored_at, text) in sorted(stored.items(), key=lambda item: item[1][0]):
+            if now - stored_at < self.ttl:
+                self.entries[key] = (stored_at, text)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(dict(self.entries), f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print("[X] Commentary cache save failed:", e)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None and clock.now() - entry[0] < self.ttl:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            del self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, text):
+        self.entries[key] = (clock.now(), text)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self._save()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -1,16 +1,13 @@
 # utils/cvd_snapshot_writer.py
 
-import os
-import requests
 from datetime import datetime
 
-# Load Supabase credentials from environment
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+from utils.storage import get_storage
 
 def write_snapshot_to_supabase(snapshot):
-    # Guard clause if env vars missing
-    if not SUPABASE_URL or not SUPABASE_KEY:
+    # Guard clause if the Supabase backend has no credentials (STORAGE_BACKEND=sqlite needs none)
+    storage = get_storage()
+    if storage is None:
         print("❌ Missing Supabase credentials. Check SUPABASE_URL and SUPABASE_KEY in your .env or Railway variables.")
         return
 
@@ -25,25 +22,5 @@ def write_snapshot_to_supabase(snapshot):
         "confirmed_outcome": snapshot.get("confirmed_outcome", None)
     }
 
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": "return=minimal"
-    }
-
-    url = f"{SUPABASE_URL}/rest/v1/cvd_snapshots"
-
-    try:
-        response = requests.post(url, json=payload, headers=headers)
-
-        if response.status_code == 201:
-            print("✅ Snapshot saved to Supabase.")
-        else:
-            print(f"❌ Supabase write failed.")
-            print(f"    Status: {response.status_code}")
-            print(f"    Response: {response.text}")
-
-    except Exception as e:
-        print("❌ Exception during Supabase write:")
-        print(str(e))
+    # Supabase: batched off the engine loop and spooled if it is down; SQLite: local batched insert
+    storage.insert("cvd_snapshots", payload)
@@ -1,11 +1,20 @@
-from utils.supabase_client import supabase
 import pandas as pd
 
+from utils.storage import get_storage, use_sqlite
+
 def fetch_table(table_name):
-    res = supabase.table(table_name).select("*").execute()
-    return pd.DataFrame(res.data) if res.data else pd.DataFrame()
+    if use_sqlite():
+        rows = get_storage().fetch(table_name)
+    else:
+        from utils.supabase_client import supabase
+
+        rows = supabase.table(table_name).select("*").execute().data
+    return pd.DataFrame(rows) if rows else pd.DataFrame()
 
 def analyze_trap_performance():
+    if use_sqlite():
+        return analyze_trap_performance_sql()
+
     traps = fetch_table("Traps")
     if traps.empty:
         print("No trap data found.")
@@ -19,5 +28,30 @@ def analyze_trap_performance():
     conf_perf = traps.groupby('confidence').outcome.value_counts(normalize=True).unstack().fillna(0) * 100
     print("\n📈 Performance by confidence:\n", conf_perf)
 
+def analyze_trap_performance_sql():
+    """
+    Same report computed inside SQLite (indexed on outcome / label / direction),
+    so it stays fast with hundreds of thousands of rows.
+    """
+    storage = get_storage()
+    total = storage.query('SELECT COUNT(*) AS n, SUM(outcome = \'win\') AS wins FROM "Traps" WHERE outcome IS NOT NULL')[0]
+    if not total["n"]:
+        print("No trap data found.")
+        return
+
+    print(f"📊 Win rate: {total['wins'] / total['n'] * 100:.2f}%")
+
+    conf_perf = pd.DataFrame(storage.query(
+        'SELECT confidence, outcome, COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (PARTITION BY confidence) AS pct '
+        'FROM "Traps" WHERE outcome IS NOT NULL GROUP BY confidence, outcome'
+    ))
+    print("\n📈 Performance by confidence:\n", conf_perf.pivot(index="confidence", columns="outcome", values="pct").fillna(0))
+
+    by_direction = pd.DataFrame(storage.query(
+        'SELECT direction, label, COUNT(*) AS traps, AVG(outcome = \'win\') * 100 AS win_rate '
+        'FROM "Traps" WHERE outcome IS NOT NULL GROUP BY direction, label'
+    ))
+    print("\n🧭 By direction / label:\n", by_direction)
+
 if __name__ == "__main__":
     analyze_trap_performance()
@@ -1,5 +1,10 @@
+import asyncio
 import aiohttp
 import os
+import time
+from collections import deque
+
+from utils import clock, metrics
 
 # Fallback default
 DEFAULT_WEBHOOK = os.getenv("DISCORD_WEBHOOK_SPOT_PERP")
@@ -11,10 +16,170 @@ WEBHOOKS = {
     "reversal": os.getenv("DISCORD_WEBHOOK_REVERSAL", DEFAULT_WEBHOOK),
 }
 
+MESSAGE_LIMIT = 2000  # Discord's content length limit
+RETRYABLE_STATUS = {500, 502, 503, 504}
+
+
+class WebhookDelivery:
+    """
+    Long-lived delivery worker for one webhook.
+    Messages go into a bounded queue and one task posts them in order over a shared
+    keep-alive session. A 429 is waited out (retry_after from the body, else the
+    Retry-After header) and the same message is retried; when X-RateLimit-Remaining
+    reaches 0 the worker pauses for X-RateLimit-Reset-After before the next post.
+    If messages back up, the waiting ones for the same mode are merged into one post
+    (up to MESSAGE_LIMIT), so a burst from every engine costs one post per mode rather
+    than one per alert. When the queue is full the oldest message is dropped.
+    """
+
+    def __init__(self, webhook, session_factory, max_queue=100, max_retries=3, backoff=1.0):
+        self.webhook = webhook
+        self.session_factory = session_factory
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_queue = max_queue
+
+        self._queue = asyncio.Queue()
+        self._task = None
+        self._backlog = deque()  # items taken off the queue that were left out of the last merge
+        self._posting = False
+        self._resume_at = 0  # monotonic time the bucket resets after hitting 0 remaining
+
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.rate_limited = 0
+
+    def put(self, message, mode, event_ts=None):
+        if self._queue.qsize() + len(self._backlog) >= self.max_queue:
+            # The backlog was taken off the queue earlier, so it holds the oldest messages
+            if self._backlog:
+                self._backlog.popleft()
+            else:
+                self._queue.get_nowait()
+            self.dropped += 1
+            print(f"❌ Discord queue full for mode: {mode}, dropped the oldest alert")
+        self._queue.put_nowait((mode, message, time.monotonic(), event_ts))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _next_post(self, first):
+        """Folds waiting messages for the same mode into this one while they fit."""
+        while not self._queue.empty():
+            self._backlog.append(self._queue.get_nowait())
+        mode = first[0]
+        items = [first]
+        size = len(first[1])
+        rest = deque()
+        for item in self._backlog:
+            if item[0] == mode and size + 2 + len(item[1]) <= MESSAGE_LIMIT:
+                items.append(item)
+                size += 2 + len(item[1])
+            else:
+                rest.append(item)
+        self._backlog = rest
+        self.merged += len(items) - 1
+        return items
+
+    async def _run(self):
+        while True:
+            first = self._backlog.popleft() if self._backlog else await self._queue.get()
+            items = self._next_post(first)
+            self._posting = True
+            try:
+                if await self._post("\n\n".join(item[1] for item in items), first[0]):
+                    self._observe(items)
+            finally:
+                self._posting = False
+
+    @staticmethod
+    def _observe(items):
+        acked, now = time.monotonic(), clock.now()
+        for mode, _, queued_at, event_ts in items:
+            metrics.webhook_latency.observe(acked - queued_at, mode)
+            if event_ts is not None:
+                metrics.signal_age.observe(now - event_ts, mode, "delivered")
+
+    async def _post(self, content, mode):
+        """Returns True once Discord acknowledged the post."""
+        for attempt in range(self.max_retries + 1):
+            wait = self._resume_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                session = await self.session_factory()
+                async with session.post(self.webhook, json={"content": content}) as resp:
+                    if resp.headers.get("X-RateLimit-Remaining") == "0":
+                        reset_after = float(resp.headers.get("X-RateLimit-Reset-After", 1))
+                        self._resume_at = time.monotonic() + reset_after
+                    if resp.status in (200, 204):
+                        self.sent += 1
+                        return True
+                    if resp.status == 429:
+                        self.rate_limited += 1
+                        try:
+                            retry_after = float((await resp.json(content_type=None))["retry_after"])
+                        except Exception:
+                            retry_after = float(resp.headers.get("Retry-After", 1))
+                        self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+                        print(f"⏳ Discord rate limited [{mode}], retrying in {retry_after:.2f}s")
+                        continue
+                    if resp.status not in RETRYABLE_STATUS:
+                        print(f"❌ Discord webhook failed [{mode}] → Status: {resp.status}")
+                        return False
+                    error = f"Status: {resp.status}"
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        print(f"[X] Discord alert error [{mode}]: {error}, giving up after {self.max_retries + 1} attempts")
+        return False
+
+    async def drain(self, timeout=10):
+        """Waits (up to timeout) for everything queued to be posted."""
+        deadline = time.monotonic() + timeout
+        while (not self._queue.empty() or self._backlog or self._posting) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
 
-async def send_discord_alert(message: str, mode: str = "sniper"):
+
+_session = None
+_deliveries = {}  # webhook -> WebhookDelivery
+_loop = None
+
+
+async def _get_session():
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=4, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=10)
+        )
+    return _session
+
+
+def get_delivery(webhook):
+    global _loop, _session
+    loop = asyncio.get_running_loop()
+    if loop is not _loop:
+        # Workers and the session belong to one event loop; a new loop starts afresh
+        _deliveries.clear()
+        _session = None
+        _loop = loop
+    if webhook not in _deliveries:
+        _deliveries[webhook] = WebhookDelivery(webhook, _get_session)
+    return _deliveries[webhook]
+
+
+async def send_discord_alert(message: str, mode: str = "sniper", event_ts: float = None):
     """
-    Sends a formatted alert message to the appropriate Discord channel based on mode.
+    Queues a formatted alert message for the appropriate Discord channel based on mode.
+    Returns as soon as it is queued; the webhook's delivery worker posts it.
+    event_ts (exchange time behind the alert) feeds the delivered signal age metric.
     """
     webhook = WEBHOOKS.get(mode, DEFAULT_WEBHOOK)
 
@@ -22,11 +187,33 @@ async def send_discord_alert(message: str, mode: str = "sniper"):
         print(f"❌ No Discord webhook found for mode: {mode}")
         return
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            payload = {"content": message}
-            async with session.post(webhook, json=payload) as resp:
-                if resp.status != 204:
-                    print(f"❌ Discord webhook failed [{mode}] → Status: {resp.status}")
-    except Exception as e:
-        print(f"[X] Discord alert error [{mode}]:", e)
+    get_delivery(webhook).put(message, mode, event_ts)
+
+
+def _delivery_counts():
+    return {
+        (webhook_label(webhook), counter): getattr(delivery, counter)
+        for webhook, delivery in _deliveries.items()
+        for counter in ("sent", "merged", "dropped", "rate_limited")
+    }
+
+
+def webhook_label(webhook):
+    """Modes served by a webhook, so metrics never expose the webhook URL."""
+    return "+".join(sorted(mode for mode, url in WEBHOOKS.items() if url == webhook)) or "other"
+
+
+metrics.registry.counter(
+    "spotperp_discord_messages_total", "Discord delivery counters by webhook", _delivery_counts, ("webhook", "result"))
+
+
+async def close_discord():
+    """Posts whatever is still queued, then stops the workers and closes the session."""
+    global _session
+    for delivery in list(_deliveries.values()):
+        await delivery.drain()
+        delivery.close()
+    _deliveries.clear()
+    if _session is not None:
+        await _session.close()
+        _session = None
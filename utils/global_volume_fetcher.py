@@ -1,8 +1,13 @@
 # utils/global_volume_fetcher.py
 
+import asyncio
 import requests
 import os
 
+import aiohttp
+
+from utils import clock
+
 CMC_KEY = os.getenv("COINMARKETCAP_API_KEY")
 
 # --- REST Endpoints ---
@@ -11,56 +16,62 @@ BYBIT_V5_REST = "https://api.bybit.com/v5/market/tickers?category=linear&symbol=
 OKX_REST = "https://www.okx.com/api/v5/market/ticker?instId=BTC-USDT"
 CMC_REST = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/quotes/latest?symbol=BTC"
 
-# --- Individual Fetchers ---
-def fetch_binance_volume():
-    try:
-        res = requests.get(BINANCE_REST, timeout=5)
-        data = res.json()
+# --- Response parsers (shared by the blocking and async fetchers) ---
+def parse_binance_volume(data):
+    return {
+        "binance_spot_volume": float(data.get("quoteVolume", 0)),
+        "binance_base_volume": float(data.get("volume", 0))
+    }
+
+def parse_bybit_v5_volume(data):
+    if data.get("retCode") == 0 and "result" in data:
+        ticker = data["result"]["list"][0]
         return {
-            "binance_spot_volume": float(data.get("quoteVolume", 0)),
-            "binance_base_volume": float(data.get("volume", 0))
+            "bybit_perp_volume": float(ticker.get("turnover24h", 0))
         }
+    return {}
+
+def parse_okx_volume(data):
+    ticker = data["data"][0]
+    return {
+        "okx_volume": float(ticker.get("volCcy24h", 0))
+    }
+
+def parse_coinmarketcap_volume(data):
+    quote = data["data"]["BTC"]["quote"]["USD"]
+    return {
+        "cmc_volume": float(quote.get("volume_24h", 0))
+    }
+
+# venue -> (url, headers, parser, log name)
+SOURCES = {
+    "binance": (BINANCE_REST, None, parse_binance_volume, "Binance"),
+    "bybit": (BYBIT_V5_REST, None, parse_bybit_v5_volume, "Bybit V5"),
+    "okx": (OKX_REST, None, parse_okx_volume, "OKX"),
+    "cmc": (CMC_REST, {"X-CMC_PRO_API_KEY": CMC_KEY}, parse_coinmarketcap_volume, "CoinMarketCap")
+}
+
+# --- Individual Fetchers ---
+def _fetch(venue):
+    url, headers, parse, label = SOURCES[venue]
+    try:
+        res = requests.get(url, headers=headers, timeout=5)
+        return parse(res.json())
     except Exception as e:
-        print("[X] Binance volume fetch failed:", e)
+        print(f"[X] {label} volume fetch failed:", e)
         return {}
 
+def fetch_binance_volume():
+    return _fetch("binance")
+
 def fetch_bybit_v5_volume():
-    try:
-        res = requests.get(BYBIT_V5_REST, timeout=5)
-        data = res.json()
-        if data.get("retCode") == 0 and "result" in data:
-            ticker = data["result"]["list"][0]
-            return {
-                "bybit_perp_volume": float(ticker.get("turnover24h", 0))
-            }
-    except Exception as e:
-        print("[X] Bybit V5 volume fetch failed:", e)
-    return {}
+    return _fetch("bybit")
 
 def fetch_okx_volume():
-    try:
-        res = requests.get(OKX_REST, timeout=5)
-        data = res.json()
-        ticker = data["data"][0]
-        return {
-            "okx_volume": float(ticker.get("volCcy24h", 0))
-        }
-    except Exception as e:
-        print("[X] OKX volume fetch failed:", e)
-        return {}
+    return _fetch("okx")
 
 def fetch_coinmarketcap_volume():
-    try:
-        headers = {"X-CMC_PRO_API_KEY": CMC_KEY}
-        res = requests.get(CMC_REST, headers=headers, timeout=5)
-        data = res.json()
-        quote = data["data"]["BTC"]["quote"]["USD"]
-        return {
-            "cmc_volume": float(quote.get("volume_24h", 0))
-        }
-    except Exception as e:
-        print("[X] CoinMarketCap volume fetch failed:", e)
-        return {}
+    return _fetch("cmc")
 
 # --- Combined Fetcher ---
 def fetch_all_volume():
@@ -70,3 +81,86 @@ def fetch_all_volume():
     result.update(fetch_okx_volume())
     result.update(fetch_coinmarketcap_volume())
     return result
+
+
+# --- Async fetcher with a TTL cache ---
+class VolumeCache:
+    """
+    Non-blocking replacement for fetch_all_volume() inside the engine loops.
+    get() returns the cached figures immediately and, once they are older than ttl,
+    starts one background refresh that fetches every venue concurrently over a shared
+    aiohttp session (stale-while-revalidate). A venue that fails keeps its last good
+    figures until they are max_stale seconds old. get() returns {} until the first
+    refresh lands; runners await prime() once at startup so the first cycle has volume,
+    and close() the session on shutdown.
+    """
+
+    def __init__(self, ttl=60, timeout=5, max_stale=900):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_stale = max_stale
+        self.entries = {}  # venue -> (fetched_at, figures)
+        self.refreshed_at = None
+        self._session = None
+        self._refresh = None
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit_per_host=2))
+        return self._session
+
+    async def _fetch(self, session, venue):
+        url, headers, parse, label = SOURCES[venue]
+        # requests silently drops None header values, aiohttp does not (CMC without a key)
+        headers = {k: v for k, v in (headers or {}).items() if v is not None}
+        try:
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            async with session.get(url, headers=headers, timeout=timeout) as res:
+                figures = parse(await res.json(content_type=None))
+            self.entries[venue] = (clock.now(), figures)
+        except Exception as e:
+            print(f"[X] {label} volume fetch failed:", str(e) or type(e).__name__)
+
+    async def refresh(self):
+        session = await self._get_session()
+        await asyncio.gather(*(self._fetch(session, venue) for venue in SOURCES))
+        self.refreshed_at = clock.now()
+        return self.snapshot()
+
+    def snapshot(self):
+        now = clock.now()
+        result = {}
+        for fetched_at, figures in self.entries.values():
+            if now - fetched_at <= self.max_stale:
+                result.update(figures)
+        return result
+
+    async def prime(self):
+        """Waits for the first refresh (one in flight or a new one); a no-op once figures exist."""
+        if self.refreshed_at is None:
+            if self._refresh is None or self._refresh.done():
+                self._refresh = asyncio.get_running_loop().create_task(self.refresh())
+            await self._refresh
+        return self.snapshot()
+
+    def get(self):
+        stale = self.refreshed_at is None or clock.now() - self.refreshed_at >= self.ttl
+        if stale and (self._refresh is None or self._refresh.done()):
+            try:
+                self._refresh = asyncio.get_running_loop().create_task(self.refresh())
+            except RuntimeError:
+                # No running loop (sync caller): fall back to one blocking round
+                return fetch_all_volume()
+        return self.snapshot()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+volume_cache = VolumeCache()
+
+
+def get_cached_volume():
+    return volume_cache.get()
@@ -0,0 +1,178 @@
+# utils/gpt_commentary.py (GPT trade commentary off the signal path: bounded background worker)
+
+import asyncio
+import json
+import os
+
+from openai import AsyncOpenAI
+
+from utils import metrics
+from utils.commentary_cache import CommentaryCache, feature_key
+
+GPT_MODEL = os.getenv("GPT_MODEL", "gpt-4")
+GPT_TIMEOUT = float(os.getenv("GPT_TIMEOUT", "8"))
+GPT_CONCURRENCY = int(os.getenv("GPT_CONCURRENCY", "2"))
+# OPENAI_BASE_URL (read by the openai client) points everything here at another endpoint, e.g. a local stub
+
+
+def build_prompt(snapshot):
+    return (
+        "You're a professional BTC sniper trade analyst.\n"
+        "Here is a trade trap snapshot:\n"
+        f"{json.dumps(snapshot, indent=2, default=str)}\n\n"
+        "Explain this trap signal in 1 short line:"
+    )
+
+
+def summarize(snapshot):
+    """Templated one-line summary, available immediately while the GPT commentary is pending."""
+    def pct(key):
+        value = snapshot.get(key)
+        return f"{value:+.2f}%" if isinstance(value, (int, float)) else "?"
+
+    return (
+        f"{snapshot.get('direction', '?')} · {snapshot.get('label', '?')} · "
+        f"confidence {snapshot.get('confidence', '?')}/10 · "
+        f"CVD Δ Coinbase {pct('cb_cvd')} / Binance spot {pct('bin_spot')} / Binance perp {pct('bin_perp')}"
+    )
+
+
+class CommentaryWorker:
+    """
+    Runs GPT commentary requests as background tasks on the running event loop.
+    At most concurrency requests are in flight, and each one, including its wait for
+    a slot, is cut off after timeout seconds so late commentary is never delivered.
+    Beyond max_pending outstanding requests new ones are dropped rather than queued.
+
+    With a cache (utils/commentary_cache.py) a signal whose feature_key() was answered
+    before gets that commentary without a request, and concurrent requests for the same
+    key share one call.
+
+    comment(snapshot) is awaitable and returns the text or None; submit(snapshot, callback)
+    is for synchronous callers and calls callback(text) only when commentary arrives
+    (immediately on a cache hit).
+    """
+
+    def __init__(self, model=GPT_MODEL, concurrency=GPT_CONCURRENCY, timeout=GPT_TIMEOUT, max_pending=20,
+                 api_key=None, base_url=None, cache=None):
+        self.model = model
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+
+        self._client = None
+        self._semaphore = None
+        self._tasks = set()
+        self._inflight = {}  # feature key -> future of the request already asking for it
+        self.pending = 0
+        self.cache = cache
+
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self):
+        return bool(self.api_key or self.base_url)
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=self.api_key or "none", base_url=self.base_url,
+                                       timeout=self.timeout, max_retries=0)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    async def _request(self, snapshot):
+        client = self._get_client()
+        async with self._semaphore:
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": build_prompt(snapshot)}],
+                temperature=0.6,
+            )
+        return response.choices[0].message.content.strip()
+
+    async def comment(self, snapshot, key=None):
+        """key: the snapshot's feature_key(), passed when the caller already missed the cache with it."""
+        if not self.enabled:
+            return None
+        if self.cache is not None:
+            if key is None:
+                key = feature_key(snapshot)
+                text = self.cache.get(key)
+                if text is not None:
+                    return text
+            if key in self._inflight:
+                return await asyncio.shield(self._inflight[key])
+
+        if self.pending >= self.max_pending:
+            self.dropped += 1
+            print(f"[X] GPT commentary skipped: {self.pending} requests already pending")
+            return None
+
+        self.pending += 1
+        if key is not None:
+            self._inflight[key] = asyncio.get_running_loop().create_future()
+        text = None
+        try:
+            text = await asyncio.wait_for(self._request(snapshot), self.timeout)
+            self.completed += 1
+            if key is not None:
+                self.cache.put(key, text)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            print(f"[X] GPT commentary timed out after {self.timeout}s")
+        except Exception as e:
+            self.failed += 1
+            print("[X] GPT trap commentary failed:", str(e) or type(e).__name__)
+        finally:
+            self.pending -= 1
+            if key is not None:
+                self._inflight.pop(key).set_result(text)
+        return text
+
+    def submit(self, snapshot, callback):
+        key = None
+        if self.enabled and self.cache is not None:
+            key = feature_key(snapshot)
+            text = self.cache.get(key)
+            if text is not None:
+                callback(text)
+                return None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None  # no event loop (sync tooling): the templated summary stands
+
+        async def run():
+            text = await self.comment(snapshot, key)
+            if text is not None:
+                try:
+                    callback(text)
+                except Exception as e:
+                    print("[X] GPT commentary callback failed:", e)
+
+        task = loop.create_task(run())
+        self._tasks.add(task)  # keep a reference until done
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def drain(self):
+        """Waits for every outstanding request (shutdown, tests)."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+commentary_worker = CommentaryWorker(cache=CommentaryCache())
+
+metrics.registry.counter(
+    "spotperp_commentary_requests_total", "GPT commentary requests by result",
+    lambda: {(result,): getattr(commentary_worker, result) for result in ("completed", "failed", "timed_out", "dropped")},
+    ("result",))
+metrics.registry.counter(
+    "spotperp_commentary_cache_total", "Commentary cache lookups by result",
+    lambda: {("hit",): commentary_worker.cache.hits, ("miss",): commentary_worker.cache.misses},
+    ("result",))
@@ -0,0 +1,185 @@
+# utils/horizon_resolver.py (resolve open signals at fixed horizons with MFE / MAE, driven by trades)
+
+import bisect
+import heapq
+
+from utils import clock
+
+HORIZONS = {
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "4h": 4 * 60 * 60
+}
+
+# A horizon reached this long after its deadline (e.g. the process was down) is flagged late
+LATE_SECONDS = 60
+
+
+class HorizonResolver:
+    """
+    Trade listener that resolves each tracked signal at every horizon in HORIZONS.
+
+    Deadlines sit in one heap, so a tick only pops what is due: O(log k) per resolution
+    for k open signals. Max favorable / adverse excursion is not rescanned per signal;
+    the resolver keeps monotonic max and min stacks of the tick series, and the extreme
+    since a signal's entry is one binary search into them. Ticks are only recorded while
+    something is open, and the stacks are trimmed to the oldest open signal.
+
+    on_resolve(uuid, fields, final) receives the cumulative result after each horizon:
+      {"horizons": {"5m": {"price", "return_pct", "mfe_pct", "mae_pct", "outcome"[, "late"]}, ...},
+       "mfe_pct": ..., "mae_pct": ...}
+    plus exit_price / exit_time / outcome (the last horizon's) when final is True.
+    """
+
+    def __init__(self, on_resolve=None, horizons=None, venue=None):
+        self.on_resolve = on_resolve
+        self.horizons = dict(horizons or HORIZONS)
+        self.venue = venue
+
+        self.open = {}     # uuid -> signal state
+        self._heap = []    # (deadline, order, uuid, horizon)
+        self._order = 0
+        self._seq = 0      # index of the next recorded tick
+
+        # Monotonic stacks as parallel seq / price lists; entries before *_head are trimmed
+        self._max_seq, self._max_px, self._max_head = [], [], 0
+        self._min_seq, self._min_px, self._min_head = [], [], 0
+
+        self.last_price = None
+        self.resolved = 0
+
+    def __call__(self, trade):
+        if self.venue is None or trade.venue == self.venue:
+            self.tick(trade.price, trade.recv_ts)
+
+    def track(self, uuid, price, direction, ts=None, done=None):
+        """done: horizon results already recorded for this signal (resuming after a restart)."""
+        if uuid in self.open:
+            return  # already tracked, e.g. picked up from the journal by get_resolver()
+        ts = clock.now() if ts is None else ts
+        done = dict(done or {})
+        pending = {name: seconds for name, seconds in self.horizons.items() if name not in done}
+        if not pending:
+            return
+        self.open[uuid] = {
+            "entry": price,
+            "sign": 1 if direction == "LONG" else -1 if direction == "SHORT" else 0,
+            "start": self._seq,
+            "horizons": done,
+            "remaining": len(pending)
+        }
+        for name, seconds in pending.items():
+            self._order += 1
+            heapq.heappush(self._heap, (ts + seconds, self._order, uuid, name))
+        # The entry price itself counts toward the excursion range
+        self._record(price)
+
+    def tick(self, price, ts):
+        self.last_price = price
+        if not self.open:
+            return
+        self._record(price)
+        while self._heap and self._heap[0][0] <= ts:
+            deadline, _, uuid, name = heapq.heappop(self._heap)
+            if uuid in self.open:
+                self._resolve(uuid, name, price, ts, late=ts - deadline > LATE_SECONDS)
+
+    def _record(self, price):
+        seq = self._seq
+        self._seq += 1
+        max_seq, max_px = self._max_seq, self._max_px
+        while len(max_px) > self._max_head and max_px[-1] <= price:
+            max_seq.pop()
+            max_px.pop()
+        max_seq.append(seq)
+        max_px.append(price)
+
+        min_seq, min_px = self._min_seq, self._min_px
+        while len(min_px) > self._min_head and min_px[-1] >= price:
+            min_seq.pop()
+            min_px.pop()
+        min_seq.append(seq)
+        min_px.append(price)
+
+    def _extremes(self, start):
+        high = self._max_px[bisect.bisect_left(self._max_seq, start, lo=self._max_head)]
+        low = self._min_px[bisect.bisect_left(self._min_seq, start, lo=self._min_head)]
+        return high, low
+
+    def _resolve(self, uuid, name, price, ts, late=False):
+        signal = self.open[uuid]
+        entry, sign = signal["entry"], signal["sign"]
+        high, low = self._extremes(signal["start"])
+
+        def pct(value):
+            return round((value / entry - 1) * 100, 4) if entry else 0.0
+
+        if sign >= 0:
+            mfe, mae = pct(high), pct(low)
+        else:
+            mfe, mae = -pct(low), -pct(high)
+        ret = pct(price) * sign
+
+        result = {
+            "price": price,
+            "return_pct": ret,
+            "mfe_pct": mfe,
+            "mae_pct": mae,
+            "outcome": "unknown" if sign == 0 else "win" if ret > 0 else "loss"
+        }
+        if late:
+            result["late"] = True
+        signal["horizons"][name] = result
+        signal["remaining"] -= 1
+
+        fields = {"horizons": dict(signal["horizons"]), "mfe_pct": mfe, "mae_pct": mae}
+        final = signal["remaining"] == 0
+        if final:
+            fields.update(exit_price=price, exit_time=ts, outcome=result["outcome"])
+            del self.open[uuid]
+            self._trim()
+        self.resolved += 1
+
+        if self.on_resolve:
+            try:
+                self.on_resolve(uuid, fields, final)
+            except Exception as e:
+                print(f"[X] Horizon resolve callback failed [{uuid}]:", e)
+
+    def _trim(self):
+        if not self.open:
+            self._max_seq, self._max_px, self._max_head = [], [], 0
+            self._min_seq, self._min_px, self._min_head = [], [], 0
+            return
+        oldest = min(signal["start"] for signal in self.open.values())
+        self._max_head = bisect.bisect_left(self._max_seq, oldest, lo=self._max_head)
+        self._min_head = bisect.bisect_left(self._min_seq, oldest, lo=self._min_head)
+        # Reclaim the dead prefix once it dominates the lists
+        if self._max_head > 4096 and self._max_head * 2 > len(self._max_seq):
+            del self._max_seq[:self._max_head], self._max_px[:self._max_head]
+            self._max_head = 0
+        if self._min_head > 4096 and self._min_head * 2 > len(self._min_seq):
+            del self._min_seq[:self._min_head], self._min_px[:self._min_head]
+            self._min_head = 0
+
+
+_resolver = None
+
+
+def get_resolver(feeds):
+    """
+    Process-wide resolver for the trap journal, priced off Binance spot trades.
+    On first use it re-tracks every trap still open in the journal, so a restart
+    resumes them (horizons that passed while down resolve on the next tick, flagged late).
+    """
+    global _resolver
+    if _resolver is None:
+        from utils.trap_journal import open_traps, record_trap_horizon
+
+        _resolver = HorizonResolver(on_resolve=record_trap_horizon, venue="binance_spot")
+        for uuid, trap in open_traps().items():
+            if trap.get("price"):
+                _resolver.track(uuid, trap["price"], trap.get("direction"), trap.get("timestamp"), trap.get("horizons"))
+        feeds.binance.add_listener(_resolver)
+    return _resolver
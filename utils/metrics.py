@@ -0,0 +1,175 @@
+# utils/metrics.py (latency histograms and a Prometheus text endpoint)
+
+import bisect
+import os
+
+from utils import clock
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 = no endpoint, no feed latency listener
+
+# Seconds, 10us .. 10s in 1 / 2.5 / 5 steps: parse times and network lags share one layout
+DEFAULT_BUCKETS = tuple(m * 10.0 ** e for e in range(-5, 1) for m in (1, 2.5, 5)) + (10.0,)
+
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() is one bisect and two additions."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class HistogramFamily:
+    """One metric name with a Histogram per label value tuple."""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.children = {}
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = Histogram(self.buckets)
+        return child
+
+    def observe(self, value, *values):
+        self.labels(*values).observe(value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, hist in sorted(self.children.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, values))
+            sep = "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, hist.counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {hist.count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {hist.sum:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {hist.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = []
+        self.collected = []  # (type, name, help, callback, label names) read at scrape time
+
+    def histogram(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        family = HistogramFamily(name, help_text, label_names, buckets)
+        self.histograms.append(family)
+        return family
+
+    def gauge(self, name, help_text, callback, label_names=()):
+        """callback() -> {label value tuple: value}, read at scrape time."""
+        self.collected.append(("gauge", name, help_text, callback, label_names))
+
+    def counter(self, name, help_text, callback, label_names=()):
+        """Like gauge(), for values that only grow (existing counters kept by other modules)."""
+        self.collected.append(("counter", name, help_text, callback, label_names))
+
+    def render(self):
+        lines = []
+        for family in self.histograms:
+            lines.extend(family.render())
+        for kind, name, help_text, callback, label_names in self.collected:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            try:
+                values = callback()
+            except Exception as e:
+                print(f"[X] Metrics gauge {name} failed:", e)
+                continue
+            for label_values, value in values.items():
+                labels = ",".join(f'{n}="{v}"' for n, v in zip(label_names, label_values))
+                lines.append(f"{name}{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Exchange event -> socket receive (includes clock skew against the venue) and receive -> parsed trade
+feed_latency = registry.histogram(
+    "spotperp_feed_latency_seconds", "Per-trade feed latency by venue and stage", ("venue", "stage"))
+# Engine cycle stages: memory (CVD memory update + deltas) and evaluate (scoring, logging, dispatch)
+engine_stage = registry.histogram(
+    "spotperp_engine_stage_seconds", "Engine cycle stage duration by engine", ("engine", "stage"))
+# Age of the newest exchange event behind an alert, at dispatch and at webhook acknowledgement
+signal_age = registry.histogram(
+    "spotperp_signal_age_seconds", "Exchange event to alert dispatch / delivery by mode", ("mode", "stage"))
+# Alert queued -> Discord acknowledged (queueing, rate limits and the HTTP round trip)
+webhook_latency = registry.histogram(
+    "spotperp_webhook_seconds", "Alert enqueue to webhook acknowledgement by mode", ("mode",))
+
+
+class FeedLatencyListener:
+    """
+    Trade listener for feed_latency. It runs inline right after a message is parsed,
+    so now - recv_ts is the parse stage. It also keeps the newest exchange event time
+    seen on any venue, which the engines stamp on each market snapshot.
+    """
+
+    def __init__(self):
+        self.last_event_ts = None
+
+    def __call__(self, trade):
+        now = clock.now()
+        if trade.exch_ts is not None:
+            feed_latency.observe(trade.recv_ts - trade.exch_ts, trade.venue, "exchange_to_receive")
+            if self.last_event_ts is None or trade.exch_ts > self.last_event_ts:
+                self.last_event_ts = trade.exch_ts
+        feed_latency.observe(now - trade.recv_ts, trade.venue, "parse")
+
+
+feed_listener = FeedLatencyListener()
+
+
+def last_event_ts():
+    """Newest exchange event time across venues, None until the feed listener is attached."""
+    return feed_listener.last_event_ts
+
+
+def render():
+    return registry.render()
+
+
+async def serve(port=METRICS_PORT, host="127.0.0.1"):
+    """Serves GET /metrics in the Prometheus text exposition format (0.0.4)."""
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(body=render().encode(),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    print(f"[✓] Metrics on http://{host}:{port}/metrics")
+    return runner
+
+
+_started = False
+
+
+async def start(feeds, port=METRICS_PORT):
+    """Attaches the feed latency listener and starts the endpoint, once per process (no-op without a port)."""
+    global _started
+    if _started or not port:
+        return
+    _started = True
+    for feed in feeds.all():
+        feed.add_listener(feed_listener)
+    await serve(port)
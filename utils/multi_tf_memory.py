@@ -1,53 +1,204 @@
-import time
-from collections import deque
+import mmap
+import os
+import struct
+from array import array
+
+from utils import clock
+
+TIMEFRAMES = {
+    "1m":   60,
+    "3m":   3 * 60,
+    "5m":   5 * 60,
+    "15m":  15 * 60,
+    "30m":  30 * 60,
+    "1h":   60 * 60,
+    "4h":   4 * 60 * 60,
+    "8h":   8 * 60 * 60,
+    "12h":  12 * 60 * 60,
+    "1d":   24 * 60 * 60
+}
+
+# Enough slots for the 1d window at a 1s update cadence (5s cadence only needs ~17k)
+DEFAULT_CAPACITY = 2 ** 17
+
+COLUMNS = 4  # ts, cb_cvd, bin_spot, bin_perp
+
+# Memory-mapped file layout: 64-byte header, then the four float64 columns back to back
+MMAP_MAGIC = b"MTFMEM01"
+MMAP_HEADER = struct.Struct("<8sQQQ")  # magic, capacity, head, count
+MMAP_HEADER_SIZE = 64
+MMAP_FLUSH_SECONDS = 60
+
 
 class MultiTFMemory:
-    def __init__(self):
-        self.windows = {
-            "1m":   {"max_age": 60,             "memory": deque()},
-            "3m":   {"max_age": 3 * 60,         "memory": deque()},
-            "5m":   {"max_age": 5 * 60,         "memory": deque()},
-            "15m":  {"max_age": 15 * 60,        "memory": deque()},
-            "30m":  {"max_age": 30 * 60,        "memory": deque()},
-            "1h":   {"max_age": 60 * 60,        "memory": deque()},
-            "4h":   {"max_age": 4 * 60 * 60,     "memory": deque()},
-            "8h":   {"max_age": 8 * 60 * 60,     "memory": deque()},
-            "12h":  {"max_age": 12 * 60 * 60,    "memory": deque()},
-            "1d":   {"max_age": 24 * 60 * 60,    "memory": deque()}
-        }
+    """
+    One preallocated circular buffer of (ts, cb_cvd, bin_spot, bin_perp) samples.
+    Every timeframe reads the same buffer: its window start is found by binary
+    search on the timestamp column, so update() is O(1) and get_all_deltas()
+    is O(log n) per timeframe.
+
+    With path set, the buffer lives in a fixed-size memory-mapped file and is
+    reloaded on startup, so a restarted engine keeps its 4h / 1d history.
+    Use one file per process.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, windows=None, path=None):
+        self.windows = dict(windows or TIMEFRAMES)
+        self.capacity = capacity
+        self.path = path
+        self._head = 0   # next slot to write
+        self._count = 0  # live samples, oldest at (head - count)
+
+        self._mmap = None
+        self._last_flush = clock.now()
+        self._offsets = None  # CVD splice offsets after a reload, see update()
+        self._splice_pending = False
+
+        if path:
+            self._attach(self._open_mmap(path))
+        else:
+            self._attach(memoryview(array("d", bytes(8 * COLUMNS * capacity))))
+
+    def _attach(self, buf):
+        cap = self.capacity
+        self._ts = buf[0:cap]
+        self._cb = buf[cap:2 * cap]
+        self._spot = buf[2 * cap:3 * cap]
+        self._perp = buf[3 * cap:4 * cap]
+
+    def _open_mmap(self, path):
+        size = MMAP_HEADER_SIZE + 8 * COLUMNS * self.capacity
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fresh = os.fstat(fd).st_size != size
+            if fresh:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, capacity, head, count = MMAP_HEADER.unpack_from(self._mmap, 0)
+        if fresh or magic != MMAP_MAGIC or capacity != self.capacity or head >= capacity or count > capacity:
+            MMAP_HEADER.pack_into(self._mmap, 0, MMAP_MAGIC, self.capacity, 0, 0)
+            print(f"[MEMORY] Started new memory file {path}")
+        else:
+            self._head, self._count = head, count
+
+        buf = memoryview(self._mmap)[MMAP_HEADER_SIZE:].cast("d")
+        if self._count:
+            self._restore(buf)
+        return buf
+
+    def _restore(self, buf):
+        self._attach(buf)
+        # Drop anything older than the longest window; it can never be read again
+        now = clock.now()
+        first = self._window_start(now, max(self.windows.values()))
+        if now - self._ts[self._slot(self._count - 1)] > max(self.windows.values()):
+            first = self._count
+        self._count -= first
+        self._write_header()
+
+        if self._count:
+            self._splice_pending = True
+            age = now - self._ts[self._slot(self._count - 1)]
+            print(f"[MEMORY] Restored {self._count} samples from {self.path} (newest {age:.0f}s old)")
+
+    def _write_header(self):
+        if self._mmap is not None:
+            MMAP_HEADER.pack_into(self._mmap, 0, MMAP_MAGIC, self.capacity, self._head, self._count)
+
+    def flush(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._last_flush = clock.now()
 
     def update(self, cb_cvd, bin_spot, bin_perp):
-        now = time.time()
-        datapoint = (now, cb_cvd, bin_spot, bin_perp)
+        now = clock.now()
+
+        if self._splice_pending:
+            # First update after a reload: the feeds restarted counting from zero, so splice
+            # the new CVD series onto the stored one (the downtime is treated as flat)
+            self._splice_pending = False
+            if self._count:
+                last = self._slot(self._count - 1)
+                self._offsets = (
+                    self._cb[last] - cb_cvd,
+                    self._spot[last] - bin_spot,
+                    self._perp[last] - bin_perp
+                )
+
+        if self._offsets is not None:
+            cb_cvd += self._offsets[0]
+            bin_spot += self._offsets[1]
+            bin_perp += self._offsets[2]
+
+        # Binary search needs non-decreasing timestamps, so never step backwards on a clock adjustment
+        if self._count and now < self._ts[self._head - 1]:
+            now = self._ts[self._head - 1]
 
-        for tf in self.windows:
-            self.windows[tf]["memory"].append(datapoint)
-            self._cleanup_old(tf, now)
+        i = self._head
+        self._ts[i] = now
+        self._cb[i] = cb_cvd
+        self._spot[i] = bin_spot
+        self._perp[i] = bin_perp
 
-    def _cleanup_old(self, tf, now):
-        memory = self.windows[tf]["memory"]
-        max_age = self.windows[tf]["max_age"]
-        while memory and now - memory[0][0] > max_age:
-            memory.popleft()
+        self._head = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+        if self._mmap is not None:
+            # Header goes last so a crash mid-update never exposes a half-written sample
+            self._write_header()
+            if now - self._last_flush > MMAP_FLUSH_SECONDS:
+                self.flush()
+
+    def __len__(self):
+        return self._count
+
+    def _slot(self, n):
+        """Physical slot of the n-th live sample (0 = oldest)."""
+        return (self._head - self._count + n) % self.capacity
+
+    def _window_start(self, now, max_age):
+        # First sample with now - ts <= max_age (the same rule the old per-window cleanup used)
+        lo, hi = 0, self._count - 1
+        ts = self._ts
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if now - ts[self._slot(mid)] > max_age:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
 
     def get_all_deltas(self):
+        if self._count < 2:
+            return {tf: self._zero_delta() for tf in self.windows}
+
+        end = self._slot(self._count - 1)
+        now = self._ts[end]
+
         deltas = {}
-        for tf in self.windows:
-            deltas[tf] = self._compute_delta(self.windows[tf]["memory"])
+        for tf, max_age in self.windows.items():
+            first = self._window_start(now, max_age)
+            if self._count - first < 2:
+                deltas[tf] = self._zero_delta()
+            else:
+                deltas[tf] = self._compute_delta(self._slot(first), end)
         return deltas
 
-    def _compute_delta(self, memory):
-        if len(memory) < 2:
-            return {"cb_cvd": 0, "bin_spot": 0, "bin_perp": 0}
-
-        start = memory[0]
-        end = memory[-1]
+    @staticmethod
+    def _zero_delta():
+        return {"cb_cvd": 0, "bin_spot": 0, "bin_perp": 0}
 
+    def _compute_delta(self, start, end):
         def percent_change(start_val, end_val):
             return round(((end_val - start_val) / abs(start_val)) * 100, 2) if start_val != 0 else 0
 
         return {
-            "cb_cvd":   percent_change(start[1], end[1]),
-            "bin_spot": percent_change(start[2], end[2]),
-            "bin_perp": percent_change(start[3], end[3])
+            "cb_cvd":   percent_change(self._cb[start], self._cb[end]),
+            "bin_spot": percent_change(self._spot[start], self._spot[end]),
+            "bin_perp": percent_change(self._perp[start], self._perp[end])
         }
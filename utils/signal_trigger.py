@@ -0,0 +1,105 @@
+# utils/signal_trigger.py (wake an engine on market events instead of a fixed sleep)
+
+import asyncio
+
+from utils import clock
+
+
+class SignalTrigger:
+    """
+    Replaces the fixed clock.sleep(interval) in StrategyEngine.monitor().
+    wait() returns as soon as one of these happens:
+      - cvd:<venue>  a venue's CVD moved cvd_threshold (base qty, either direction) since the last run
+      - bar          a micro-bar closed on any feed (on_bar_close, see feeds/micro_bars.py)
+      - interval     nothing qualified for max_interval seconds
+    Runs are spaced at least debounce seconds apart; anything that fires inside that gap
+    is coalesced into the next run, so a burst costs one evaluation, not hundreds.
+    cvd_threshold is one number for every venue or a {venue: threshold} dict.
+    """
+
+    def __init__(self, feeds, cvd_threshold=None, on_bar_close=False, max_interval=5, debounce=1.0):
+        self.feeds = feeds
+        self.cvd_threshold = cvd_threshold
+        self.on_bar_close = on_bar_close
+        self.max_interval = max_interval
+        self.debounce = debounce
+
+        self.reason = None
+        self.last_run = None
+        self.counts = {"cvd": 0, "bar": 0, "interval": 0}
+        self._moved = {}
+        self._timer = None
+        self._woken = False  # fire() cancelled the sleeping timer, as opposed to a cancel from outside
+
+    def attach(self):
+        for feed in self.feeds.all():
+            if self.cvd_threshold:
+                feed.add_listener(self._on_trade)
+            if self.on_bar_close:
+                feed.enable_bars().add_listener(self._on_bar)
+        return self
+
+    def detach(self):
+        for feed in self.feeds.all():
+            feed.remove_listener(self._on_trade)
+            if feed.bars is not None:
+                feed.bars.remove_listener(self._on_bar)
+
+    def _threshold(self, venue):
+        if isinstance(self.cvd_threshold, dict):
+            return self.cvd_threshold.get(venue, float("inf"))
+        return self.cvd_threshold
+
+    def _on_trade(self, trade):
+        moved = self._moved.get(trade.venue, 0.0) + trade.qty * trade.side
+        self._moved[trade.venue] = moved
+        if abs(moved) >= self._threshold(trade.venue):
+            self.fire(f"cvd:{trade.venue}")
+
+    def _on_bar(self, bar):
+        self.fire("bar")
+
+    def fire(self, reason):
+        if self.reason is None:
+            self.reason = reason
+            if self._timer is not None:
+                self._timer.cancel()
+                self._woken = True
+
+    @property
+    def pending(self):
+        """True between fire() and the waiting engine waking up (used by replay_driver.py)."""
+        return self.reason is not None and self._timer is not None
+
+    async def wait(self, deadline=None):
+        """
+        Sleeps until the next run is due and returns why.
+        deadline (epoch seconds) replaces last run + max_interval for this call.
+        """
+        if self.last_run is None:
+            self.last_run = clock.now()
+
+        if deadline is None:
+            deadline = self.last_run + self.max_interval
+        remaining = deadline - clock.now()
+        if self.reason is None and remaining > 0:
+            self._timer = asyncio.ensure_future(clock.sleep(remaining))
+            try:
+                await self._timer
+            except asyncio.CancelledError:
+                if not self._woken:
+                    raise  # shutdown or another outside cancel, not our own wake-up
+            finally:
+                self._timer = None
+                self._woken = False
+
+        gap = self.last_run + self.debounce - clock.now()
+        if gap > 0:
+            await clock.sleep(gap)
+
+        reason = self.reason or "interval"
+        self.reason = None
+        self._moved.clear()
+        self.last_run = clock.now()
+        self.counts[reason.split(":")[0]] += 1
+        return reason
@@ -1,23 +1,13 @@
-import os
-import requests
 from datetime import datetime
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+from utils.storage import get_storage
 
 def log_sniper_alert(alert):
-    if not SUPABASE_URL or not SUPABASE_KEY:
+    storage = get_storage()
+    if storage is None:
         print("[X] Missing SUPABASE_URL or SUPABASE_KEY in environment.")
         return
 
-    url = f"{SUPABASE_URL}/rest/v1/sniper_alerts"
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": "return=minimal"
-    }
-
     data = {
         "timestamp": datetime.utcnow().isoformat(),
         "signal": alert.get("signal"),
@@ -33,11 +23,5 @@ def log_sniper_alert(alert):
         # "outcome": None
     }
 
-    try:
-        res = requests.post(url, headers=headers, json=data)
-        if res.status_code not in [200, 201, 204]:
-            print("[X] Supabase insert failed:", res.status_code, res.text)
-        else:
-            print("[✓] Sniper alert saved to Supabase.")
-    except Exception as e:
-        print("[X] Error logging sniper alert:", e)
+    # Supabase: batched off the engine loop and spooled if it is down; SQLite: local batched insert
+    storage.insert("sniper_alerts", data)
@@ -1,22 +1,42 @@
-import time
+import asyncio
 import hashlib
+from utils import clock, metrics
 from utils.discord_alert import send_discord_alert
-from utils.trap_journal import get_gpt_commentary
+from utils.gpt_commentary import commentary_worker, summarize
+
+# An alert needs confidence >= MIN_CONFIDENCE; the test is signed, so negative scores never pass
+# unless maybe_alert(two_sided=True) also accepts perp_dominant at -MIN_CONFIDENCE or below
+MIN_CONFIDENCE = 6
 
 
 class SpotPerpAlertDispatcher:
-    def __init__(self, cooldown_seconds=900):
+    """
+    Sends an alert as soon as a signal qualifies, with a templated summary; the GPT
+    commentary (an async callable, commentary_worker.comment by default) follows as a
+    second message when it arrives, so the engine loop never waits on the model.
+    """
+
+    def __init__(self, cooldown_seconds=900, sender=send_discord_alert, commentary=commentary_worker.comment):
         self.last_signal_time = 0
         self.last_signal_hash = ""
         self.cooldown_seconds = cooldown_seconds
+        self.sender = sender
+        self.commentary = commentary  # None disables GPT (replays)
+        self._follow_ups = set()
 
-    async def maybe_alert(self, signal, confidence, label, deltas, mode="sniper"):
-        now = time.time()
+    async def maybe_alert(self, signal, confidence, label, deltas, mode="sniper", event_ts=None, two_sided=False):
+        """
+        event_ts: newest exchange event behind the snapshot, for the signal age metrics.
+        two_sided: confidence is a signed score whose perp_dominant setups are negative.
+        """
+        now = clock.now()
         signal_key = f"{signal}-{confidence}-{label}-{mode}"
         signal_hash = hashlib.sha256(signal_key.encode()).hexdigest()
 
         is_dominant = label in ["spot_dominant", "perp_dominant"]
-        is_strong = confidence >= 6
+        is_strong = confidence >= MIN_CONFIDENCE or (
+            two_sided and label == "perp_dominant" and confidence <= -MIN_CONFIDENCE
+        )
         is_cooldown_ok = now - self.last_signal_time > self.cooldown_seconds
         is_new = signal_hash != self.last_signal_hash
 
@@ -31,19 +51,16 @@ class SpotPerpAlertDispatcher:
             "reversal": "1h"
         }.get(mode, "15m")
 
-        # === GPT Commentary ===
-        try:
-            gpt_comment = await get_gpt_commentary({
-                "signal": signal,
-                "direction": direction,
-                "confidence": confidence,
-                "cb_cvd": deltas.get("cb_cvd", 0),
-                "bin_spot": deltas.get("bin_spot", 0),
-                "bin_perp": deltas.get("bin_perp", 0),
-                "label": label
-            })
-        except Exception as e:
-            gpt_comment = f"[GPT error: {e}]"
+        snapshot = {
+            "signal": signal,
+            "direction": direction,
+            "confidence": confidence,
+            "cb_cvd": deltas.get("cb_cvd", 0),
+            "bin_spot": deltas.get("bin_spot", 0),
+            "bin_perp": deltas.get("bin_perp", 0),
+            "label": label,
+            "mode": mode
+        }
 
         # === Final Alert Message ===
         alert = (
@@ -55,9 +72,24 @@ class SpotPerpAlertDispatcher:
             f"   • Coinbase: `{deltas.get('cb_cvd', '?')}%`\n"
             f"   • Binance Spot: `{deltas.get('bin_spot', '?')}%`\n"
             f"   • Binance Perp: `{deltas.get('bin_perp', '?')}%`\n\n"
-            f"🤖 GPT says: _{gpt_comment}_"
+            f"📝 {summarize(snapshot)}"
         )
 
-        await send_discord_alert(alert, mode=mode)
+        if event_ts is not None:
+            metrics.signal_age.observe(clock.now() - event_ts, mode, "dispatch")
+        await self.sender(alert, mode=mode, event_ts=event_ts)
         self.last_signal_time = now
         self.last_signal_hash = signal_hash
+
+        if self.commentary is not None:
+            task = asyncio.create_task(self._follow_up(snapshot, mode))
+            self._follow_ups.add(task)
+            task.add_done_callback(self._follow_ups.discard)
+
+    async def _follow_up(self, snapshot, mode):
+        try:
+            gpt_comment = await self.commentary(snapshot)
+            if gpt_comment:
+                await self.sender(f"🤖 GPT on **{snapshot['direction']}** ({snapshot['label']}): _{gpt_comment}_", mode=mode)
+        except Exception as e:
+            print(f"[X] GPT follow-up failed [{mode}]:", e)
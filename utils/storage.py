@@ -0,0 +1,252 @@
+# utils/storage.py (pluggable persistence for alerts, snapshots and traps: Supabase REST or local SQLite)
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")  # "supabase" or "sqlite"
+SQLITE_PATH = os.getenv("STORAGE_PATH", "spot_perp.db")
+
+# Table layouts, mirroring the Supabase tables. Keys a row carries beyond these columns
+# are kept as JSON in the "extra" column so nothing is lost.
+SCHEMA = {
+    "sniper_alerts": [
+        ("timestamp", "TEXT"),
+        ("signal", "TEXT"),
+        ("direction", "TEXT"),
+        ("confidence_score", "REAL"),
+        ("bias_label", "TEXT"),
+        ("cb_cvd", "REAL"),
+        ("bin_spot", "REAL"),
+        ("bin_perp", "REAL"),
+        ("triggered_price", "REAL"),
+        ("resolution_time", "TEXT"),
+        ("pnl_percent", "REAL"),
+        ("outcome", "TEXT")
+    ],
+    "cvd_snapshots": [
+        ("timestamp", "TEXT"),
+        ("exchange", "TEXT"),
+        ("spot_cvd", "REAL"),
+        ("perp_cvd", "REAL"),
+        ("price", "REAL"),
+        ("signal", "TEXT"),
+        ("confirmed_outcome", "TEXT")
+    ],
+    "Traps": [
+        ("uuid", "TEXT UNIQUE"),
+        ("timestamp", "REAL"),
+        ("signal", "TEXT"),
+        ("label", "TEXT"),
+        ("direction", "TEXT"),
+        ("confidence", "REAL"),
+        ("volume_score", "REAL"),
+        ("cb_cvd", "REAL"),
+        ("bin_spot", "REAL"),
+        ("bin_perp", "REAL"),
+        ("price", "REAL"),
+        ("gpt_comment", "TEXT"),
+        ("exit_price", "REAL"),
+        ("exit_time", "REAL"),
+        ("outcome", "TEXT"),
+        ("horizons", "TEXT"),  # JSON, see utils/horizon_resolver.py
+        ("mfe_pct", "REAL"),
+        ("mae_pct", "REAL")
+    ]
+}
+
+INDEXES = {
+    "sniper_alerts": ["timestamp", "bias_label", "direction"],
+    "cvd_snapshots": ["timestamp", "signal"],
+    "Traps": ["timestamp", "label", "direction", "outcome", ("direction", "label", "outcome"), ("confidence", "outcome")]
+}
+
+
+class SQLiteStorage:
+    """
+    Local backend: one SQLite file in WAL mode with indexes on timestamp, label and direction.
+    insert() buffers rows and commits them in one transaction every batch_size rows or
+    flush_seconds, whichever comes first; reads and updates flush the buffer first so
+    they always see every row written so far. Safe to share between threads.
+    A batch that fails is inserted again row by row; rows that still fail (duplicate
+    uuid, unbindable value) are logged, counted in failed and dropped.
+    """
+
+    def __init__(self, path=SQLITE_PATH, batch_size=500, flush_seconds=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.RLock()
+        self._pending = {}  # table -> list of value tuples
+        self._pending_rows = 0
+        self._last_commit = time.monotonic()
+        self._timer = None
+        self.failed = 0  # rows that could not be inserted and were dropped
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.conn:
+            for table, columns in SCHEMA.items():
+                cols = ", ".join(f'"{name}" {kind}' for name, kind in columns)
+                self.conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{table}" (id INTEGER PRIMARY KEY AUTOINCREMENT, {cols}, extra TEXT)'
+                )
+                # Columns added to SCHEMA after a database was created
+                existing = {row["name"] for row in self.conn.execute(f'PRAGMA table_info("{table}")')}
+                for name, kind in columns:
+                    if name not in existing:
+                        self.conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {kind.replace(" UNIQUE", "")}')
+                # A tuple is a composite index that covers the grouped analytics queries
+                for columns in INDEXES.get(table, ()):
+                    columns = (columns,) if isinstance(columns, str) else columns
+                    name = f"idx_{table.lower()}_" + "_".join(columns)
+                    quoted = ", ".join(f'"{column}"' for column in columns)
+                    self.conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({quoted})')
+
+    def _values(self, table, row):
+        names = [name for name, _ in SCHEMA[table]]
+        extra = {k: v for k, v in row.items() if k not in names and k != "id"}
+        return tuple(row.get(name) for name in names) + (json.dumps(extra) if extra else None,)
+
+    def insert(self, table, row):
+        with self._lock:
+            self._pending.setdefault(table, []).append(self._values(table, row))
+            self._pending_rows += 1
+            if self._pending_rows >= self.batch_size or time.monotonic() - self._last_commit >= self.flush_seconds:
+                self.flush()
+            elif self._timer is None:
+                # The tail of a burst is committed within flush_seconds even if nothing follows it
+                self._timer = threading.Timer(self.flush_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def insert_many(self, table, rows):
+        with self._lock:
+            self._pending.setdefault(table, []).extend(self._values(table, row) for row in rows)
+            self._pending_rows += len(rows)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending_rows:
+                try:
+                    with self.conn:
+                        for table, values in self._pending.items():
+                            self.conn.executemany(self._insert_sql(table), values)
+                except sqlite3.Error:
+                    # One bad row (duplicate uuid, unbindable value) fails the whole batch: keep the rest
+                    self._insert_each()
+                finally:
+                    self._pending.clear()
+                    self._pending_rows = 0
+            self._last_commit = time.monotonic()
+
+    def _insert_sql(self, table):
+        names = [name for name, _ in SCHEMA[table]] + ["extra"]
+        placeholders = ", ".join("?" * len(names))
+        columns = ", ".join(f'"{name}"' for name in names)
+        return f'INSERT INTO "{table}" ({columns}) VALUES ({placeholders})'
+
+    def _insert_each(self):
+        with self.conn:
+            for table, values in self._pending.items():
+                sql = self._insert_sql(table)
+                for value in values:
+                    try:
+                        self.conn.execute(sql, value)
+                    except sqlite3.Error as e:
+                        self.failed += 1
+                        print(f"[X] SQLite insert into {table} failed, row dropped ({self.failed} so far):", e)
+
+    def update(self, table, key, value, fields):
+        """Sets fields on the row(s) where key = value."""
+        with self._lock:
+            self.flush()
+            assignments = ", ".join(f'"{name}" = ?' for name in fields)
+            with self.conn:
+                self.conn.execute(
+                    f'UPDATE "{table}" SET {assignments} WHERE "{key}" = ?', (*fields.values(), value)
+                )
+
+    def query(self, sql, params=()):
+        with self._lock:
+            self.flush()
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def fetch(self, table, where=None, params=()):
+        sql = f'SELECT * FROM "{table}"' + (f" WHERE {where}" if where else "")
+        rows = self.query(sql, params)
+        for row in rows:
+            extra = row.pop("extra", None)
+            if extra:
+                row.update(json.loads(extra))
+        return rows
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self.conn.close()
+
+
+class SupabaseStorage:
+    """
+    Remote backend: inserts go through the batched utils/supabase_writer.py.
+    Reads stay with the supabase client (see utils/data_analyzer.py).
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def insert(self, table, row):
+        self.writer.enqueue(table, row)
+
+    def insert_many(self, table, rows):
+        for row in rows:
+            self.writer.enqueue(table, row)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.writer.close()
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """
+    Process-wide storage for STORAGE_BACKEND.
+    Returns None for the Supabase backend when SUPABASE_URL / SUPABASE_KEY are missing.
+    """
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if use_sqlite():
+                    _storage = SQLiteStorage()
+                    atexit.register(_storage.close)
+                else:
+                    from utils.supabase_writer import get_writer
+
+                    writer = get_writer()
+                    if writer is None:
+                        return None
+                    _storage = SupabaseStorage(writer)
+    return _storage
+
+
+def use_sqlite():
+    return STORAGE_BACKEND == "sqlite"
@@ -0,0 +1,250 @@
+# utils/supabase_writer.py (batched Supabase REST inserts off the engine loop, spooled to disk on outage)
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+import requests
+
+DEFAULT_SPOOL = os.getenv("SUPABASE_SPOOL", "supabase_spool.jsonl")
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# Rejections caused by particular rows (bad column or value, conflict, oversized body): the
+# batch is split to find them. Other 4xx (auth, missing table) reject every row alike.
+ROW_ERROR_STATUS = {400, 409, 413, 422}
+MAX_RETRY_AFTER = 60
+
+
+class SupabaseWriter:
+    """
+    Accepts rows with enqueue(table, row) and never blocks the caller.
+    A background thread groups queued rows per table and sends one bulk insert
+    (a JSON array POST to /rest/v1/<table>) every flush_seconds or batch_size rows,
+    retrying transient failures with exponential backoff (429s wait out Retry-After).
+    A batch rejected over particular rows is split in halves until only those rows are
+    left, so one bad row costs itself, not the batch.
+
+    Rows that still cannot be delivered, or that arrive while the queue is full, are
+    appended to spool_path as {"table": ..., "row": ...} lines. Whenever a send
+    succeeds (or every probe_seconds while idle) the spool is drained back to the
+    remote, oldest rows first.
+    base_url can point at any PostgREST-compatible endpoint (tests/ runs it against a stub).
+    """
+
+    def __init__(self, base_url, api_key, spool_path=DEFAULT_SPOOL, batch_size=200, flush_seconds=2.0,
+                 max_queue=10000, max_retries=4, backoff=0.5, timeout=10, probe_seconds=30):
+        self.base_url = base_url.rstrip("/")
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.probe_seconds = probe_seconds  # idle wait before retrying the spool after a failure
+        self._next_probe = 0.0
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "apikey": api_key,
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Prefer": "return=minimal"
+        })
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._spool_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.sent = 0
+        self.spooled = 0
+        self.dropped = 0
+
+    # --- Caller side ---
+    def enqueue(self, table, row):
+        self.start()
+        try:
+            self._queue.put_nowait((table, row))
+        except queue.Full:
+            self._spool([(table, row)])
+
+    def start(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="supabase-writer", daemon=True)
+                    self._thread.start()
+
+    def close(self, timeout=30):
+        """Flushes what is queued (spooling anything undeliverable) and stops the thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # --- Writer thread ---
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._send_batch(batch)
+            elif self._has_spool() and time.monotonic() >= self._next_probe:
+                self._drain_spool()
+        # Shutting down: one attempt per table, anything undeliverable goes to the spool
+        while not self._queue.empty():
+            self._send_batch(self._collect(block=False))
+
+    def _collect(self, block=True):
+        batch = []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if block and remaining > 0 and not self._stop.is_set():
+                    batch.append(self._queue.get(timeout=min(remaining, 0.5)))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                if not block or remaining <= 0 or self._stop.is_set():
+                    break
+        return batch
+
+    def _send_batch(self, batch):
+        by_table = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+
+        delivered = True
+        for table, rows in by_table.items():
+            unsent = self._deliver(table, rows)
+            if unsent:
+                delivered = False
+                self._spool([(table, row) for row in unsent])
+
+        if delivered and by_table and self._has_spool():
+            self._drain_spool()
+        elif not delivered:
+            self._next_probe = time.monotonic() + self.probe_seconds
+
+    def _deliver(self, table, rows):
+        """
+        Posts rows, counting sent / dropped, and returns the rows left undelivered (in order)
+        when the remote is unreachable or rate limiting, for the caller to spool.
+        """
+        status, detail = self._post(table, rows)
+        if status == "ok":
+            self.sent += len(rows)
+            return []
+        if status == "failed":
+            return rows
+        if status == "bad_rows" and len(rows) > 1:
+            mid = len(rows) // 2
+            unsent = self._deliver(table, rows[:mid])
+            if unsent:
+                return unsent + rows[mid:]  # the remote went away mid-split
+            return self._deliver(table, rows[mid:])
+        self.dropped += len(rows)
+        print(f"[X] Supabase insert into {table} rejected, dropped {len(rows)} rows:", detail)
+        return []
+
+    def _post(self, table, rows):
+        """("ok" | "bad_rows" | "rejected" | "failed", detail); failed means worth spooling."""
+        url = f"{self.base_url}/rest/v1/{table}"
+        for attempt in range(self.max_retries + 1):
+            wait = self.backoff * 2 ** attempt
+            try:
+                res = self.session.post(url, json=rows, timeout=self.timeout)
+                if res.status_code in (200, 201, 204):
+                    return "ok", None
+                error = f"{res.status_code} {res.text[:200]}"
+                if res.status_code in ROW_ERROR_STATUS:
+                    return "bad_rows", error
+                if res.status_code not in RETRYABLE_STATUS:
+                    return "rejected", error
+                if res.status_code == 429:
+                    # Rate limited, not refused: wait as told, and spool rather than drop if it persists
+                    retry_after = res.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        wait = min(int(retry_after), MAX_RETRY_AFTER)
+            except requests.RequestException as e:
+                error = e
+            if attempt < self.max_retries and not self._stop.is_set():
+                time.sleep(wait)
+        print(f"[X] Supabase insert into {table} failed after {self.max_retries + 1} attempts, spooling {len(rows)} rows:", error)
+        return "failed", error
+
+    # --- Spool ---
+    def _has_spool(self):
+        return os.path.exists(self.spool_path) or os.path.exists(self.spool_path + ".draining")
+
+    def _spool(self, items):
+        with self._spool_lock:
+            with open(self.spool_path, "a") as f:
+                for table, row in items:
+                    f.write(json.dumps({"table": table, "row": row}) + "\n")
+        self.spooled += len(items)
+
+    def _drain_spool(self):
+        draining = self.spool_path + ".draining"
+        with self._spool_lock:
+            # A failed or interrupted drain leaves its file behind; finish that one first
+            if not os.path.exists(draining):
+                if not os.path.exists(self.spool_path):
+                    return
+                os.replace(self.spool_path, draining)
+
+        with open(draining) as f:
+            items = []
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    items.append((record["table"], record["row"]))
+                except (ValueError, KeyError):
+                    continue
+
+        print(f"[✓] Draining {len(items)} spooled Supabase rows")
+        for start in range(0, len(items), self.batch_size):
+            chunk = items[start:start + self.batch_size]
+            by_table = {}
+            for table, row in chunk:
+                by_table.setdefault(table, []).append(row)
+            groups = list(by_table.items())
+            for i, (table, rows) in enumerate(groups):
+                unsent = self._deliver(table, rows)
+                if unsent:
+                    # Remote went away again: keep what is left in the draining file so order is kept
+                    leftover = ([(table, row) for row in unsent] + [(t, row) for t, group in groups[i + 1:] for row in group]
+                                + items[start + len(chunk):])
+                    with open(draining + ".tmp", "w") as f:
+                        for t, row in leftover:
+                            f.write(json.dumps({"table": t, "row": row}) + "\n")
+                    os.replace(draining + ".tmp", draining)
+                    self._next_probe = time.monotonic() + self.probe_seconds
+                    return
+        os.remove(draining)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer(url=None, key=None):
+    """
+    Process-wide writer, built on first use from url / key (default SUPABASE_URL / SUPABASE_KEY).
+    Returns None when no credentials are configured. Queued rows are flushed at interpreter exit.
+    """
+    global _writer
+    if _writer is None:
+        url = url or os.getenv("SUPABASE_URL")
+        key = key or os.getenv("SUPABASE_KEY")
+        if not url or not key:
+            return None
+        with _writer_lock:
+            if _writer is None:
+                _writer = SupabaseWriter(url, key)
+                atexit.register(_writer.close)
+    return _writer
@@ -1,93 +1,130 @@
 import json
-import os
 import time
 import uuid
-from openai import OpenAI
 
-TRAP_LOG_FILE = "trap_log.json"
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from utils.gpt_commentary import commentary_worker, summarize
+from utils.storage import get_storage, use_sqlite
+from utils.trap_log import TrapJournal
 
-def get_gpt_commentary(snapshot):
-    """
-    Uses GPT-4 to provide a short expert commentary on the trap signal.
-    """
-    try:
-        content = (
-            "You're a professional BTC sniper trade analyst.\n"
-            "Here is a trade trap snapshot:\n"
-            f"{json.dumps(snapshot, indent=2)}\n\n"
-            "Explain this trap signal in 1 short line:"
-        )
+TRAP_LOG_FILE = "trap_log.jsonl"
+LEGACY_TRAP_LOG_FILE = "trap_log.json"  # migrated into TRAP_LOG_FILE on first use
 
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": content}],
-            temperature=0.6,
-        )
-        return response.choices[0].message.content.strip()
+_journal = None
 
-    except Exception as e:
-        print("[X] GPT trap commentary failed:", e)
-        return "GPT unavailable"
+def get_journal():
+    global _journal
+    if _journal is None:
+        _journal = TrapJournal(TRAP_LOG_FILE, legacy_path=LEGACY_TRAP_LOG_FILE)
+    return _journal
 
 def log_trap_signal(snapshot):
     """
-    Logs trap signal with UUID and GPT commentary into local JSON file.
+    Logs trap signal with UUID as one appended line of the trap journal (or the Traps
+    table with STORAGE_BACKEND=sqlite). gpt_comment starts as the templated summary and
+    is replaced by the GPT commentary when the background worker delivers it.
     """
     snapshot["timestamp"] = time.time()
     snapshot["uuid"] = str(uuid.uuid4())
-    snapshot["gpt_comment"] = get_gpt_commentary(snapshot)
+    snapshot["gpt_comment"] = summarize(snapshot)
 
     try:
-        if os.path.exists(TRAP_LOG_FILE):
-            with open(TRAP_LOG_FILE, "r") as f:
-                data = json.load(f)
+        if use_sqlite():
+            get_storage().insert("Traps", snapshot)
         else:
-            data = []
-
-        data.append(snapshot)
-
-        with open(TRAP_LOG_FILE, "w") as f:
-            json.dump(data, f, indent=2)
+            get_journal().log(snapshot)
 
         print(f"🪤 Trap logged: {snapshot['signal']} at {snapshot['price']}")
-        print(f"🤖 GPT says: {snapshot['gpt_comment']}")
     except Exception as e:
         print("[X] Failed to write trap log:", e)
+        return
+
+    commentary_worker.submit(
+        {k: v for k, v in snapshot.items() if k not in ("uuid", "gpt_comment")},
+        lambda text: attach_gpt_comment(snapshot["uuid"], text)
+    )
+
+def attach_gpt_comment(trap_id, text):
+    try:
+        if use_sqlite():
+            get_storage().update("Traps", "uuid", trap_id, {"gpt_comment": text})
+        else:
+            get_journal().update(trap_id, {"gpt_comment": text})
+        print(f"🤖 GPT says [{trap_id[:8]}]: {text}")
+    except Exception as e:
+        print("[X] Failed to attach GPT commentary:", e)
 
 def resolve_trap_outcome(current_price):
     """
-    Loops through trap log and adds outcome results to unresolved traps.
+    Adds outcome results to unresolved traps; only the journal's open-trap index is read.
     """
-    try:
-        if not os.path.exists(TRAP_LOG_FILE):
-            return
+    if use_sqlite():
+        return _resolve_in_storage(current_price)
 
-        with open(TRAP_LOG_FILE, "r") as f:
-            data = json.load(f)
-
-        updated = False
-        for trap in data:
-            if "exit_price" not in trap:
-                entry = trap.get("price")
-                direction = trap.get("direction")
-                trap["exit_price"] = current_price
-                trap["exit_time"] = time.time()
-
-                if direction == "LONG":
-                    trap["outcome"] = "win" if current_price > entry else "loss"
-                elif direction == "SHORT":
-                    trap["outcome"] = "win" if current_price < entry else "loss"
-                else:
-                    trap["outcome"] = "unknown"
+    try:
+        journal = get_journal()
+        now = time.time()
+        resolutions = {
+            trap_id: {
+                "exit_price": current_price,
+                "exit_time": now,
+                "outcome": _outcome(trap.get("direction"), trap.get("price"), current_price)
+            }
+            for trap_id, trap in journal.open.items()
+        }
+
+        if journal.resolve(resolutions):
+            print("📈 Trap outcomes resolved and saved.")
 
-                updated = True
+    except Exception as e:
+        print("[X] Trap outcome resolution failed:", e)
 
-        if updated:
-            with open(TRAP_LOG_FILE, "w") as f:
-                json.dump(data, f, indent=2)
+def _outcome(direction, entry, current_price):
+    if direction == "LONG":
+        return "win" if current_price > entry else "loss"
+    if direction == "SHORT":
+        return "win" if current_price < entry else "loss"
+    return "unknown"
+
+def _resolve_in_storage(current_price):
+    storage = get_storage()
+    open_traps = storage.query('SELECT uuid, price, direction FROM "Traps" WHERE exit_price IS NULL')
+    now = time.time()
+    for trap in open_traps:
+        storage.update("Traps", "uuid", trap["uuid"], {
+            "exit_price": current_price,
+            "exit_time": now,
+            "outcome": _outcome(trap["direction"], trap["price"], current_price)
+        })
+    if open_traps:
+        print("📈 Trap outcomes resolved and saved.")
+
+def open_traps():
+    """uuid -> {timestamp, price, direction, label, horizons} for every unresolved trap."""
+    if use_sqlite():
+        rows = get_storage().query(
+            'SELECT uuid, timestamp, price, direction, label, horizons FROM "Traps" WHERE exit_price IS NULL'
+        )
+        return {
+            row.pop("uuid"): {**row, "horizons": json.loads(row["horizons"]) if row["horizons"] else None}
+            for row in rows
+        }
+    return dict(get_journal().open)
 
-            print("📈 Trap outcomes resolved and saved.")
+def record_trap_horizon(trap_id, fields, final):
+    """
+    Stores one horizon result from utils/horizon_resolver.py; final closes the trap
+    with exit_price / exit_time / outcome.
+    """
+    try:
+        if use_sqlite():
+            get_storage().update("Traps", "uuid", trap_id, {**fields, "horizons": json.dumps(fields["horizons"])})
+        elif final:
+            get_journal().resolve({trap_id: fields})
+        else:
+            get_journal().update(trap_id, fields)
 
+        if final:
+            print(f"📈 Trap {trap_id[:8]} resolved: {fields['outcome']} "
+                  f"(MFE {fields['mfe_pct']}% / MAE {fields['mae_pct']}%)")
     except Exception as e:
-        print("[X] Trap outcome resolution failed:", e)
+        print("[X] Trap horizon update failed:", e)
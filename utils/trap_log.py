@@ -0,0 +1,183 @@
+# utils/trap_log.py (append-only JSONL trap journal with an index of open traps)
+
+import json
+import os
+
+# What the open-trap index keeps per trap: enough to resolve it without reading the journal
+INDEX_FIELDS = ("timestamp", "price", "direction", "label", "horizons")
+
+
+class TrapJournal:
+    """
+    Line-delimited trap journal. Every change is one appended line:
+      {"op": "open", "trap": {...}}                      a new trap (uuid inside)
+      {"op": "update", "uuid": "...", "fields": {...}}   partial results, the trap stays open
+      {"op": "resolve", "uuid": "...", "fields": {...}}  outcome fields that close an open trap
+    so logging and resolving never rewrite the file. A line torn by a crash is cut off on open.
+
+    <path>.open holds the unresolved traps as of a journal offset. log() only appends; the
+    index is rewritten on resolve(), compact() and update()s that change an INDEX_FIELDS
+    value, and on open the journal lines past its offset are replayed onto it, so it never
+    has to be rebuilt from the whole file.
+    compact() folds resolve lines into their traps, drops resolved traps beyond max_resolved
+    and runs automatically every compact_every resolutions.
+    """
+
+    def __init__(self, path="trap_log.jsonl", compact_every=1000, max_resolved=20000, legacy_path=None):
+        self.path = path
+        self.index_path = path + ".open"
+        self.compact_every = compact_every
+        self.max_resolved = max_resolved
+        self.open = {}  # uuid -> INDEX_FIELDS of every unresolved trap
+        self._since_compact = 0
+
+        if legacy_path and os.path.exists(legacy_path) and not os.path.exists(path):
+            self._migrate(legacy_path)
+        self._repair_tail()
+        self._load_index()
+
+    # --- Index ---
+    def _journal_size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def _repair_tail(self):
+        """Truncates a partial last line so the next append starts on a line of its own."""
+        size = self._journal_size()
+        if not size:
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+            if tail.endswith(b"\n"):
+                return
+            cut = tail.rfind(b"\n")
+            f.truncate(size - len(tail) + cut + 1 if cut >= 0 else 0)
+            print(f"[X] Trap journal {self.path}: dropped a torn last line")
+
+    def _load_index(self):
+        offset = 0
+        self.open = {}
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if index["journal_size"] <= self._journal_size():
+                offset = index["journal_size"]
+                self.open = index["open"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        # Replay whatever was appended after the index was written (everything if there was none)
+        for record in self._records(offset):
+            if record.get("op") == "open":
+                trap = record["trap"]
+                if "exit_price" not in trap:
+                    self.open[trap["uuid"]] = self._index_entry(trap)
+            elif record.get("op") == "update" and record.get("uuid") in self.open:
+                self._index_update(record["uuid"], record["fields"])
+            elif record.get("op") == "resolve":
+                self.open.pop(record.get("uuid"), None)
+        self._save_index()
+
+    @staticmethod
+    def _index_entry(trap):
+        return {field: trap.get(field) for field in INDEX_FIELDS}
+
+    def _index_update(self, uuid, fields):
+        """Returns whether any indexed field changed."""
+        entry = self.open[uuid]
+        changed = {k: v for k, v in fields.items() if k in INDEX_FIELDS and entry.get(k) != v}
+        entry.update(changed)
+        return bool(changed)
+
+    def _save_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"journal_size": self._journal_size(), "open": self.open}, f)
+        os.replace(tmp, self.index_path)
+
+    # --- Writes ---
+    def _append(self, record):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def log(self, trap):
+        self._append({"op": "open", "trap": trap})
+        self.open[trap["uuid"]] = self._index_entry(trap)
+
+    def update(self, uuid, fields):
+        """Appends partial results for an open trap without closing it."""
+        if uuid not in self.open:
+            return False
+        self._append({"op": "update", "uuid": uuid, "fields": fields})
+        # Updates that touch no indexed field (e.g. the GPT comment) are replayed from the journal on open
+        if self._index_update(uuid, fields):
+            self._save_index()
+        return True
+
+    def resolve(self, resolutions):
+        """resolutions: {uuid: fields}. Only traps still open are touched."""
+        resolutions = {uuid: fields for uuid, fields in resolutions.items() if uuid in self.open}
+        if not resolutions:
+            return 0
+        with open(self.path, "a") as f:
+            for uuid, fields in resolutions.items():
+                f.write(json.dumps({"op": "resolve", "uuid": uuid, "fields": fields}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for uuid in resolutions:
+            del self.open[uuid]
+        self._save_index()
+
+        self._since_compact += len(resolutions)
+        if self._since_compact >= self.compact_every:
+            self.compact()
+        return len(resolutions)
+
+    # --- Reads / maintenance ---
+    def _records(self, offset=0):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # torn write
+
+    def read(self):
+        """Every trap in log order with its resolution merged in."""
+        traps = {}
+        for record in self._records():
+            if record.get("op") == "open":
+                trap = record["trap"]
+                traps[trap["uuid"]] = trap
+            elif record.get("op") in ("update", "resolve") and record.get("uuid") in traps:
+                traps[record["uuid"]].update(record["fields"])
+        return list(traps.values())
+
+    def compact(self):
+        traps = self.read()
+        resolved = [t for t in traps if "exit_price" in t]
+        keep = {t["uuid"] for t in resolved[-self.max_resolved:]} if self.max_resolved else set()
+
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            for trap in traps:
+                if "exit_price" not in trap or trap["uuid"] in keep:
+                    f.write(json.dumps({"op": "open", "trap": trap}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._since_compact = 0
+        self._save_index()
+
+    def _migrate(self, legacy_path):
+        with open(legacy_path) as f:
+            traps = json.load(f)
+        with open(self.path, "w") as f:
+            for trap in traps:
+                f.write(json.dumps({"op": "open", "trap": trap}) + "\n")
+        print(f"[✓] Migrated {len(traps)} traps from {legacy_path} to {self.path}")